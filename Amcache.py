@@ -6,18 +6,23 @@ Version: 1
 
 import ctypes
 import os
-from platform import system, version
 import sys
 import sqlite3
 import json
-import csv
+import math
 import logging
-import argparse
-from pathlib import Path
+import struct
+import contextlib
+import io
+import itertools
+import functools
+import re
+from array import array
+from collections import Counter, OrderedDict, deque
 from typing import List, Optional
-import subprocess
 import time
-from datetime import datetime, timezone
+import threading
+from datetime import datetime, timedelta, timezone
 
 LOGO = """
 ═══════════════════════════════════════════════════════════════════
@@ -34,6 +39,36 @@ LOGO = """
 # Configuration defaults
 DEFAULT_DATABASE_PATH = r"C:\Amcache\amcache.db"
 DEFAULT_LIVE_PATH = r"C:\Windows\AppCompat\Programs\Amcache.hve"
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_INDEX_MAX_IDS = 1_000_000
+OUTPUT_FORMATS = ['sqlite', 'json', 'jsonl', 'csv', 'parquet', 'arrow']
+STREAMING_OUTPUT_FORMATS = ['jsonl', 'csv', 'parquet', 'arrow']
+DEFAULT_ROW_GROUP_SIZE = 65536
+DEFAULT_SHARD_SIZE = 5000
+DEFAULT_TIMESTAMP_CACHE = 100_000
+DEFAULT_PIPELINE_BATCH = 1000
+DEFAULT_EXPORT_ARRAY_SIZE = 1000
+EXPORT_FORMATS = ['jsonl', 'csv', 'parquet', 'arrow']
+DEFAULT_SERVE_PORT = 8765
+DEFAULT_SERVE_POOL = 4
+DEFAULT_SERVE_CACHE = 256
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+SERVE_CACHE_MAX_BODY = 1 << 20
+SERVE_VERSION_CHECK = 1.0
+SERVE_HOSTS = ('127.0.0.1', 'localhost', '[::1]')
+TEXT_OUTPUT_FORMATS = ['json', 'jsonl', 'csv']
+# method: (file suffix, default level)
+COMPRESSIONS = {'gzip': ('.gz', 6), 'bz2': ('.bz2', 9), 'xz': ('.xz', 6)}
+DEFAULT_COMPRESS_BLOCK = 1 << 20
+DEFAULT_WATCH_INTERVAL = 2.0
+DEFAULT_WATCH_SETTLE = 10.0
+DEFAULT_WATCH_RETRIES = 3
+DEFAULT_WATCH_BACKOFF = 30.0
+WATCH_RATE_WINDOW = 300
+WATCH_INDEX_INTERVAL = 600
+DEFAULT_QUEUE_DEPTH = 8
+ENGINES = ['registry', 'native']
 
 # LCID to Language Name mapping
 LCID_TO_LANGUAGE = {
@@ -89,6 +124,134 @@ LCID_TO_LANGUAGE = {
     1102: "Marathi (India)"
 }
 
+# Declarative schemas for the known Inventory subkeys: (value name, kind) per typed column.
+# Kinds are 'text', 'int', 'timestamp' (date string) and 'epoch' (Unix seconds). Values not listed go to the JSON overflow column
+# ("data"), and subkeys not listed keep all their values there.
+SUBKEY_SCHEMAS = {
+    "InventoryApplication": (
+        ("ProgramId", "text"), ("ProgramInstanceId", "text"), ("Name", "text"), ("Version", "text"),
+        ("Publisher", "text"), ("Language", "int"), ("InstallDate", "timestamp"), ("Source", "text"),
+        ("RootDirPath", "text"), ("HiddenArp", "int"), ("UninstallString", "text"), ("RegistryKeyPath", "text"),
+        ("MsiPackageCode", "text"), ("MsiProductCode", "text"), ("MsiInstallDate", "timestamp"), ("(default)", "text"),
+        ("Type", "text"), ("StoreAppType", "text"), ("InboxModernApp", "int"), ("OSVersionAtInstallTime", "text"),
+        ("PackageFullName", "text"), ("ManifestPath", "text"), ("BundleManifestPath", "text"),
+    ),
+    "InventoryApplicationFile": (
+        ("ProgramId", "text"), ("FileId", "text"), ("LowerCaseLongPath", "text"), ("Name", "text"),
+        ("OriginalFileName", "text"), ("Publisher", "text"), ("Version", "text"), ("BinFileVersion", "text"),
+        ("BinaryType", "text"), ("ProductName", "text"), ("ProductVersion", "text"), ("LinkDate", "timestamp"),
+        ("BinProductVersion", "text"), ("Size", "int"), ("Language", "int"), ("Usn", "int"),
+        ("LongPathHash", "text"), ("IsOsComponent", "int"), ("IsPeFile", "int"),
+        ("AppxPackageFullName", "text"), ("AppxPackageRelativeId", "text"),
+    ),
+    "InventoryApplicationShortcut": (
+        ("ShortcutPath", "text"), ("ShortcutTargetPath", "text"), ("ShortcutAumid", "text"), ("ShortcutProgramId", "text"),
+    ),
+    "InventoryDriverBinary": (
+        ("DriverName", "text"), ("Inf", "text"), ("DriverVersion", "text"), ("Product", "text"),
+        ("ProductVersion", "text"), ("WdfVersion", "text"), ("DriverCompany", "text"),
+        ("DriverPackageStrongName", "text"), ("Service", "text"), ("DriverInBox", "int"), ("DriverSigned", "int"),
+        ("DriverIsKernelMode", "int"), ("DriverId", "text"), ("DriverLastWriteTime", "timestamp"),
+        ("DriverType", "int"), ("DriverTimeStamp", "epoch"), ("DriverCheckSum", "int"), ("ImageSize", "int"),
+    ),
+    "InventoryDriverPackage": (
+        ("ClassGuid", "text"), ("Class", "text"), ("Directory", "text"), ("Date", "text"), ("Version", "text"),
+        ("Provider", "text"), ("SubmissionId", "text"), ("DriverInBox", "int"), ("Inf", "text"),
+        ("FlightIds", "text"), ("RecoveryIds", "text"), ("IsActive", "int"), ("Hwids", "text"), ("SYSFILE", "text"),
+    ),
+    "InventoryDevicePnp": (
+        ("Model", "text"), ("Manufacturer", "text"), ("DriverName", "text"), ("ParentId", "text"),
+        ("MatchingID", "text"), ("Class", "text"), ("ClassGuid", "text"), ("Description", "text"),
+        ("Enumerator", "text"), ("Service", "text"), ("InstallState", "int"), ("DeviceState", "int"),
+        ("Inf", "text"), ("DriverVerVersion", "text"), ("DriverVerDate", "text"), ("InstallDate", "text"),
+        ("FirstInstallDate", "text"), ("DriverPackageStrongName", "text"), ("DriverId", "text"),
+        ("LowerClassFilters", "text"), ("LowerFilters", "text"), ("UpperClassFilters", "text"),
+        ("UpperFilters", "text"), ("ContainerId", "text"), ("ProblemCode", "int"), ("Provider", "text"),
+        ("HWID", "text"), ("COMPID", "text"), ("BusReportedDescription", "text"), ("STACKID", "text"),
+        ("ExtendedInfs", "text"),
+    ),
+    "InventoryDeviceContainer": (
+        ("Categories", "text"), ("DiscoveryMethod", "text"), ("FriendlyName", "text"), ("Icon", "text"),
+        ("IsActive", "int"), ("IsConnected", "int"), ("IsMachineContainer", "int"), ("IsNetworked", "int"),
+        ("IsPaired", "int"), ("Manufacturer", "text"), ("ModelId", "text"), ("ModelName", "text"),
+        ("ModelNumber", "text"), ("PrimaryCategory", "text"), ("State", "int"),
+    ),
+    "InventoryDeviceMediaClass": (
+        ("Audio_CaptureDriver", "text"), ("Audio_RenderDriver", "text"),
+    ),
+    "InventoryDeviceUsbHubClass": (
+        ("TotalUserConnectablePorts", "int"), ("TotalUserConnectableTypeCPorts", "int"),
+    ),
+    "InventoryMiscellaneousOfficeAddIn": (
+        ("AddInId", "text"), ("BinFileTimestamp", "text"), ("BinFileVersion", "text"), ("Description", "text"),
+        ("FileId", "text"), ("FileSize", "int"), ("FriendlyName", "text"), ("FullPath", "text"),
+        ("LoadBehavior", "int"), ("OfficeApplication", "text"), ("OfficeArchitecture", "text"),
+        ("OfficeVersion", "text"), ("OutlookCrashingAddin", "text"), ("ProductCompany", "text"),
+        ("ProductName", "text"), ("ProductVersion", "text"), ("ProgramId", "text"), ("Provider", "text"),
+    ),
+}
+
+# SQL column type per schema kind; timestamps stay as collected, with normalised companion columns
+SQL_COLUMN_TYPES = {"text": "TEXT", "int": "INTEGER", "timestamp": "TEXT", "epoch": "INTEGER"}
+TIMESTAMP_KINDS = ("timestamp", "epoch")
+
+# Secondary indexes built after the bulk load, and the columns searchable through FTS5
+SUBKEY_INDEXES = {
+    "InventoryApplicationFile": ("LowerCaseLongPath", "FileId", "ProgramId", "Publisher", "Name", "LinkDate_epoch",
+                                 "key_last_write_epoch"),
+    "InventoryApplication": ("ProgramId", "Publisher", "InstallDate_epoch", "Name", "key_last_write_epoch"),
+    "InventoryApplicationShortcut": ("ShortcutProgramId",),
+    "InventoryDriverBinary": ("DriverName", "DriverId", "DriverCompany", "key_last_write_epoch"),
+    "InventoryDevicePnp": ("DriverId", "Manufacturer"),
+}
+FTS_COLUMNS = {
+    "InventoryApplicationFile": ("LowerCaseLongPath", "Name", "OriginalFileName"),
+    "InventoryApplication": ("Name", "RootDirPath"),
+    "InventoryApplicationShortcut": ("ShortcutPath", "ShortcutTargetPath"),
+}
+
+# Fields swept against IOC sets per subkey; "entry_id" stands for the key name itself
+IOC_HASH_FIELDS = {
+    "InventoryApplicationFile": ("FileId",),
+    "InventoryDriverBinary": ("DriverId",),
+    "InventoryMiscellaneousOfficeAddIn": ("FileId",),
+}
+IOC_PATH_FIELDS = {
+    "InventoryApplicationFile": ("LowerCaseLongPath",),
+    "InventoryDriverBinary": ("entry_id",),
+    "InventoryApplicationShortcut": ("ShortcutPath", "ShortcutTargetPath"),
+    "InventoryMiscellaneousOfficeAddIn": ("FullPath",),
+}
+
+# Native types for typed (columnar) outputs of subkeys without a schema, by value name
+COLUMN_TYPES = {name: kind for schema in SUBKEY_SCHEMAS.values() for name, kind in schema if kind != "text"}
+
+_FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+_ISO_TIMESTAMP = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d{3}(?:\d{3})?)?)?)?(?:Z|[+-]\d{2}:\d{2})?$")
+_US_DATE_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y")
+# Shorter digit strings are YYYYMMDD dates or counters, not Unix epochs (nine digits already reach back to 1973).
+_MIN_EPOCH_DIGITS = 9
+
+# regf layout used by the native engine; cell offsets are relative to the first hive bin
+_HBIN_START = 0x1000
+_BIG_DATA_SEGMENT = 0x3FD8
+_NK_ASCII_NAME = 0x20
+_VK_ASCII_NAME = 0x1
+_U16 = struct.Struct('<H')
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+_BE32 = struct.Struct('>I')
+_NK_COUNTS = struct.Struct('<I4xI')     # subkey count, stable subkey list
+_NK_VALUES = struct.Struct('<II')       # value count, value list
+_VK_HEADER = struct.Struct('<HIIIH')    # name length, data size, data offset, data type, flags
+
+# Transaction log (.LOG1/.LOG2) layout, Windows 8.1+ "HvLE" format
+_LOG_ENTRIES_START = 0x200
+_LOG_ENTRY_HEADER = struct.Struct('<4sIIIII')  # signature, size, flags, sequence, hive bins size, dirty pages
+_LOG_ENTRY_HASHES = struct.Struct('<QQ')
+_LOG_FILE_TYPE_NEW = 6
+_MARVIN32_SEED = 0x82EF4D887A4E55C5
+
 # Windows API definitions
 _TOKEN_ADJUST_PRIVILEGES = 0x20
 _SE_PRIVILEGE_ENABLED = 0x2
@@ -120,41 +283,54 @@ class _TOKEN_PRIVILEGES_5(ctypes.Structure):
                 ('Privilege1', _LUID_AND_ATTRIBUTES), ('Privilege2', _LUID_AND_ATTRIBUTES),
                 ('Privilege3', _LUID_AND_ATTRIBUTES), ('Privilege4', _LUID_AND_ATTRIBUTES)]
 
-# Windows API function definitions
-ctypes.windll.kernel32.GetCurrentProcess.restype = ctypes.c_void_p
-ctypes.windll.kernel32.GetCurrentProcess.argtypes = []
-ctypes.windll.advapi32.LookupPrivilegeValueW.restype = ctypes.c_int32
-ctypes.windll.advapi32.LookupPrivilegeValueW.argtypes = [ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_void_p]
-ctypes.windll.advapi32.OpenProcessToken.restype = ctypes.c_int32
-ctypes.windll.advapi32.OpenProcessToken.argtypes = [ctypes.c_void_p, ctypes.c_uint32, ctypes.c_void_p]
-ctypes.windll.advapi32.AdjustTokenPrivileges.restype = ctypes.c_int32
-ctypes.windll.advapi32.AdjustTokenPrivileges.argtypes = [ctypes.c_void_p, ctypes.c_int32, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_void_p, ctypes.c_void_p]
-ctypes.windll.kernel32.GetLastError.restype = ctypes.c_uint32
-ctypes.windll.kernel32.GetLastError.argtypes = []
-ctypes.windll.kernel32.CloseHandle.restype = ctypes.c_int32
-ctypes.windll.kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
-ctypes.windll.kernel32.CreateFileW.restype = ctypes.c_void_p
-ctypes.windll.kernel32.CreateFileW.argtypes = [ctypes.c_wchar_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p]
-ctypes.windll.advapi32.RegOpenKeyExW.restype = ctypes.c_int32
-ctypes.windll.advapi32.RegOpenKeyExW.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p]
-ctypes.windll.advapi32.RegCloseKey.restype = ctypes.c_int32
-ctypes.windll.advapi32.RegCloseKey.argtypes = [ctypes.c_void_p]
-ctypes.windll.ntdll.NtSaveKeyEx.restype = ctypes.c_int32
-ctypes.windll.ntdll.NtSaveKeyEx.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32]
-ctypes.windll.kernel32.GetTempFileNameA.restype = ctypes.c_uint32
-ctypes.windll.kernel32.GetTempFileNameA.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32, ctypes.c_void_p]
-ctypes.windll.kernel32.SetFilePointer.restype = ctypes.c_uint32
-ctypes.windll.kernel32.SetFilePointer.argtypes = [ctypes.c_void_p, ctypes.c_int32, ctypes.c_void_p, ctypes.c_uint32]
-ctypes.windll.kernel32.ReadFile.restype = ctypes.c_int32
-ctypes.windll.kernel32.ReadFile.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_void_p, ctypes.c_void_p]
-
-_APP_HIVES_SUPPORTED = hasattr(ctypes.windll.advapi32, 'RegLoadAppKeyW')
-if _APP_HIVES_SUPPORTED:
-    ctypes.windll.advapi32.RegLoadAppKeyW.restype = ctypes.c_int32
-    ctypes.windll.advapi32.RegLoadAppKeyW.argtypes = [ctypes.c_wchar_p, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_uint32]
+# Windows API function definitions, bound lazily for live analysis
+_APP_HIVES_SUPPORTED = False
+_WINDOWS_API_BOUND = False
+
+def _bind_windows_api():
+    """Declare the Windows API prototypes on first use, so importing the module needs no Windows DLLs."""
+    global _APP_HIVES_SUPPORTED, _WINDOWS_API_BOUND
+    if _WINDOWS_API_BOUND:
+        return
+    if not hasattr(ctypes, 'windll'):
+        raise OSError('Live analysis requires the Windows registry API')
+    ctypes.windll.kernel32.GetCurrentProcess.restype = ctypes.c_void_p
+    ctypes.windll.kernel32.GetCurrentProcess.argtypes = []
+    ctypes.windll.advapi32.LookupPrivilegeValueW.restype = ctypes.c_int32
+    ctypes.windll.advapi32.LookupPrivilegeValueW.argtypes = [ctypes.c_wchar_p, ctypes.c_wchar_p, ctypes.c_void_p]
+    ctypes.windll.advapi32.OpenProcessToken.restype = ctypes.c_int32
+    ctypes.windll.advapi32.OpenProcessToken.argtypes = [ctypes.c_void_p, ctypes.c_uint32, ctypes.c_void_p]
+    ctypes.windll.advapi32.AdjustTokenPrivileges.restype = ctypes.c_int32
+    ctypes.windll.advapi32.AdjustTokenPrivileges.argtypes = [ctypes.c_void_p, ctypes.c_int32, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_void_p, ctypes.c_void_p]
+    ctypes.windll.kernel32.GetLastError.restype = ctypes.c_uint32
+    ctypes.windll.kernel32.GetLastError.argtypes = []
+    ctypes.windll.kernel32.CloseHandle.restype = ctypes.c_int32
+    ctypes.windll.kernel32.CloseHandle.argtypes = [ctypes.c_void_p]
+    ctypes.windll.kernel32.CreateFileW.restype = ctypes.c_void_p
+    ctypes.windll.kernel32.CreateFileW.argtypes = [ctypes.c_wchar_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p]
+    ctypes.windll.advapi32.RegOpenKeyExW.restype = ctypes.c_int32
+    ctypes.windll.advapi32.RegOpenKeyExW.argtypes = [ctypes.c_void_p, ctypes.c_wchar_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p]
+    ctypes.windll.advapi32.RegCloseKey.restype = ctypes.c_int32
+    ctypes.windll.advapi32.RegCloseKey.argtypes = [ctypes.c_void_p]
+    ctypes.windll.ntdll.NtSaveKeyEx.restype = ctypes.c_int32
+    ctypes.windll.ntdll.NtSaveKeyEx.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32]
+    ctypes.windll.kernel32.GetTempFileNameA.restype = ctypes.c_uint32
+    ctypes.windll.kernel32.GetTempFileNameA.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32, ctypes.c_void_p]
+    ctypes.windll.kernel32.SetFilePointer.restype = ctypes.c_uint32
+    ctypes.windll.kernel32.SetFilePointer.argtypes = [ctypes.c_void_p, ctypes.c_int32, ctypes.c_void_p, ctypes.c_uint32]
+    ctypes.windll.kernel32.ReadFile.restype = ctypes.c_int32
+    ctypes.windll.kernel32.ReadFile.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_void_p, ctypes.c_void_p]
+
+    _APP_HIVES_SUPPORTED = hasattr(ctypes.windll.advapi32, 'RegLoadAppKeyW')
+    if _APP_HIVES_SUPPORTED:
+        ctypes.windll.advapi32.RegLoadAppKeyW.restype = ctypes.c_int32
+        ctypes.windll.advapi32.RegLoadAppKeyW.argtypes = [ctypes.c_wchar_p, ctypes.c_void_p, ctypes.c_uint32, ctypes.c_uint32, ctypes.c_uint32]
+    _WINDOWS_API_BOUND = True
 
 def ensure_venv_and_relaunch():
     """Ensure virtual environment exists and relaunch script in it if not active."""
+    import subprocess
+    from pathlib import Path
     logging.basicConfig(
         filename=r'C:\Amcache\amcache_parser.log',
         level=logging.DEBUG,
@@ -203,10 +379,11 @@ def ensure_venv_and_relaunch():
 
 def check_and_install_packages():
     """Check for required packages and install in virtual environment if missing."""
-    required_packages = ['python-registry', 'tqdm']
-    for package in required_packages:
+    import subprocess
+    required_packages = {'python-registry': 'Registry', 'tqdm': 'tqdm'}
+    for package, module in required_packages.items():
         try:
-            __import__(package)
+            __import__(module)
             logging.debug(f"Package {package} already installed")
         except ImportError:
             print(f"Installing {package} in virtual environment...")
@@ -220,10 +397,117 @@ def check_and_install_packages():
                 logging.error(f"Failed to install {package}: {e}")
                 sys.exit(1)
 
-ensure_venv_and_relaunch()
-check_and_install_packages()
-from Registry import Registry
-from tqdm import tqdm
+
+def table_name(subkey_name: str) -> str:
+    """SQLite table (and output file stem) for a subkey."""
+    return subkey_name.replace("-", "_").replace(" ", "_")
+
+def column_name(value_name: str) -> str:
+    """Database column for a registry value name (the unnamed default value becomes DefaultValue)."""
+    return "DefaultValue" if value_name == "(default)" else value_name
+
+def subkey_columns(subkey_name: str) -> list:
+    """(column, value name, kind) for every typed column of a subkey, with LanguageName after Language."""
+    columns = []
+    for value_name, kind in SUBKEY_SCHEMAS.get(subkey_name, ()):
+        columns.append((column_name(value_name), value_name, kind))
+        if value_name == "Language":
+            columns.append(("LanguageName", None, "text"))
+    return columns
+
+def timestamp_sources(subkey_name: str) -> list:
+    """Columns that get <column>_epoch and <column>_iso companions: key_last_write plus the schema's timestamps."""
+    return ["key_last_write"] + [column for column, _, kind in subkey_columns(subkey_name) if kind in TIMESTAMP_KINDS]
+
+def language_name(language_value) -> str:
+    """Map an LCID value to its language name."""
+    if isinstance(language_value, int):
+        return LCID_TO_LANGUAGE.get(language_value, "Unknown")
+    return LCID_TO_LANGUAGE.get(int(language_value), "Unknown") if language_value and language_value.isdigit() else "Unknown"
+
+def coerce_int(value) -> Optional[int]:
+    """Convert a registry value (DWORD/QWORD or decimal/hex string) to an int."""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return int(value, 0) if value.lower().startswith('0x') else int(value)
+        except ValueError:
+            return None
+    return None
+
+def filetime(value: datetime) -> int:
+    """Convert a datetime (naive values are UTC) to a FILETIME."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _FILETIME_EPOCH) // timedelta(microseconds=1) * 10
+
+def coerce_timestamp(value) -> Optional[datetime]:
+    """Convert an Amcache timestamp (MM/DD/YYYY[ HH:MM:SS], YYYYMMDD or ISO 8601 string, FILETIME or Unix epoch) to UTC."""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, int) and value > 0:
+        if value > 10 ** 14:
+            return _FILETIME_EPOCH + timedelta(microseconds=value // 10)
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str) and value:
+        try:
+            if len(value) == 8 and value.isascii() and value.isdigit():
+                return datetime(int(value[:4]), int(value[4:6]), int(value[6:]), tzinfo=timezone.utc)
+            if _ISO_TIMESTAMP.match(value):
+                moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+                return moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+        except ValueError:
+            return None
+        for date_format in _US_DATE_FORMATS:
+            try:
+                return datetime.strptime(value, date_format).replace(tzinfo=timezone.utc)
+            except ValueError:
+                pass
+    return None
+
+class TimestampNormalizer:
+    """Converts timestamp columns to (Unix epoch, ISO 8601) pairs a batch at a time, caching repeated values."""
+    def __init__(self, max_cache: int = DEFAULT_TIMESTAMP_CACHE):
+        self.max_cache = max_cache
+        self.values = 0
+        self.converted = 0
+        self._cache = {}
+
+    @staticmethod
+    def convert(value) -> tuple:
+        """Return (epoch, iso) for one Amcache timestamp, or (None, None) if it is not one."""
+        try:
+            if isinstance(value, str) and len(value) == 19 and value[2] == '/' and value[5] == '/' and value[13] == ':':
+                # Fast path for the MM/DD/YYYY HH:MM:SS strings that dominate Amcache.
+                dt = datetime(int(value[6:10]), int(value[0:2]), int(value[3:5]),
+                              int(value[11:13]), int(value[14:16]), int(value[17:19]), tzinfo=timezone.utc)
+            elif isinstance(value, str) and len(value) >= _MIN_EPOCH_DIGITS and value.isascii() and value.isdigit():
+                dt = coerce_timestamp(int(value))  # FILETIME or Unix epoch stored as a string
+            else:
+                dt = coerce_timestamp(value)
+        except (ValueError, OverflowError, OSError):
+            return None, None
+        if dt is None:
+            return None, None
+        return int(dt.timestamp()), dt.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    def convert_column(self, values: list) -> list:
+        """Convert one column of a batch; only distinct values not seen before are parsed."""
+        cache = self._cache
+        missing = {value for value in values if value not in cache}
+        if missing:
+            if len(cache) + len(missing) > self.max_cache:
+                cache.clear()
+            for value in missing:
+                cache[value] = self.convert(value) if value is not None else (None, None)
+            self.converted += len(missing)
+        self.values += len(values)
+        return [cache[value] for value in values]
+
+    def report(self) -> str:
+        return (f"Timestamps: {self.values} values normalised, {self.converted} distinct conversions "
+                f"({100 * (1 - self.converted / max(self.values, 1)):.0f}% from cache)")
 
 def is_admin() -> bool:
     """Check if the script is running with administrative privileges."""
@@ -235,10 +519,14 @@ def is_admin() -> bool:
 class NTFileLikeObject:
     def __init__(self, handle):
         self.handle = handle
+        self.bytes_read = 0
+        self.syscalls = 0
+        self.copies = 0
         self.max_size = self.seek(0, 2)
         self.seek(0, 0)
 
     def seek(self, offset, whence=0):
+        self.syscalls += 1
         offset = ctypes.windll.kernel32.SetFilePointer(self.handle, offset, None, whence)
         if offset == _INVALID_SET_FILE_POINTER:
             raise OSError('The SetFilePointer() routine failed')
@@ -247,24 +535,356 @@ class NTFileLikeObject:
     def tell(self):
         return self.seek(0, 1)
 
+    def readinto(self, b) -> int:
+        """Read straight into a writable buffer with a single ReadFile() call."""
+        view = memoryview(b).cast('B')
+        if not len(view):
+            return 0
+        target = (ctypes.c_char * len(view)).from_buffer(view)
+        size_out = ctypes.c_uint32()
+        self.syscalls += 1
+        result = ctypes.windll.kernel32.ReadFile(self.handle, target, len(view), ctypes.byref(size_out), None)
+        if result == 0:
+            last_error = ctypes.windll.kernel32.GetLastError()
+            raise OSError(f'The ReadFile() routine failed with status: {last_error}')
+        self.bytes_read += size_out.value
+        return size_out.value
+
     def read(self, size=None):
         if size is None or size < 0:
             size = self.max_size - self.tell()
         if size <= 0:
             return b''
-        buffer = ctypes.create_string_buffer(size)
-        size_out = ctypes.c_uint32()
-        result = ctypes.windll.kernel32.ReadFile(self.handle, ctypes.byref(buffer), size, ctypes.byref(size_out), None)
-        if result == 0:
-            last_error = ctypes.windll.kernel32.GetLastError()
-            raise OSError(f'The ReadFile() routine failed with status: {last_error}')
-        return buffer.raw[:size_out.value]
+        buffer = bytearray(size)
+        del buffer[self.readinto(buffer):]
+        self.copies += 1
+        return bytes(buffer)
 
     def close(self):
         ctypes.windll.kernel32.CloseHandle(self.handle)
 
+def marvin32(data, seed: int = _MARVIN32_SEED) -> int:
+    """64-bit Marvin32 hash, used by the registry to checksum transaction log entries."""
+    lo, hi = seed & 0xFFFFFFFF, seed >> 32
+    length = len(data) & ~3
+    for (word,) in struct.iter_unpack('<I', data[:length]):
+        lo = (lo + word) & 0xFFFFFFFF
+        hi ^= lo
+        lo = ((lo << 20) & 0xFFFFFFFF) | (lo >> 12)
+        lo = (lo + hi) & 0xFFFFFFFF
+        hi = ((hi << 9) & 0xFFFFFFFF) | (hi >> 23)
+        hi ^= lo
+        lo = ((lo << 27) & 0xFFFFFFFF) | (lo >> 5)
+        lo = (lo + hi) & 0xFFFFFFFF
+        hi = ((hi << 19) & 0xFFFFFFFF) | (hi >> 13)
+    lo = (lo + int.from_bytes(bytes(data[length:]) + b'\x80', 'little')) & 0xFFFFFFFF
+    for _ in range(2):
+        hi ^= lo
+        lo = ((lo << 20) & 0xFFFFFFFF) | (lo >> 12)
+        lo = (lo + hi) & 0xFFFFFFFF
+        hi = ((hi << 9) & 0xFFFFFFFF) | (hi >> 23)
+        hi ^= lo
+        lo = ((lo << 27) & 0xFFFFFFFF) | (lo >> 5)
+        lo = (lo + hi) & 0xFFFFFFFF
+        hi = ((hi << 19) & 0xFFFFFFFF) | (hi >> 13)
+    return (hi << 32) | lo
+
+def regf_checksum(base_block) -> int:
+    """XOR checksum of the first 508 bytes of a regf base block."""
+    checksum = 0
+    for (dword,) in struct.iter_unpack('<I', base_block[:0x1FC]):
+        checksum ^= dword
+    return {0: 1, 0xFFFFFFFF: 0xFFFFFFFE}.get(checksum, checksum)
+
+def hive_is_dirty(buf) -> bool:
+    """A hive is dirty when its sequence numbers differ or its base block checksum is bad."""
+    primary, secondary = struct.unpack_from('<II', buf, 4)
+    return primary != secondary or regf_checksum(buf) != _U32.unpack_from(buf, 0x1FC)[0]
+
+def find_hive_logs(path: str) -> List[str]:
+    """Return the existing .LOG1/.LOG2 files next to a hive."""
+    logs = []
+    for suffix in ('.LOG1', '.LOG2'):
+        for candidate in (path + suffix, path + suffix.lower()):
+            if os.path.isfile(candidate):
+                logs.append(candidate)
+                break
+    return logs
+
+def _read_log_entries(log_map, log_path: str) -> list:
+    """Return the consecutive HvLE entries of a log whose headers pass their Marvin32 hash."""
+    base = memoryview(log_map)
+    if len(base) < _LOG_ENTRIES_START or bytes(base[:4]) != b'regf' or regf_checksum(base) != _U32.unpack_from(base, 0x1FC)[0]:
+        logging.warning(f"Ignoring transaction log with an invalid base block: {log_path}")
+        return []
+    if _U32.unpack_from(base, 0x1C)[0] != _LOG_FILE_TYPE_NEW:
+        logging.warning(f"Ignoring transaction log in the pre-Windows 8.1 format: {log_path}")
+        return []
+    entries = []
+    offset = _LOG_ENTRIES_START
+    while offset + 0x28 <= len(base):
+        signature, size, _, sequence, bins_size, page_count = _LOG_ENTRY_HEADER.unpack_from(base, offset)
+        if signature != b'HvLE' or size < 0x28 or size % 0x200 or offset + size > len(base):
+            break
+        entry = base[offset:offset + size]
+        if marvin32(entry[:0x20]) != _LOG_ENTRY_HASHES.unpack_from(entry, 0x18)[1]:
+            break
+        if entries and sequence != entries[-1]['sequence'] + 1:
+            break
+        entries.append({'sequence': sequence, 'bins_size': bins_size, 'pages': page_count, 'entry': entry, 'log': log_path})
+        offset += size
+    return entries
+
+def replay_hive_logs(path: str, hive_map):
+    """Replay the transaction logs of a dirty hive into a copy-on-write view of it.
+
+    Returns (view, entries applied, log files used). The view is a private ACCESS_COPY
+    mapping, so only the pages touched by log entries are copied into memory; it is a
+    full anonymous copy only when the logs grow the hive past the primary file.
+    """
+    import mmap
+    log_maps = []
+    entries = []
+    try:
+        for log_path in find_hive_logs(path):
+            with open(log_path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    continue
+                log_maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            entries.extend(_read_log_entries(log_maps[-1], log_path))
+        # The primary file already holds everything before its secondary sequence number;
+        # apply the rest in order, stopping at the first gap or torn entry.
+        next_sequence = _U32.unpack_from(hive_map, 8)[0]
+        applied = []
+        for entry in sorted(entries, key=lambda e: e['sequence']):
+            if entry['sequence'] < next_sequence or (applied and entry['sequence'] == applied[-1]['sequence']):
+                continue
+            if applied and entry['sequence'] != next_sequence:
+                break
+            data = entry['entry']
+            if marvin32(data[0x28:]) != _LOG_ENTRY_HASHES.unpack_from(data, 0x18)[0]:
+                logging.warning(f"Stopping log replay at torn entry {entry['sequence']} in {entry['log']}")
+                break
+            applied.append(entry)
+            next_sequence = entry['sequence'] + 1
+        if not applied:
+            return hive_map, 0, []
+
+        size = max(len(hive_map), _HBIN_START + max(entry['bins_size'] for entry in applied))
+        if size > len(hive_map):
+            view = mmap.mmap(-1, size)
+            for start in range(0, len(hive_map), 1 << 24):
+                end = min(start + (1 << 24), len(hive_map))
+                view[start:end] = hive_map[start:end]
+        else:
+            with open(path, 'rb') as f:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        for entry in applied:
+            data = entry['entry']
+            position = 0x28 + 8 * entry['pages']
+            for page_offset, page_size in struct.iter_unpack('<II', data[0x28:position]):
+                view[_HBIN_START + page_offset:_HBIN_START + page_offset + page_size] = data[position:position + page_size]
+                position += page_size
+        struct.pack_into('<II', view, 4, applied[-1]['sequence'] + 1, applied[-1]['sequence'] + 1)
+        struct.pack_into('<I', view, 0x28, applied[-1]['bins_size'])
+        struct.pack_into('<I', view, 0x1FC, regf_checksum(view))
+        return view, len(applied), sorted({entry['log'] for entry in applied})
+    finally:
+        # Entry views point into the log mappings and must be released before closing them.
+        for entry in entries:
+            entry['entry'].release()
+        for log_map in log_maps:
+            log_map.close()
+
+class MappedHiveFile:
+    """Read-only, memory-mapped file-like view of an offline hive.
+
+    A dirty hive has its .LOG1/.LOG2 entries replayed into a copy-on-write view,
+    so the parser sees the recovered hive while the file on disk is untouched.
+    """
+    def __init__(self, path: str, replay_logs: bool = True):
+        import mmap
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            self._file.close()
+            raise OSError(f'Cannot map hive file {path}: {e}')
+        self._pos = 0
+        self.bytes_read = 0
+        self.copies = 0
+        self.dirty = False
+        self.replayed_entries = 0
+        self.replayed_logs = []
+        if self._map[:4] != b'regf':
+            self.close()
+            raise OSError(f'The file is not a registry hive: {path}')
+        if replay_logs and hive_is_dirty(self._map):
+            self.dirty = True
+            view, self.replayed_entries, self.replayed_logs = replay_hive_logs(path, self._map)
+            if view is not self._map:
+                self._map.close()
+                self._map = view
+        self.max_size = len(self._map)
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.max_size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def read(self, size=None):
+        # A whole-file read hands back the mapping itself, so Registry.Registry
+        # uses it as its buffer without copying the hive into memory.
+        if (size is None or size < 0) and self._pos == 0:
+            self._pos = self.max_size
+            self.bytes_read += self.max_size
+            return self._map
+        if size is None or size < 0:
+            size = self.max_size - self._pos
+        data = self._map[self._pos:self._pos + size]
+        self._pos += len(data)
+        self.bytes_read += len(data)
+        self.copies += 1
+        return data
+
+    def readinto(self, b) -> int:
+        view = memoryview(b).cast('B')
+        size = min(len(view), max(0, self.max_size - self._pos))
+        view[:size] = self._map[self._pos:self._pos + size]
+        self._pos += size
+        self.bytes_read += size
+        self.copies += 1
+        return size
+
+    @property
+    def mapping(self):
+        """The hive's mapping (or replayed view) itself."""
+        return self._map
+
+    def buffer(self) -> memoryview:
+        """Return a zero-copy view of the whole hive."""
+        return memoryview(self._map)
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+class WholeHiveFile:
+    """Holds a whole hive in memory behind the file interface, read once with readinto().
+
+    Both engines consume the hive as one buffer, so it is filled with a single readinto()
+    on the underlying file (one ReadFile call for a live hive) into an anonymous mapping,
+    whose slices are bytes just like the offline memory map. A MappedHiveFile is not
+    copied at all: its mapping is used directly.
+    """
+    def __init__(self, raw):
+        self.raw = raw
+        self._copies = 0
+        self._raw_reads = 0
+        self._pos = 0
+        if isinstance(raw, MappedHiveFile):
+            self._buf = raw.mapping
+            self._owned = False
+        else:
+            size = getattr(raw, 'max_size', None)
+            if size is None:
+                size = os.fstat(raw.fileno()).st_size
+            import mmap
+            self._buf = mmap.mmap(-1, max(size, 1))
+            self._owned = True
+            try:
+                raw.seek(0)
+                view = memoryview(self._buf)
+                filled = 0
+                while filled < size:
+                    count = raw.readinto(view[filled:size])
+                    self._raw_reads += 1
+                    if not count:
+                        break
+                    filled += count
+                view.release()
+            except BaseException:
+                self._buf.close()
+                raise
+            if filled < size:
+                self._buf.close()
+                raise OSError(f'Short read: got {filled} of {size} hive bytes')
+        self.max_size = size if self._owned else len(self._buf)
+
+    def __getattr__(self, name):
+        # Hive state such as dirty or replayed_entries comes from the wrapped file.
+        if name == 'raw':
+            raise AttributeError(name)
+        return getattr(self.raw, name)
+
+    whole = True
+
+    @property
+    def syscalls(self) -> int:
+        return getattr(self.raw, 'syscalls', self._raw_reads)
+
+    @property
+    def bytes_read(self) -> int:
+        return getattr(self.raw, 'bytes_read', self.max_size)
+
+    @property
+    def copies(self) -> int:
+        return self._copies + getattr(self.raw, 'copies', 0)
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._pos
+        elif whence == 2:
+            offset += self.max_size
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def readinto(self, b) -> int:
+        view = memoryview(b).cast('B')
+        size = min(len(view), max(0, self.max_size - self._pos))
+        view[:size] = self._buf[self._pos:self._pos + size]
+        self._copies += 1
+        self._pos += size
+        return size
+
+    def read(self, size=None):
+        if size is None or size < 0:
+            size = self.max_size - self._pos
+        size = min(size, max(0, self.max_size - self._pos))
+        if self._pos == 0 and size == self.max_size and len(self._buf) == size:
+            # A whole-hive read hands back the buffer itself, without copying it.
+            self._pos = size
+            return self._buf
+        data = self._buf[self._pos:self._pos + size]
+        self._copies += 1
+        self._pos += size
+        return data
+
+    def buffer(self) -> memoryview:
+        """Return a zero-copy view of the whole hive."""
+        view = memoryview(self._buf)
+        return view if len(view) == self.max_size else view[:self.max_size]
+
+    def close(self):
+        if self._owned and self._buf is not None:
+            self._buf.close()
+        self._buf = None
+        self.raw.close()
+
 class RegistryHivesLive:
     def __init__(self):
+        _bind_windows_api()
         self._src_handle = None
         self._dst_handle = None
         self._lookup_process_handle_and_backup_privilege()
@@ -371,25 +991,1560 @@ class RegistryHivesLive:
             raise OSError('The GetTempFileNameA() routine failed to create a temporary file')
         return buffer.value.decode()
 
+def _decode_reg_sz(data: bytes) -> str:
+    """Decode REG_SZ data exactly as python-registry does, stopping at the first terminator."""
+    if b"\x00\x00" in data:
+        index = data.index(b"\x00\x00")
+        if index > 2:
+            data = data[:index + 2] if data[index - 2] != 0 else data[:index + 3]
+    if len(data) % 2:
+        data += b"\x00"
+    return data.decode("utf-16").partition("\x00")[0]
+
+class RegistryEngine:
+    """Walks the hive through python-registry's key and value objects."""
+    name = 'registry'
+    scope = None
+
+    def __init__(self, handle):
+        from Registry import Registry
+        # python-registry reads from the current position; a handle walked before is at its end.
+        handle.seek(0)
+        self._root = Registry.Registry(handle).open("Root")
+
+    def root_subkeys(self) -> list:
+        return [(key.name(), key) for key in self._root.subkeys()]
+
+    def subkey(self, name: str):
+        return self._root.subkey(name)
+
+    def subkey_count(self, key) -> int:
+        return key.subkeys_number()
+
+    def iter_keys(self, key, start: int = 0, stop: Optional[int] = None):
+        for subkey in itertools.islice(key.subkeys(), start, stop):
+            yield subkey.name(), subkey
+
+    def last_write(self, key) -> int:
+        """Key last-write time as a raw FILETIME."""
+        record = getattr(key, '_nkrecord', None)
+        if record is not None and hasattr(record, 'unpack_qword'):
+            # Full 100 ns resolution, matching the native engine; timestamp() rounds to microseconds.
+            return record.unpack_qword(0x4)
+        return filetime(key.timestamp())
+
+    def values(self, key, typed: bool) -> dict:
+        if typed:
+            return {value.name(): value.value() for value in key.values()}
+        return {value.name(): str(value.value()) for value in key.values()}
+
+class NativeEngine:
+    """Read-only regf cell walker that decodes Root\\Inventory* keys straight from hive cells.
+
+    Keys are plain cell offsets and values are decoded with struct.unpack_from over the
+    hive buffer, producing the same values as python-registry for the registry types
+    found in Amcache. AppContainer (0x1xx) types are returned as raw bytes.
+    """
+    name = 'native'
+    scope = 'Inventory'
+
+    def __init__(self, handle):
+        handle.seek(0)
+        self._buf = handle.read()
+        if self._buf[:4] != b'regf':
+            raise OSError('The file is not a registry hive')
+        self._ascii_names = {}
+        self._wide_names = {}
+        top = _HBIN_START + _U32.unpack_from(self._buf, 0x24)[0] + 4
+        self._root = self._find(top, "Root")
+
+    def _name(self, nk: int) -> str:
+        buf = self._buf
+        length = _U16.unpack_from(buf, nk + 0x48)[0]
+        encoding = "windows-1252" if _U16.unpack_from(buf, nk + 2)[0] & _NK_ASCII_NAME else "utf-16le"
+        return buf[nk + 0x4C:nk + 0x4C + length].decode(encoding)
+
+    def _list(self, cell: int) -> list:
+        """Return the nk cells referenced by an lf/lh/li/ri subkey list."""
+        buf = self._buf
+        signature = buf[cell:cell + 2]
+        count = _U16.unpack_from(buf, cell + 2)[0]
+        if signature in (b'lf', b'lh'):
+            offsets = struct.unpack_from(f'<{count * 2}I', buf, cell + 4)[::2]
+        elif signature == b'li':
+            offsets = struct.unpack_from(f'<{count}I', buf, cell + 4)
+        elif signature == b'ri':
+            return [nk for offset in struct.unpack_from(f'<{count}I', buf, cell + 4)
+                    for nk in self._list(_HBIN_START + offset + 4)]
+        else:
+            raise ValueError(f"Unknown subkey list {signature!r} at 0x{cell:x}")
+        return [_HBIN_START + offset + 4 for offset in offsets]
+
+    def _subkeys(self, nk: int) -> list:
+        count, list_offset = _NK_COUNTS.unpack_from(self._buf, nk + 0x14)
+        if count == 0:
+            return []
+        return self._list(_HBIN_START + list_offset + 4)
+
+    def _find(self, nk: int, name: str) -> int:
+        for child in self._subkeys(nk):
+            if self._name(child).lower() == name.lower():
+                return child
+        raise KeyError(f"Registry key not found: {name}")
+
+    def _big_data(self, offset: int, length: int) -> bytes:
+        """Reassemble data stored in a db big-data cell (or read a plain cell) up to length bytes."""
+        buf = self._buf
+        cell = _HBIN_START + offset
+        cell_size = abs(struct.unpack_from('<i', buf, cell)[0])
+        if buf[cell + 4:cell + 6] != b'db':
+            return buf[cell + 4:cell + 4 + min(cell_size, length)]
+        segments = _HBIN_START + _U32.unpack_from(buf, cell + 8)[0] + 4
+        data = bytearray()
+        index = 0
+        while length > 0:
+            segment = _HBIN_START + _U32.unpack_from(buf, segments + 4 * index)[0]
+            size = min(_BIG_DATA_SEGMENT, length)
+            data += buf[segment + 4:segment + 4 + min(size, abs(struct.unpack_from('<i', buf, segment)[0]))]
+            index += 1
+            length -= size
+        return bytes(data)
+
+    def _raw(self, vk: int, size: int, offset: int) -> bytes:
+        """Raw bytes of a variable-length value: inline, in one cell, or in big-data segments."""
+        if size >= 0x80000000:
+            # Resident data lives in the offset field; the high bit only flags it.
+            return self._buf[vk + 8:vk + 8 + (size & 0x7FFFFFFF)]
+        if size > _BIG_DATA_SEGMENT:
+            return self._big_data(offset, size)
+        cell = _HBIN_START + offset + 4
+        return self._buf[cell:cell + size]
+
+    def root_subkeys(self) -> list:
+        return [(self._name(nk), nk) for nk in self._subkeys(self._root)]
+
+    def subkey(self, name: str) -> int:
+        return self._find(self._root, name)
+
+    def subkey_count(self, nk: int) -> int:
+        return _NK_COUNTS.unpack_from(self._buf, nk + 0x14)[0]
+
+    def iter_keys(self, nk: int, start: int = 0, stop: Optional[int] = None):
+        name = self._name
+        for child in self._subkeys(nk)[start:stop]:
+            yield name(child), child
+
+    def last_write(self, nk: int) -> int:
+        """Key last-write time as a raw FILETIME."""
+        return _U64.unpack_from(self._buf, nk + 4)[0]
+
+    def values(self, nk: int, typed: bool) -> dict:
+        buf = self._buf
+        count, list_offset = _NK_VALUES.unpack_from(buf, nk + 0x24)
+        if count == 0 or list_offset == 0xFFFFFFFF:
+            return {}
+        values = {}
+        for offset in struct.unpack_from(f'<{count}I', buf, _HBIN_START + list_offset + 4):
+            vk = _HBIN_START + offset + 4
+            name_length, size, data_offset, data_type, flags = _VK_HEADER.unpack_from(buf, vk + 2)
+            if name_length:
+                # Value names repeat across every key of a subkey, so decode each one once.
+                raw_name = buf[vk + 0x14:vk + 0x14 + name_length]
+                names = self._ascii_names if flags & _VK_ASCII_NAME else self._wide_names
+                name = names.get(raw_name)
+                if name is None:
+                    name = names[raw_name] = raw_name.decode("windows-1252" if flags & _VK_ASCII_NAME else "utf-16le")
+            else:
+                name = "(default)"
+            data_type &= 0xFFF
+            if data_type == 1 or data_type == 2:        # REG_SZ, REG_EXPAND_SZ
+                if size >= 0x80000000:
+                    value = _decode_reg_sz(buf[vk + 8:vk + 12])
+                elif size <= _BIG_DATA_SEGMENT:
+                    cell = _HBIN_START + data_offset + 4
+                    value = _decode_reg_sz(buf[cell:cell + size])
+                else:
+                    value = _decode_reg_sz(self._big_data(data_offset, size))
+            elif data_type == 4:                        # REG_DWORD
+                value = _U32.unpack_from(buf, vk + 8)[0]
+            elif data_type == 11:                       # REG_QWORD
+                value = _U64.unpack_from(buf, _HBIN_START + data_offset + 4)[0]
+            elif data_type == 7:                        # REG_MULTI_SZ
+                value = (b"" if size >= 0x80000000 else self._raw(vk, size, data_offset)).decode("utf-16").split("\x00")
+            elif data_type == 5:                        # REG_DWORD_BIG_ENDIAN
+                value = _BE32.unpack_from(buf, _HBIN_START + data_offset + 4)[0]
+            elif data_type == 0x10:                     # REG_FILETIME
+                value = datetime(1601, 1, 1) + timedelta(microseconds=_U64.unpack_from(self._raw(vk, size, data_offset))[0] / 10)
+            elif data_type in (0, 3, 6, 8, 9, 10) or data_type > 0x100:
+                value = self._raw(vk, size, data_offset)
+            elif size < 5 or size >= 0x80000000:
+                value = _U32.unpack_from(buf, vk + 8)[0]
+            else:
+                raise ValueError(f"Unknown VK Record type 0x{data_type:x} at 0x{vk:x}")
+            values[name] = value if typed or value.__class__ is str else str(value)
+        return values
+
+def open_engine(engine: str, handle):
+    """Return the hive walker selected with --engine."""
+    return {'registry': RegistryEngine, 'native': NativeEngine}[engine](handle)
+
+class SQLiteWriter:
+    """Single-connection SQLite writer that buffers rows per table and flushes them in batches."""
+    def __init__(self, db_path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = max(1, batch_size)
+        # Autocommit mode so batch transactions are managed explicitly with BEGIN/COMMIT.
+        # The connection may be shared with a pipeline writer thread; lock serialises its use.
+        self.conn = enable_fts_sync(sqlite3.connect(db_path, isolation_level=None, check_same_thread=False))
+        self.lock = threading.RLock()
+        self._buffers = {}
+        self._pending = 0
+        self.rows_written = 0
+        self.failed_rows = 0
+        self.commits = 0
+        self.write_seconds = 0.0
+        self._started = time.perf_counter()
+
+    def execute(self, sql: str, params=()):
+        """Run a single statement outside of the row buffers (DDL, writes); read results with query()."""
+        with self.lock:
+            return self.conn.execute(sql, params)
+
+    def executemany(self, sql: str, rows):
+        with self.lock:
+            return self.conn.executemany(sql, rows)
+
+    def query(self, sql: str, params=()) -> list:
+        """Run a lookup and fetch all of its rows while holding the connection."""
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql: str, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()
+
+    def iterate(self, sql: str, params=(), size: int = DEFAULT_EXPORT_ARRAY_SIZE):
+        """Yield the rows of a large lookup, holding the connection only while each batch is fetched."""
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            yield from rows
+
+    def add(self, table: str, sql: str, row: tuple, prepare=None):
+        """Buffer one row for the given table and flush once the batch is full.
+
+        prepare, if given, receives the table's whole batch of rows just before it is written
+        and returns the rows to insert (used for column-wise normalisation).
+        """
+        buffer = self._buffers.get(table)
+        if buffer is None:
+            buffer = self._buffers[table] = (sql, [], prepare)
+        buffer[1].append(row)
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write all buffered rows with executemany inside one transaction."""
+        if not self._pending:
+            return
+        started = time.perf_counter()
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                for table, (sql, rows, prepare) in self._buffers.items():
+                    if rows:
+                        self._write_rows(table, sql, prepare(rows) if prepare is not None else rows)
+                self.conn.execute("COMMIT")
+            except sqlite3.Error:
+                self.conn.execute("ROLLBACK")
+                raise
+        self.commits += 1
+        for _, rows, _ in self._buffers.values():
+            rows.clear()
+        self._pending = 0
+        self.write_seconds += time.perf_counter() - started
+
+    def _write_rows(self, table: str, sql: str, rows: list):
+        """Insert a table's rows in bulk, retrying row by row if the batch is rejected."""
+        self.conn.execute("SAVEPOINT batch_rows")
+        try:
+            self.conn.executemany(sql, rows)
+            self.conn.execute("RELEASE batch_rows")
+            self.rows_written += len(rows)
+            return
+        except sqlite3.Error as e:
+            self.conn.execute("ROLLBACK TO batch_rows")
+            self.conn.execute("RELEASE batch_rows")
+            logging.warning(f"Batch insert into {table} failed, retrying row by row: {e}")
+        for row in rows:
+            try:
+                self.conn.execute(sql, row)
+                self.rows_written += 1
+            except sqlite3.Error as e:
+                print(f"❌ Failed to insert entry {row[0]} into {table}: {e}")
+                logging.error(f"Failed to insert entry {row[0]} into {table}: {e}")
+                self.failed_rows += 1
+
+    def close(self):
+        """Flush remaining rows and close the connection."""
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+            self.conn = None
+
+    def report(self) -> str:
+        """Summarise write throughput for the end-of-run report."""
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        return (f"SQLite writer: {self.rows_written} rows in {elapsed:.2f}s "
+                f"({self.rows_written / elapsed:.0f} rows/sec), {self.commits} commits, "
+                f"batch size {self.batch_size}")
+
+def _create_fts_triggers(conn: sqlite3.Connection, table: str, fts_table: str, columns) -> None:
+    """Track the rows of a subkey table that its external-content FTS table has not indexed yet.
+
+    Inserted rows only have their rowid queued in {fts_table}_pending, which the next
+    build_query_indexes() indexes in one INSERT ... SELECT. Deleting or updating an
+    already indexed row removes its old terms from the index right away.
+    """
+    names = ", ".join(columns)
+    old = ", ".join(f"old.{column}" for column in columns)
+    pending = f"{fts_table}_pending"
+    unindex = (f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) SELECT 'delete', old.rowid, {old} "
+               f"WHERE NOT EXISTS (SELECT 1 FROM {pending} WHERE rowid = old.rowid);")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {pending} (rowid INTEGER PRIMARY KEY)")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+                 f"INSERT OR IGNORE INTO {pending} (rowid) VALUES (new.rowid); END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+                 f"{unindex} DELETE FROM {pending} WHERE rowid = old.rowid; END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {names} ON {table} BEGIN "
+                 f"{unindex} INSERT OR IGNORE INTO {pending} (rowid) VALUES (new.rowid); END")
+
+def enable_fts_sync(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """Let INSERT OR REPLACE fire the FTS delete triggers for the rows it replaces."""
+    conn.execute("PRAGMA recursive_triggers = ON")
+    return conn
+
+def build_query_indexes(conn: sqlite3.Connection) -> str:
+    """Create secondary indexes and FTS5 path search once the bulk load is done, then refresh planner statistics.
+
+    FTS tables use external content over the subkey table. A new FTS table is filled in one
+    'rebuild' pass after the bulk load; after that only the rows written since the last call are
+    indexed (connections that write need enable_fts_sync()).
+    """
+    started = time.perf_counter()
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    indexes = fts_tables = 0
+    for subkey_name, columns in SUBKEY_INDEXES.items():
+        table = table_name(subkey_name)
+        if table not in tables:
+            continue
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for column in columns:
+            if column in existing:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table} ({column})")
+                indexes += 1
+    for subkey_name, columns in FTS_COLUMNS.items():
+        table = table_name(subkey_name)
+        if table not in tables or not set(columns) <= {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+            continue
+        fts_table = f"{table}_fts"
+        created = fts_table not in tables
+        if created:
+            # Trigram tokens make substring searches indexable; older SQLite builds fall back to word tokens.
+            for tokenizer in ("trigram", "unicode61"):
+                try:
+                    conn.execute(f"CREATE VIRTUAL TABLE {fts_table} USING fts5({', '.join(columns)}, "
+                                 f"content='{table}', content_rowid='rowid', tokenize='{tokenizer}')")
+                    break
+                except sqlite3.OperationalError as e:
+                    logging.warning(f"Cannot create {fts_table} with the {tokenizer} tokenizer: {e}")
+            else:
+                continue
+        # Databases indexed before the triggers existed get them, and one last rebuild, here.
+        if created or conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                                   (f"{fts_table}_ai",)).fetchone() is None:
+            _create_fts_triggers(conn, table, fts_table, columns)
+            conn.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+            conn.execute(f"DELETE FROM {fts_table}_pending")
+        else:
+            names = ", ".join(columns)
+            conn.execute("BEGIN")
+            conn.execute(f"INSERT INTO {fts_table}(rowid, {names}) SELECT t.rowid, {', '.join(f't.{column}' for column in columns)} "
+                         f"FROM {fts_table}_pending AS p JOIN {table} AS t ON t.rowid = p.rowid")
+            conn.execute(f"DELETE FROM {fts_table}_pending")
+            conn.execute("COMMIT")
+        fts_tables += 1
+    conn.execute("PRAGMA analysis_limit = 1000")
+    conn.execute("ANALYZE")
+    return f"Query indexes: {indexes} indexes and {fts_tables} FTS5 tables ready, ANALYZE done in {time.perf_counter() - started:.2f}s"
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, used as a compact prefilter for very large tables."""
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        from hashlib import blake2b
+        self._blake2b = blake2b
+
+    def _positions(self, item: str):
+        digest = self._blake2b(item.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+def stored_entries(conn: sqlite3.Connection, table: str, host: str, max_ids: int = DEFAULT_INDEX_MAX_IDS) -> dict:
+    """{entry_id: key last write} stored in one subkey table for one host; empty when there are more than max_ids."""
+    if conn.execute(f"SELECT COUNT(*) FROM {table} WHERE host = ?", (host,)).fetchone()[0] > max_ids:
+        return {}
+    return dict(conn.execute(f"SELECT entry_id, key_last_write FROM {table} WHERE host = ?", (host,)))
+
+class EntryIdIndex:
+    """In-memory index of the entry IDs (and key last-write times) stored in one subkey table for one host."""
+    MISSING = object()
+
+    def __init__(self, writer: SQLiteWriter, table: str, host: str = '', max_in_memory: int = DEFAULT_INDEX_MAX_IDS):
+        self.writer = writer
+        self.table = table
+        self.host = host
+        self.disk_lookups = 0
+        self._bloom = None
+        count = writer.query_one(f"SELECT COUNT(*) FROM {table} WHERE host = ?", (host,))[0]
+        if count <= max_in_memory:
+            self._ids = dict(writer.query(f"SELECT entry_id, key_last_write FROM {table} WHERE host = ?", (host,)))
+        else:
+            # Too many rows to hold in memory: keep a Bloom filter of stored IDs and only
+            # go to disk when it reports a possible hit. IDs added this run stay in memory.
+            self._ids = {}
+            self._bloom = BloomFilter(count)
+            for (entry_id,) in writer.iterate(f"SELECT entry_id FROM {table} WHERE host = ?", (host,)):
+                self._bloom.add(entry_id)
+            logging.debug(f"Using Bloom filter prefilter for {count} entries in {table}")
+
+    def last_write(self, entry_id: str):
+        """Return the stored key last-write time (None if never recorded), or MISSING for a new entry."""
+        last_write = self._ids.get(entry_id, self.MISSING)
+        if last_write is not self.MISSING or self._bloom is None or entry_id not in self._bloom:
+            return last_write
+        self.disk_lookups += 1
+        row = self.writer.query_one(f"SELECT key_last_write FROM {self.table} WHERE host = ? AND entry_id = ?",
+                                    (self.host, entry_id))
+        return self.MISSING if row is None else row[0]
+
+    def __contains__(self, entry_id: str) -> bool:
+        return self.last_write(entry_id) is not self.MISSING
+
+    def add(self, entry_id: str, last_write: Optional[int] = None):
+        self._ids[entry_id] = last_write
+
+    def seed(self, entries: dict):
+        """Treat entries stored elsewhere (the main database of a batch) as already stored here."""
+        self._ids.update(entries)
+
+class SHA1Set:
+    """Sorted, packed SHA-1 digests with a 16-bit prefix index: 20 bytes per hash, a short binary search per lookup."""
+    DIGEST_SIZE = 20
+
+    def __init__(self, buckets: list):
+        # buckets[p] holds the packed digests whose first two bytes are p, in any order.
+        size = self.DIGEST_SIZE
+        self._starts = array('I', [0]) * 65537
+        data = bytearray()
+        for prefix, bucket in enumerate(buckets):
+            if bucket:
+                digests = sorted({bytes(bucket[i:i + size]) for i in range(0, len(bucket), size)})
+                data += b''.join(digests)
+                bucket.clear()
+            self._starts[prefix + 1] = len(data) // size
+        self._data = bytes(data)
+
+    @staticmethod
+    def new_buckets() -> list:
+        return [bytearray() for _ in range(65536)]
+
+    @staticmethod
+    def normalize(value) -> Optional[bytes]:
+        """Return the digest of a SHA-1 written as hex, with or without Amcache's 0000 prefix; None otherwise."""
+        if not isinstance(value, str):
+            return None
+        value = value.strip()
+        if len(value) == 44 and value.startswith('0000'):
+            value = value[4:]
+        if len(value) != 40:
+            return None
+        try:
+            return bytes.fromhex(value)
+        except ValueError:
+            return None
+
+    def __len__(self) -> int:
+        return len(self._data) // self.DIGEST_SIZE
+
+    def __contains__(self, digest: bytes) -> bool:
+        prefix = digest[0] << 8 | digest[1]
+        lo, hi = self._starts[prefix], self._starts[prefix + 1]
+        data, size = self._data, self.DIGEST_SIZE
+        # Bisect large buckets down to a short run, then let bytes.find scan it without copying.
+        while hi - lo > 32:
+            mid = (lo + hi) >> 1
+            if data[mid * size:mid * size + size] <= digest:
+                lo = mid
+            else:
+                hi = mid
+        start, stop = lo * size, hi * size
+        pos = data.find(digest, start, stop)
+        while pos != -1 and (pos - start) % size:
+            pos = data.find(digest, pos + 1, stop)
+        return pos != -1
+
+class PathMatcher:
+    """Matches paths against many IOC patterns at once: literal substrings and wildcard globs.
+
+    Literals are folded into one trie-shaped regex and globs into one alternation, so a
+    path that matches nothing is rejected by two C-level scans. Only hits are resolved
+    back to the individual patterns.
+    """
+    def __init__(self, patterns):
+        self._trie = {}
+        self._globs = []
+        self._size = 0
+        for pattern in patterns:
+            self._size += 1
+            if any(ch in pattern for ch in '*?['):
+                import fnmatch
+                self._globs.append((pattern, re.compile(fnmatch.translate(pattern))))
+                continue
+            node = self._trie
+            for ch in pattern:
+                node = node.setdefault(ch, {})
+            node[''] = pattern
+        self._literal_re = re.compile(self._trie_regex(self._trie)) if self._trie else None
+        self._glob_re = re.compile('|'.join(rx.pattern for _, rx in self._globs)) if self._globs else None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _trie_regex(self, node: dict) -> str:
+        alternatives = [re.escape(ch) + self._trie_regex(child) for ch, child in sorted(node.items()) if ch]
+        if not alternatives:
+            return ''
+        body = alternatives[0] if len(alternatives) == 1 else '(?:' + '|'.join(alternatives) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    @staticmethod
+    def normalize(path: str) -> str:
+        return path.strip().lower().replace('/', '\\')
+
+    def matches(self, path: str) -> list:
+        """Return every pattern found in an already normalised path."""
+        found = []
+        hit = self._literal_re.search(path) if self._literal_re is not None else None
+        if hit is not None:
+            end = len(path)
+            for start in range(hit.start(), end):
+                node, pos = self._trie, start
+                while True:
+                    pattern = node.get('')
+                    if pattern is not None and pattern not in found:
+                        found.append(pattern)
+                    if pos == end:
+                        break
+                    node = node.get(path[pos])
+                    if node is None:
+                        break
+                    pos += 1
+        if self._glob_re is not None and self._glob_re.match(path):
+            found.extend(pattern for pattern, rx in self._globs if rx.match(path))
+        return found
+
+class IOCMatcher:
+    """Indicator sets loaded from an IOC file, checked against each entry as it is parsed."""
+    def __init__(self, source: str, hashes: SHA1Set, paths: PathMatcher, ignored: int = 0, digest: str = ''):
+        self.source = source
+        self.hashes = hashes
+        self.paths = paths
+        self.ignored = ignored
+        self.digest = digest  # SHA-256 of the normalised indicators, to tell whether a host was already swept
+
+    @classmethod
+    def load(cls, path: str) -> 'IOCMatcher':
+        """Read one indicator per line: a SHA-1 (optionally 0000-prefixed) or a path pattern. # starts a comment."""
+        buckets = SHA1Set.new_buckets()
+        patterns = []
+        ignored = 0
+        import hashlib
+        fingerprint = hashlib.sha256()
+        with open(path, 'r', encoding='utf-8-sig', errors='replace') as f:
+            for line in f:
+                indicator = line.split('\t', 1)[0].strip()
+                if not indicator or indicator.startswith('#'):
+                    continue
+                digest = SHA1Set.normalize(indicator)
+                if digest is not None:
+                    buckets[digest[0] << 8 | digest[1]] += digest
+                    fingerprint.update(digest)
+                elif len(indicator) in (32, 64) and all(ch in '0123456789abcdefABCDEF' for ch in indicator):
+                    ignored += 1  # MD5/SHA-256: Amcache only records SHA-1
+                else:
+                    patterns.append(PathMatcher.normalize(indicator))
+                    fingerprint.update(patterns[-1].encode('utf-8', 'surrogatepass') + b'\n')
+        return cls(os.path.basename(path), SHA1Set(buckets), PathMatcher(dict.fromkeys(patterns)), ignored,
+                   fingerprint.hexdigest())
+
+    def match(self, subkey_name: str, entry_id: str, data: dict) -> list:
+        """Return (ioc_type, indicator, field, value) for every indicator the entry matches."""
+        found = []
+        if self.hashes:
+            for field in IOC_HASH_FIELDS.get(subkey_name, ()):
+                value = data.get(field)
+                digest = SHA1Set.normalize(value)
+                if digest is not None and digest in self.hashes:
+                    found.append(('sha1', digest.hex(), field, value))
+        if self.paths:
+            for field in IOC_PATH_FIELDS.get(subkey_name, ()):
+                value = entry_id if field == 'entry_id' else data.get(field)
+                if value:
+                    for pattern in self.paths.matches(PathMatcher.normalize(value)):
+                        found.append(('path', pattern, field, value))
+        return found
+
+    def report(self) -> str:
+        ignored = f", {self.ignored} non-SHA-1 hashes ignored" if self.ignored else ""
+        return f"{len(self.hashes)} SHA-1 and {len(self.paths)} path IOCs from {self.source}{ignored}"
+
+@functools.lru_cache(maxsize=4)
+def load_iocs(path: str) -> IOCMatcher:
+    """Load an IOC file once per process (batch workers reuse it across hives)."""
+    return IOCMatcher.load(path)
+
+def _new_compressor(method: str, level: int):
+    if method == 'gzip':
+        import zlib
+        return zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip header, mtime 0
+    if method == 'bz2':
+        import bz2
+        return bz2.BZ2Compressor(level)
+    import lzma
+    return lzma.LZMACompressor(preset=level)
+
+def _compress_block(method: str, level: int, block: bytes) -> tuple:
+    """Compress one block into a self-contained gzip member / bz2 / xz stream; returns (data, seconds)."""
+    started = time.perf_counter()
+    compressor = _new_compressor(method, level)
+    data = compressor.compress(block) + compressor.flush()
+    return data, time.perf_counter() - started
+
+class _CompressedFile(io.RawIOBase):
+    """Binary output file compressed as it is written: one stream, or independent blocks compressed on a thread pool.
+
+    Concatenated gzip members, bz2 streams and xz streams all decompress as one file with the
+    standard tools, so block mode output reads back exactly like a single stream.
+    """
+    def __init__(self, path: str, method: str, level: int, executor=None, block_size: int = DEFAULT_COMPRESS_BLOCK,
+                 max_pending: int = 2):
+        super().__init__()
+        self._file = None
+        self.path = path
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+        self.compress_seconds = 0.0
+        self.wait_seconds = 0.0
+        self._method = method
+        self._level = level
+        self._executor = executor
+        self._block_size = block_size
+        self._max_pending = max(1, max_pending)
+        self._block = bytearray()
+        self._pending = deque()
+        self._compressor = _new_compressor(method, level) if executor is None else None
+        self._file = open(path, 'wb')
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        size = len(b)
+        self.raw_bytes += size
+        started = time.perf_counter()
+        if self._executor is None:
+            self._emit(self._compressor.compress(b))
+            self.compress_seconds += time.perf_counter() - started
+        else:
+            self._block += b
+            if len(self._block) >= self._block_size:
+                self._submit()
+        self.wait_seconds += time.perf_counter() - started
+        return size
+
+    def _emit(self, data: bytes):
+        self._file.write(data)
+        self.compressed_bytes += len(data)
+
+    def _submit(self):
+        block, self._block = bytes(self._block), bytearray()
+        self._pending.append(self._executor.submit(_compress_block, self._method, self._level, block))
+        # Blocks are written in submission order; a bounded window keeps memory flat.
+        while len(self._pending) > self._max_pending:
+            self._drain_one()
+
+    def _drain_one(self):
+        data, seconds = self._pending.popleft().result()
+        self.compress_seconds += seconds
+        self._emit(data)
+
+    def close(self):
+        if self.closed or self._file is None:
+            super().close()
+            return
+        started = time.perf_counter()
+        try:
+            if self._executor is None:
+                self._emit(self._compressor.flush())
+            else:
+                if self._block:
+                    self._submit()
+                while self._pending:
+                    self._drain_one()
+        finally:
+            self.wait_seconds += time.perf_counter() - started
+            self._file.close()
+            super().close()
+
+class OutputCompression:
+    """gzip/bz2/xz compression for the text outputs; every file opened through it is counted in the run report."""
+    def __init__(self, method: str, threads: int = 1, level: Optional[int] = None,
+                 block_size: int = DEFAULT_COMPRESS_BLOCK):
+        self.method = method
+        self.suffix, default_level = COMPRESSIONS[method]
+        self.level = default_level if level is None else level
+        self.threads = max(1, threads)
+        self.block_size = block_size
+        self.files = []
+        self._executor = None
+        if self.threads > 1:
+            from concurrent.futures import ThreadPoolExecutor
+            self._executor = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix=f"amcache-{method}")
+
+    def path(self, path: str) -> str:
+        return path + self.suffix
+
+    def open(self, path: str, newline: Optional[str] = None):
+        """Open path plus the compression suffix for writing text."""
+        raw = _CompressedFile(self.path(path), self.method, self.level, self._executor, self.block_size, self.threads * 2)
+        self.files.append(raw)
+        return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size=1 << 20), encoding='utf-8', newline=newline)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def stats(self) -> dict:
+        raw = sum(f.raw_bytes for f in self.files)
+        compressed = sum(f.compressed_bytes for f in self.files)
+        seconds = sum(f.compress_seconds for f in self.files)
+        return {'method': self.method, 'level': self.level, 'threads': self.threads, 'files': len(self.files),
+                'uncompressed_bytes': raw, 'compressed_bytes': compressed,
+                'ratio': round(raw / compressed, 2) if compressed else None,
+                'compress_seconds': round(seconds, 6), 'wait_seconds': round(sum(f.wait_seconds for f in self.files), 6)}
+
+    def report(self) -> str:
+        stats = self.stats()
+        raw, compressed = stats['uncompressed_bytes'], stats['compressed_bytes']
+        mode = f"{self.threads} threads, {self.block_size >> 10} KiB blocks" if self.threads > 1 else "single stream"
+        return (f"Compression ({self.method} level {self.level}, {mode}): {raw / 1e6:.1f} MB -> {compressed / 1e6:.1f} MB "
+                f"({stats['ratio'] or 0:.1f}x) in {len(self.files)} files, "
+                f"{raw / 1e6 / max(stats['compress_seconds'], 1e-9):.0f} MB/s per thread, "
+                f"writers waited {stats['wait_seconds']:.2f}s")
+
+def open_text_output(path: str, compression: Optional[OutputCompression] = None, newline: Optional[str] = None):
+    """Open a text output file, compressed when compression is given (path then gains its suffix)."""
+    if compression is None:
+        return open(path, 'w', newline=newline, encoding='utf-8', buffering=1 << 20)
+    return compression.open(path, newline)
+
+class JSONLinesSink:
+    """Streams each parsed entry to a JSON Lines file as soon as it is decoded."""
+    typed = False
+
+    def __init__(self, output_path: str, compression: Optional[OutputCompression] = None):
+        self.output_path = compression.path(output_path) if compression is not None else output_path
+        self._file = open_text_output(output_path, compression)
+        self.records = 0
+
+    def write(self, subkey_name: str, entry_id: str, data: dict):
+        if "Language" in data:
+            data = dict(data, LanguageName=language_name(data["Language"]))
+        self._file.write(json.dumps({"subkey_name": subkey_name, "entry_id": entry_id, "data": data}))
+        self._file.write("\n")
+        self.records += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def report(self) -> str:
+        return f"Streamed {self.records} entries to JSON Lines: {self.output_path}"
+
+class _CSVTable:
+    """One subkey's CSV file; the header comes from the subkey schema, or is fixed once the discovery window has been seen."""
+    def __init__(self, path: str, discovery_rows: int, columns: Optional[list] = None,
+                 compression: Optional[OutputCompression] = None):
+        self.path = path
+        self.compression = compression
+        self.discovery_rows = discovery_rows
+        self.columns = None
+        self.records = 0
+        self._pending = []
+        self._file = None
+        self._writer = None
+        if columns:
+            self._start([(column, value_name or column) for column, value_name, _ in columns])
+
+    def write(self, entry_id: str, data: dict):
+        if self.columns is None:
+            self._pending.append((entry_id, data))
+            if len(self._pending) >= self.discovery_rows:
+                self._start()
+            return
+        self._write_row(entry_id, data)
+
+    def _start(self, fields: Optional[list] = None):
+        if fields is None:
+            value_columns = {}
+            for _, data in self._pending:
+                value_columns.update(dict.fromkeys(data))
+            if "Language" in value_columns:
+                value_columns["LanguageName"] = None
+            fields = [(name, name) for name in value_columns]
+        self.columns = [column for column, _ in fields]
+        self._keys = [key for _, key in fields]
+        self._known = set(self._keys)
+        import csv
+        self._file = open_text_output(self.path, self.compression, newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['entry_id'] + self.columns + ['extra'])
+        for entry_id, data in self._pending:
+            self._write_row(entry_id, data)
+        self._pending = []
+
+    def _write_row(self, entry_id: str, data: dict):
+        if "Language" in data:
+            data = dict(data, LanguageName=language_name(data["Language"]))
+        # Value names outside the schema or first seen after the header go to the overflow column.
+        extra = {k: v for k, v in data.items() if k not in self._known}
+        self._writer.writerow([entry_id] + [data.get(k, '') for k in self._keys] + [json.dumps(extra) if extra else ''])
+        self.records += 1
+
+    def close(self):
+        if self.columns is None:
+            self._start()
+        self._file.close()
+
+class CSVSink:
+    """Streams entries to one CSV file per subkey, with columns from the subkey schema or discovered from the value names."""
+    typed = False
+
+    def __init__(self, output_dir: str, discovery_rows: int = 1000, compression: Optional[OutputCompression] = None):
+        self.output_dir = output_dir
+        self.compression = compression
+        self.discovery_rows = discovery_rows
+        os.makedirs(output_dir, exist_ok=True)
+        self._tables = {}
+        self._closed = False
+
+    def write(self, subkey_name: str, entry_id: str, data: dict):
+        table = self._tables.get(subkey_name)
+        if table is None:
+            safe_table_name = table_name(subkey_name)
+            table = self._tables[subkey_name] = _CSVTable(os.path.join(self.output_dir, f"{safe_table_name}.csv"),
+                                                          self.discovery_rows, subkey_columns(subkey_name),
+                                                          self.compression)
+        table.write(entry_id, data)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for table in self._tables.values():
+            table.close()
+
+    def report(self) -> str:
+        records = sum(table.records for table in self._tables.values())
+        return f"Streamed {records} entries to {len(self._tables)} CSV files in: {self.output_dir}"
+
+class _ArrowTable:
+    """One subkey's columnar file; the schema comes from the subkey schema, or is fixed by the first row group."""
+    def __init__(self, pa, path: str, file_format: str, row_group_size: int, columns: Optional[list] = None):
+        self.pa = pa
+        self.columns = columns
+        self.path = path
+        self.file_format = file_format
+        self.row_group_size = row_group_size
+        self.records = 0
+        self.row_groups = 0
+        self.schema = None
+        self._rows = []
+        self._writer = None
+
+    def write(self, entry_id: str, data: dict):
+        self._rows.append((entry_id, data))
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _discover_schema(self):
+        pa = self.pa
+        if self.columns:
+            columns = [(column, value_name, kind) for column, value_name, kind in self.columns if value_name is not None]
+            has_language = any(value_name is None for _, value_name, _ in self.columns)
+        else:
+            names = {}
+            for _, data in self._rows:
+                names.update(dict.fromkeys(data))
+            columns = []
+            for name in names:
+                kind = COLUMN_TYPES.get(name)
+                if kind is None:
+                    samples = [data[name] for _, data in self._rows if name in data]
+                    kind = "int" if all(isinstance(v, int) for v in samples) else "text"
+                columns.append((name, name, kind))
+            has_language = "Language" in names
+        fields = [pa.field("entry_id", pa.string())]
+        for column, _, kind in columns:
+            if kind == "int":
+                fields.append(pa.field(column, pa.int64()))
+            elif kind in TIMESTAMP_KINDS:
+                fields.append(pa.field(column, pa.timestamp("s", tz="UTC")))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        if has_language:
+            fields.append(pa.field("LanguageName", pa.string()))
+        fields.append(pa.field("extra", pa.string()))
+        self._columns = [(value_name, kind) for _, value_name, kind in columns]
+        self._known = {value_name for value_name, _ in self._columns}
+        self.schema = pa.schema(fields)
+
+    def _open_writer(self):
+        if self.file_format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        else:
+            self._writer = self.pa.ipc.new_file(self.path, self.schema)
+
+    def _flush(self):
+        if not self._rows:
+            return
+        if self.schema is None:
+            self._discover_schema()
+            self._open_writer()
+        columns = [[entry_id for entry_id, _ in self._rows]]
+        for name, kind in self._columns:
+            values = [data.get(name) for _, data in self._rows]
+            if kind == "int":
+                values = [coerce_int(v) for v in values]
+            elif kind in TIMESTAMP_KINDS:
+                values = [coerce_timestamp(v) for v in values]
+            else:
+                values = [None if v is None else str(v) for v in values]
+            columns.append(values)
+        if "LanguageName" in self.schema.names:
+            columns.append([language_name(data["Language"]) if "Language" in data else None for _, data in self._rows])
+        extras = []
+        for _, data in self._rows:
+            extra = {k: str(v) for k, v in data.items() if k not in self._known}
+            extras.append(json.dumps(extra) if extra else None)
+        columns.append(extras)
+        table = self.pa.Table.from_arrays(
+            [self.pa.array(values, type=field.type) for values, field in zip(columns, self.schema)], schema=self.schema)
+        if self.file_format == 'parquet':
+            self._writer.write_table(table, row_group_size=self.row_group_size)
+        else:
+            self._writer.write_table(table)
+        self.records += len(self._rows)
+        self.row_groups += 1
+        self._rows = []
+
+    def close(self):
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+
+class ArrowSink:
+    """Writes typed columnar files (Parquet or Arrow IPC), one per subkey, one row group at a time."""
+    typed = True
+
+    def __init__(self, output_dir: str, file_format: str = 'parquet', row_group_size: int = DEFAULT_ROW_GROUP_SIZE):
+        import pyarrow
+        self.pa = pyarrow
+        self.output_dir = output_dir
+        self.file_format = file_format
+        self.row_group_size = max(1, row_group_size)
+        os.makedirs(output_dir, exist_ok=True)
+        self._tables = {}
+        self._closed = False
+
+    def write(self, subkey_name: str, entry_id: str, data: dict):
+        table = self._tables.get(subkey_name)
+        if table is None:
+            safe_table_name = table_name(subkey_name)
+            path = os.path.join(self.output_dir, f"{safe_table_name}.{self.file_format}")
+            table = self._tables[subkey_name] = _ArrowTable(self.pa, path, self.file_format, self.row_group_size,
+                                                            subkey_columns(subkey_name))
+        table.write(entry_id, data)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for table in self._tables.values():
+            table.close()
+
+    def report(self) -> str:
+        records = sum(table.records for table in self._tables.values())
+        row_groups = sum(table.row_groups for table in self._tables.values())
+        return f"Wrote {records} entries in {row_groups} row groups to {len(self._tables)} {self.file_format} files in: {self.output_dir}"
+
+_FILTER_TOKEN = re.compile(r"""'[^']*'|"[^"]*"|<=|>=|!=|=|<|>|[^\s=<>!'"]+""")
+_RELATIVE_TIME = re.compile(r"^-(\d+)([smhdw])$")
+_RELATIVE_TIME_LIKE = re.compile(r"^-\d+(\.\d*)?[a-z]", re.IGNORECASE)
+_DECIMAL = re.compile(r"^[+-]?(\d+\.\d*|\.\d+)$")
+_RELATIVE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_FILTER_OPS = {
+    "=": "{column} = ?", "!=": "{column} != ?", "<": "{column} < ?", "<=": "{column} <= ?", ">": "{column} > ?",
+    ">=": "{column} >= ?", "contains": "instr(lower({column}), lower(?)) > 0",
+    "startswith": "instr(lower({column}), lower(?)) = 1", "endswith": "substr(lower({column}), -length(?)) = lower(?)",
+}
+
+def _filter_value(token: str, now: float):
+    """A quoted string, null, a number, a relative time (-7d: epoch seconds that long ago) or a bare string.
+
+    Only a number followed by a unit is a relative time; plain negative numbers such as -1.5 are numbers.
+    """
+    if token[0] in "'\"":
+        return token[1:-1]
+    if token.lower() == "null":
+        return None
+    relative = _RELATIVE_TIME.match(token)
+    if relative:
+        return int(now) - int(relative.group(1)) * _RELATIVE_UNITS[relative.group(2)]
+    if _RELATIVE_TIME_LIKE.match(token):
+        raise ValueError(f"bad relative time {token!r}; use -<count><s|m|h|d|w>, e.g. -7d")
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    return float(token) if _DECIMAL.match(token) else token
+
+def build_export_filter(conn: sqlite3.Connection, table: str, expression: str, now: Optional[float] = None) -> tuple:
+    """Turn "column op value [and column op value ...]" into a parameterised SELECT over one table.
+
+    Columns are checked against the table, values are always bound as parameters. Raises
+    ValueError for an unknown table or column, an unknown operator or a malformed expression.
+    """
+    table = table_name(table)
+    existing = [row[1] for row in conn.execute(f"PRAGMA table_info({table})")] if table.isidentifier() else []
+    if not existing:
+        raise ValueError(f"no such table: {table}")
+    columns = {column.lower(): column for column in existing}
+    now = time.time() if now is None else now
+    tokens = _FILTER_TOKEN.findall(expression)
+    if tokens and len(tokens) % 4 == 0:
+        raise ValueError(f"expression ends with {tokens[-1]!r}")
+    clauses, params = [], []
+    for start in range(0, len(tokens), 4):
+        if start and tokens[start - 1].lower() != "and":
+            raise ValueError(f"expected 'and' before {tokens[start - 1]!r}")
+        clause = tokens[start:start + 3]
+        if len(clause) < 3:
+            raise ValueError(f"incomplete condition: {' '.join(clause) or expression!r}")
+        name, op, token = clause
+        column = columns.get(name.lower())
+        if column is None:
+            raise ValueError(f"no such column in {table}: {name}")
+        template = _FILTER_OPS.get(op.lower())
+        if template is None:
+            raise ValueError(f"unknown operator {op!r}; use one of {', '.join(_FILTER_OPS)}")
+        value = _filter_value(token, now)
+        if value is None and op in ("=", "!="):
+            clauses.append(f"{column} IS {'NOT ' if op == '!=' else ''}NULL")
+            continue
+        clauses.append(template.format(column=column))
+        params.extend([value] * template.count("?"))
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+    return f"SELECT * FROM {table}{where}", params
+
+def _export_value(value):
+    return value.hex() if isinstance(value, bytes) else value
+
+class _JSONLinesRows:
+    def __init__(self, path: str, columns: list, compression: Optional[OutputCompression] = None):
+        self._file = open_text_output(path, compression)
+        self.columns = columns
+
+    def write(self, rows: list):
+        columns = self.columns
+        self._file.writelines(json.dumps({column: _export_value(value) for column, value in zip(columns, row)}) + "\n"
+                              for row in rows)
+
+    def close(self):
+        self._file.close()
+
+class _CSVRows:
+    def __init__(self, path: str, columns: list, compression: Optional[OutputCompression] = None):
+        import csv
+        self._file = open_text_output(path, compression, newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+
+    def write(self, rows: list):
+        self._writer.writerows([_export_value(value) for value in row] for row in rows)
+
+    def close(self):
+        self._file.close()
+
+class _ArrowRows:
+    """Query rows as Parquet row groups or Arrow record batches; column types are fixed by the first batch."""
+    def __init__(self, path: str, columns: list, file_format: str, row_group_size: int):
+        import pyarrow
+        self.pa = pyarrow
+        self.path = path
+        self.columns = columns
+        self.file_format = file_format
+        self.row_group_size = max(1, row_group_size)
+        self.schema = None
+        self._rows = []
+        self._writer = None
+
+    def write(self, rows: list):
+        self._rows.extend(rows)
+        if len(self._rows) >= self.row_group_size:
+            self._flush()
+
+    def _type(self, values: list):
+        pa = self.pa
+        samples = [value for value in values if value is not None]
+        if samples and all(isinstance(value, int) for value in samples):
+            return pa.int64()
+        if samples and all(isinstance(value, (int, float)) for value in samples):
+            return pa.float64()
+        if samples and all(isinstance(value, bytes) for value in samples):
+            return pa.binary()
+        return pa.string()
+
+    def _open(self, types: list):
+        pa = self.pa
+        self.schema = pa.schema([pa.field(name, kind) for name, kind in zip(self.columns, types)])
+        if self.file_format == 'parquet':
+            import pyarrow.parquet as pq
+            self._writer = pq.ParquetWriter(self.path, self.schema)
+        else:
+            self._writer = pa.ipc.new_file(self.path, self.schema)
+
+    def _flush(self):
+        if not self._rows:
+            return
+        pa = self.pa
+        columns = [list(values) for values in zip(*self._rows)]
+        if self.schema is None:
+            self._open([self._type(values) for values in columns])
+        arrays = []
+        for field, values in zip(self.schema, columns):
+            if field.type == pa.string():
+                values = [None if value is None else str(value) for value in values]
+            try:
+                arrays.append(pa.array(values, type=field.type))
+            except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError) as e:
+                raise ValueError(f"column {field.name} mixes value types ({e}); CAST it in the query") from e
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self._rows = []
+
+    def close(self):
+        try:
+            self._flush()
+            if self._writer is None:
+                self._open([self.pa.string()] * len(self.columns))  # no rows: an empty file with the query's columns
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+
+def export_query(conn: sqlite3.Connection, sql: str, params, output_format: str, output_path: str,
+                 array_size: int = DEFAULT_EXPORT_ARRAY_SIZE, row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+                 compression: Optional[OutputCompression] = None) -> int:
+    """Stream the rows of a query to a JSON Lines, CSV, Parquet or Arrow file and return the row count.
+
+    Rows are pulled with fetchmany(array_size), so memory is bounded by one fetch (one row
+    group for Parquet/Arrow) however large the result is. compression applies to JSON Lines and CSV.
+    """
+    cursor = conn.execute(sql, params)
+    if cursor.description is None:
+        raise ValueError("the statement returns no rows")
+    columns = []
+    for (name, *_) in cursor.description:
+        unique, suffix = name, 2
+        while unique in columns:
+            unique, suffix = f"{name}_{suffix}", suffix + 1
+        columns.append(unique)
+    if output_format == 'jsonl':
+        writer = _JSONLinesRows(output_path, columns, compression)
+    elif output_format == 'csv':
+        writer = _CSVRows(output_path, columns, compression)
+    else:
+        writer = _ArrowRows(output_path, columns, output_format, row_group_size)
+    cursor.arraysize = max(1, array_size)
+    exported = 0
+    try:
+        rows = cursor.fetchmany()
+        while rows:
+            writer.write(rows)
+            exported += len(rows)
+            rows = cursor.fetchmany()
+    finally:
+        writer.close()
+    return exported
+
+class _PipelineStage:
+    """One consumer of a WriterPipeline: a bounded queue drained by its own thread."""
+    def __init__(self, name: str, consume, depth: int):
+        self.name = name
+        self.consume = consume
+        import queue
+        self.queue = queue.Queue(maxsize=depth)
+        self.error = None
+        self.batches = 0
+        self.items = 0
+        self.max_depth = 0
+        self.stall_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.busy_seconds = 0.0
+        self.thread = threading.Thread(target=self._run, name=f"amcache-{name}-writer", daemon=True)
+
+    def _run(self):
+        while True:
+            started = time.perf_counter()
+            batch = self.queue.get()
+            self.idle_seconds += time.perf_counter() - started
+            if batch is None:
+                return
+            if self.error is not None:
+                continue  # keep draining so the decoder never blocks on a dead consumer
+            started = time.perf_counter()
+            try:
+                self.consume(batch)
+            except BaseException as e:
+                self.error = e
+                logging.error(f"Pipeline stage {self.name} failed: {e}")
+            self.busy_seconds += time.perf_counter() - started
+            self.batches += 1
+            self.items += len(batch)
+
+    def stats(self) -> dict:
+        return {'batches': self.batches, 'items': self.items, 'max_queue_depth': self.max_depth,
+                'queue_capacity': self.queue.maxsize, 'decoder_stall_seconds': round(self.stall_seconds, 6),
+                'writer_idle_seconds': round(self.idle_seconds, 6), 'writer_busy_seconds': round(self.busy_seconds, 6)}
+
+class WriterPipeline:
+    """Decoder/writer pipeline: items are grouped into batches and fanned out to one bounded queue per consumer.
+
+    Each consumer runs on its own thread, so output writes overlap decoding. A full queue blocks
+    the decoder (backpressure); a consumer error is re-raised in the decoder on its next put()
+    or at close().
+    """
+    def __init__(self, consumers: dict, depth: int = DEFAULT_QUEUE_DEPTH, batch_size: int = DEFAULT_PIPELINE_BATCH):
+        self.batch_size = max(1, batch_size)
+        self.stages = [_PipelineStage(name, consume, max(1, depth)) for name, consume in consumers.items()]
+        self._batch = []
+        self._closed = False
+        for stage in self.stages:
+            stage.thread.start()
+
+    def put(self, item):
+        self._batch.append(item)
+        if len(self._batch) >= self.batch_size:
+            self._dispatch()
+
+    def _dispatch(self):
+        batch, self._batch = self._batch, []
+        for stage in self.stages:
+            self._raise_errors()
+            started = time.perf_counter()
+            stage.queue.put(batch)
+            stage.stall_seconds += time.perf_counter() - started
+            stage.max_depth = max(stage.max_depth, stage.queue.qsize())
+
+    def _raise_errors(self):
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+
+    def close(self, abort: bool = False):
+        """Flush the last batch, stop the writer threads and re-raise the first consumer error.
+
+        With abort=True the pending batch is dropped and consumer errors are not raised,
+        for shutting down after the decoder itself failed.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self._batch and not abort:
+                self._dispatch()
+        finally:
+            self._batch = []
+            for stage in self.stages:
+                stage.queue.put(None)
+            for stage in self.stages:
+                stage.thread.join()
+        if not abort:
+            self._raise_errors()
+
+    def stats(self) -> dict:
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def report(self) -> str:
+        parts = [f"{stage.name} queue max {stage.max_depth}/{stage.queue.maxsize}, decoder stalled {stage.stall_seconds:.2f}s, "
+                 f"writer busy {stage.busy_seconds:.2f}s idle {stage.idle_seconds:.2f}s" for stage in self.stages]
+        return "Pipeline: " + "; ".join(parts)
+
+def path_bytes(path: str) -> int:
+    """Size of an output file, or of all files under an output directory (0 if missing)."""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(dirpath, name)) for dirpath, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+class ParseMetrics:
+    """Wall-clock time per stage and counters for one run, written as JSON by --metrics-json."""
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self.sections = {}
+        self._started = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self, **info) -> dict:
+        walk = self.stages.get('walk', 0.0)
+        metrics = dict(info, total_seconds=round(time.perf_counter() - self._started, 6),
+                       stages={name: round(seconds, 6) for name, seconds in self.stages.items()},
+                       counters=dict(self.counters),
+                       rates={'keys_per_sec': round(self.counters.get('keys_walked', 0) / walk, 1) if walk else None,
+                              'values_per_sec': round(self.counters.get('values_decoded', 0) / walk, 1) if walk else None})
+        metrics.update(self.sections)
+        return metrics
+
+def write_metrics(path: str, metrics: dict):
+    """Write a metrics document as JSON, reporting (not raising) failures."""
+    try:
+        with open(path, 'w') as f:
+            json.dump(metrics, f, indent=2)
+        print(f"✓ Metrics written to {path}")
+        logging.debug(f"Metrics written to {path}")
+    except OSError as e:
+        print(f"❌ Failed to write metrics to {path}: {e}")
+        logging.error(f"Failed to write metrics to {path}: {e}")
+
+@contextlib.contextmanager
+def profiled(output_dir: Optional[str]):
+    """Run the enclosed block under cProfile and save the stats to output_dir; a no-op when output_dir is None."""
+    if output_dir is None:
+        yield
+        return
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        stats_path = os.path.join(output_dir, 'amcache_profile.prof')
+        profiler.dump_stats(stats_path)
+        with open(os.path.join(output_dir, 'amcache_profile.txt'), 'w') as f:
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(50)
+        print(f"✓ Profile written to {stats_path} (summary in amcache_profile.txt)")
+        logging.debug(f"Profile written to {stats_path}")
+
+def _project(values: dict, fields: Optional[tuple]) -> dict:
+    return {name: values[name] for name in fields if name in values} if fields else values
+
+class AmcacheEntry:
+    """One parsed key. Values are decoded on first access, so entries skipped by name or last-write time cost no decode."""
+    __slots__ = ('subkey_name', 'entry_id', 'last_write', '_values', '_source')
+
+    def __init__(self, subkey_name: str, entry_id: str, last_write: Optional[int], values: Optional[dict] = None,
+                 source: Optional[tuple] = None):
+        self.subkey_name = subkey_name
+        self.entry_id = entry_id
+        self.last_write = last_write
+        self._values = values
+        self._source = source  # (engine, key, typed, fields) until decoded
+
+    @property
+    def decoded(self) -> bool:
+        return self._values is not None
+
+    @property
+    def values(self) -> dict:
+        """Value name -> value; decoding needs the parser's hive to still be open."""
+        if self._values is None:
+            engine, key, typed, fields = self._source
+            self._values = _project(engine.values(key, typed), fields)
+            self._source = None
+        return self._values
+
+    def as_dict(self) -> dict:
+        return {'subkey_name': self.subkey_name, 'entry_id': self.entry_id, 'data': self.values}
+
+    def __repr__(self) -> str:
+        return f"AmcacheEntry({self.subkey_name!r}, {self.entry_id!r})"
+
+_WORKER_ENGINE = None
+_WORKER_STORED = {}
+
+def _init_shard_worker(file_path: str, engine: str = 'registry', stored: Optional[dict] = None):
+    """Open the offline hive once per worker process; stored maps subkey -> {entry_id: last write} to skip."""
+    global _WORKER_ENGINE, _WORKER_STORED
+    _WORKER_ENGINE = open_engine(engine, MappedHiveFile(file_path))
+    _WORKER_STORED = stored or {}
+
+def _parse_shard(shard):
+    """Decode the keys of one (subkey, start, stop) range in a worker process.
+
+    Keys stored with the same last-write time come back with None values, undecoded.
+    """
+    subkey_name, start, stop, typed = shard
+    rows = []
+    if stop > start:
+        engine = _WORKER_ENGINE
+        stored = _WORKER_STORED.get(subkey_name, {})
+        for key_name, key in engine.iter_keys(engine.subkey(subkey_name), start, stop):
+            last_write = engine.last_write(key)
+            if key_name in stored and stored[key_name] == last_write:
+                rows.append((key_name, last_write, None))
+            else:
+                rows.append((key_name, last_write, engine.values(key, typed)))
+    return subkey_name, rows
+
 class AmcacheParser:
-    def __init__(self, file_path: str, db_path: str, output_format: str = 'sqlite', search_keys: Optional[List[str]] = None):
+    def __init__(self, file_path: str, db_path: str, output_format: str = 'sqlite', search_keys: Optional[List[str]] = None,
+                 batch_size: int = DEFAULT_BATCH_SIZE, live: bool = False, use_database: bool = True,
+                 row_group_size: int = DEFAULT_ROW_GROUP_SIZE, workers: int = 1, host: str = '',
+                 show_progress: bool = True, engine: str = 'registry', known_hives: Optional[dict] = None,
+                 build_indexes: bool = True, ioc_path: Optional[str] = None, keep_entries: bool = False,
+                 metrics_path: Optional[str] = None, pipeline: bool = False, queue_depth: int = DEFAULT_QUEUE_DEPTH,
+                 compress: Optional[str] = None, compress_threads: int = 1, source_path: Optional[str] = None,
+                 known_entries: Optional[dict] = None, known_ioc_sweep: Optional[str] = None):
+        self.metrics = ParseMetrics()
+        self.pipeline = pipeline
+        self.queue_depth = queue_depth
+        self._pipeline = None
+        self.metrics_path = metrics_path
         self.file_path = file_path
+        self.source_path = source_path or file_path
+        self.keep_entries = keep_entries
+        self.build_indexes = build_indexes
+        # Hives the main database of a batch already holds for this host: {hive_sha256: {subkey: entries}}.
+        self.known_hives = known_hives or {}
+        # What the main database of a batch holds for this host: {table: {entry_id: key last write}}
+        # and the IOC sweep of its last ingest. Single-hive runs read both from their own database.
+        self.known_entries = known_entries or {}
+        self.known_ioc_sweep = known_ioc_sweep
+        self.engine = engine
+        self.host = host
+        self.show_progress = show_progress
+        self.live = live
+        self.use_database = use_database
+        self.row_group_size = row_group_size
+        self.workers = max(1, workers)
         self.db_path = db_path
         self.output_format = output_format.lower()
+        self.compression = None
+        if compress and self.output_format in TEXT_OUTPUT_FORMATS:
+            self.compression = OutputCompression(compress, compress_threads)
+        elif compress:
+            print(f"⚠️ --compress applies to {', '.join(TEXT_OUTPUT_FORMATS)} output; {self.output_format} is written uncompressed")
+            logging.warning(f"--compress ignored for output format {self.output_format}")
         self.search_keys = search_keys
+        self.batch_size = batch_size
+        self.writer = None
+        self._entry_index = {}
+        self._insert_sql = {}
         self.entries = []
         self.failed_parses = 0
         self.analysis_time = datetime.now(tz=timezone.utc)
-        self.handle = self._load_hive_with_retry()
-        self._init_database()
+        self.parsed_count = 0
+        self.new_entries = 0
+        self.changed_entries = 0
+        self.unchanged_entries = 0
+        self.skipped_decodes = 0
+        self.skipped_hive = False
+        self._covered = {}  # {subkey: entries} already ingested from this hive for this host
+        self.ioc_matches = {'sha1': 0, 'path': 0}
+        self.timestamps = TimestampNormalizer()
+        self.ioc = None
+        if ioc_path:
+            with self.metrics.stage('ioc_load'):
+                self.ioc = self._load_iocs(ioc_path)
+        self.sinks = []
+        self._sweep_unchanged = True
+        with self.metrics.stage('load_hive'):
+            self.handle = self._load_hive_with_retry()
+        with self.metrics.stage('hash'):
+            self.hive_sha256 = self._hash_hive()
+        if self.use_database:
+            with self.metrics.stage('db_init'):
+                self._init_database()
 
-    def _load_hive_with_retry(self, retries: int = 3) -> NTFileLikeObject:
-        """Attempt to load the Amcache hive with retries."""
+    def _load_hive_with_retry(self, retries: int = 3):
+        """Attempt to load the Amcache hive with retries.
+
+        Live hives are exported through the Windows registry API and read into a
+        WholeHiveFile; offline hives are memory-mapped directly, which needs no
+        Windows API and no temporary copy.
+        """
         for attempt in range(retries):
             try:
-                handle = RegistryHivesLive().open_apphive_by_file(self.file_path)
+                if self.live:
+                    handle = WholeHiveFile(RegistryHivesLive().open_apphive_by_file(self.file_path))
+                else:
+                    handle = MappedHiveFile(self.file_path)
                 print(f"✓ Successfully loaded hive: {self.file_path}")
                 logging.debug(f"Loaded hive: {self.file_path}")
+                if getattr(handle, 'dirty', False):
+                    if handle.replayed_entries:
+                        logs = ", ".join(os.path.basename(log) for log in handle.replayed_logs)
+                        print(f"✓ Hive was dirty; replayed {handle.replayed_entries} log entries from {logs}")
+                        logging.debug(f"Replayed {handle.replayed_entries} log entries from {logs}")
+                    else:
+                        print("⚠️ Hive is dirty but no usable transaction log entries were found; recent changes may be missing")
+                        logging.warning(f"Dirty hive without usable transaction logs: {self.file_path}")
                 return handle
             except OSError as e:
                 print(f"⚠️ Attempt {attempt + 1}/{retries} failed to load hive: {e}")
@@ -401,18 +2556,86 @@ class AmcacheParser:
                 time.sleep(1)
         return None
 
+    def _load_iocs(self, ioc_path: str) -> IOCMatcher:
+        """Load the IOC file swept against every parsed entry."""
+        started = time.perf_counter()
+        try:
+            ioc = load_iocs(os.path.abspath(ioc_path))
+        except OSError as e:
+            print(f"❌ Failed to load IOC file {ioc_path}: {e}")
+            logging.error(f"Failed to load IOC file {ioc_path}: {e}")
+            sys.exit(1)
+        print(f"✓ Loaded {ioc.report()} in {time.perf_counter() - started:.2f}s")
+        logging.debug(f"Loaded {ioc.report()}")
+        return ioc
+
+    def _hash_hive(self) -> str:
+        """Return the SHA-256 of the loaded hive, used to tag rows with their source."""
+        import hashlib
+        digest = hashlib.sha256()
+        if isinstance(self.handle, MappedHiveFile) or getattr(self.handle, 'whole', False):
+            with self.handle.buffer() as view:
+                digest.update(view)
+                self.metrics.count('hashed_bytes', len(view))
+        else:
+            chunk = bytearray(1 << 20)
+            view = memoryview(chunk)
+            self.handle.seek(0)
+            count = self.handle.readinto(chunk)
+            while count:
+                digest.update(view[:count])
+                self.metrics.count('hashed_bytes', count)
+                count = self.handle.readinto(chunk)
+            view.release()
+            self.handle.seek(0)
+        return digest.hexdigest()
+
     def _init_database(self):
         """Initialize SQLite database with a table to track subkeys."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS subkeys (
-                        subkey_name TEXT PRIMARY KEY,
-                        parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            self.writer = SQLiteWriter(self.db_path, self.batch_size)
+            self.writer.execute("""
+                CREATE TABLE IF NOT EXISTS subkeys (
+                    subkey_name TEXT PRIMARY KEY,
+                    parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self.writer.execute("""
+                CREATE TABLE IF NOT EXISTS hives (
+                    host TEXT NOT NULL DEFAULT '',
+                    hive_sha256 TEXT NOT NULL,
+                    source_path TEXT,
+                    file_size INTEGER,
+                    entries INTEGER,
+                    parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    ioc_sweep TEXT,
+                    subkeys TEXT,
+                    PRIMARY KEY (host, hive_sha256)
+                )
+            """)
+            # subkeys: JSON {subkey: entries} of the subkeys ingested from the hive, whatever the selection.
+            self._add_missing_columns("hives", {"ioc_sweep": "TEXT", "subkeys": "TEXT"})
+            if self.known_ioc_sweep is None:
+                # REPLACE gives the latest ingest of a host the highest rowid.
+                row = self.writer.query_one("SELECT ioc_sweep FROM hives WHERE host = ? ORDER BY rowid DESC LIMIT 1",
+                                            (self.host,))
+                self.known_ioc_sweep = row[0] if row else None
+            if self.ioc is not None:
+                self.writer.execute("""
+                    CREATE TABLE IF NOT EXISTS ioc_matches (
+                        entry_id TEXT NOT NULL,
+                        host TEXT NOT NULL DEFAULT '',
+                        hive_sha256 TEXT,
+                        subkey_name TEXT NOT NULL,
+                        ioc_type TEXT NOT NULL,
+                        indicator TEXT NOT NULL,
+                        field TEXT NOT NULL,
+                        value TEXT,
+                        ioc_source TEXT,
+                        matched_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (host, subkey_name, entry_id, ioc_type, indicator, field)
                     )
                 """)
-                conn.commit()
             print(f"✓ Database initialized: {self.db_path}")
             logging.debug(f"Database initialized: {self.db_path}")
         except sqlite3.OperationalError as e:
@@ -421,160 +2644,135 @@ class AmcacheParser:
             sys.exit(1)
 
     def _create_table_for_subkey(self, subkey_name: str):
-        """Create a table for a specific subkey with appropriate columns."""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                safe_table_name = subkey_name.replace("-", "_").replace(" ", "_")
-                if subkey_name == "InventoryApplicationFile":
-                    cursor.execute(f"""
-                        CREATE TABLE IF NOT EXISTS {safe_table_name} (
-                            entry_id TEXT PRIMARY KEY,
-                            ProgramId TEXT,
-                            FileId TEXT,
-                            LowerCaseLongPath TEXT,
-                            Name TEXT,
-                            OriginalFileName TEXT,
-                            Publisher TEXT,
-                            Version TEXT,
-                            BinFileVersion TEXT,
-                            BinaryType TEXT,
-                            ProductName TEXT,
-                            ProductVersion TEXT,
-                            LinkDate TEXT,
-                            BinProductVersion TEXT,
-                            Size TEXT,
-                            Language TEXT,
-                            LanguageName TEXT,
-                            Usn TEXT,
-                            parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    """)
-                elif subkey_name == "InventoryApplication":
-                    cursor.execute(f"""
-                        CREATE TABLE IF NOT EXISTS {safe_table_name} (
-                            entry_id TEXT PRIMARY KEY,
-                            ProgramId TEXT,
-                            ProgramInstanceId TEXT,
-                            Name TEXT,
-                            Version TEXT,
-                            Publisher TEXT,
-                            Language TEXT,
-                            LanguageName TEXT,
-                            InstallDate TEXT,
-                            Source TEXT,
-                            RootDirPath TEXT,
-                            HiddenArp TEXT,
-                            UninstallString TEXT,
-                            RegistryKeyPath TEXT,
-                            MsiPackageCode TEXT,
-                            MsiProductCode TEXT,
-                            MsiInstallDate TEXT,
-                            DefaultValue TEXT,
-                            parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    """)
-                else:
-                    cursor.execute(f"""
-                        CREATE TABLE IF NOT EXISTS {safe_table_name} (
-                            entry_id TEXT PRIMARY KEY,
-                            data TEXT NOT NULL,
-                            parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        )
-                    """)
-                cursor.execute("INSERT OR IGNORE INTO subkeys (subkey_name) VALUES (?)", (subkey_name,))
-                conn.commit()
-            logging.debug(f"Created table for subkey: {subkey_name}")
-        except sqlite3.OperationalError as e:
-            print(f"❌ Failed to create table for subkey {subkey_name}: {e}")
-            logging.error(f"Failed to create table for subkey {subkey_name}: {e}")
-            sys.exit(1)
+        """Create a subkey table from its schema, plus the JSON overflow column for unlisted values."""
+        with self.writer.lock:
+            try:
+                safe_table_name = table_name(subkey_name)
+                columns = subkey_columns(subkey_name)
+                sources = timestamp_sources(subkey_name)
+                companions = [f"{source}_{suffix}" for source in sources for suffix in ("epoch", "iso")]
+                typed_columns = "".join(f"{column} {SQL_COLUMN_TYPES[kind]},\n" for column, _, kind in columns)
+                typed_columns += "".join(f"{companion} {'INTEGER' if companion.endswith('_epoch') else 'TEXT'},\n"
+                                         for companion in companions)
+                self.writer.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {safe_table_name} (
+                        entry_id TEXT NOT NULL,
+                        host TEXT NOT NULL DEFAULT '',
+                        hive_sha256 TEXT,
+                        key_last_write INTEGER,
+                        {typed_columns}
+                        data TEXT,
+                        parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (host, entry_id)
+                    )
+                """)
+                self._upgrade_table(subkey_name, safe_table_name)
+                # Tables from before the schema registry kept every value in a NOT NULL data column.
+                overflow_required = any(row[1] == "data" and row[3] for row in self.writer.query(f"PRAGMA table_info({safe_table_name})"))
+                row_columns = ["entry_id", "host", "hive_sha256", "key_last_write"] + [column for column, _, _ in columns] + ["data"]
+                names = ", ".join(row_columns + companions)
+                placeholders = ", ".join("?" * (len(row_columns) + len(companions)))
+                self._insert_sql[subkey_name] = (
+                    f"INSERT OR REPLACE INTO {safe_table_name} ({names}) VALUES ({placeholders})",
+                    [value_name for _, value_name, _ in columns],
+                    {value_name for _, value_name, _ in columns if value_name is not None},
+                    "{}" if overflow_required else None,
+                    functools.partial(self._normalize_timestamps, [row_columns.index(source) for source in sources]),
+                )
+                self.writer.execute("INSERT OR IGNORE INTO subkeys (subkey_name) VALUES (?)", (subkey_name,))
+                self._entry_index[subkey_name] = EntryIdIndex(self.writer, safe_table_name, self.host)
+                if safe_table_name in self.known_entries:
+                    self._entry_index[subkey_name].seed(self.known_entries[safe_table_name])
+                logging.debug(f"Created table for subkey: {subkey_name}")
+            except sqlite3.OperationalError as e:
+                print(f"❌ Failed to create table for subkey {subkey_name}: {e}")
+                logging.error(f"Failed to create table for subkey {subkey_name}: {e}")
+                sys.exit(1)
+
+    def _upgrade_table(self, subkey_name: str, table: str):
+        """Bring a subkey table written by an older version up to the current schema."""
+        sources = timestamp_sources(subkey_name)
+        companions = {f"{source}_{suffix}": "INTEGER" if suffix == "epoch" else "TEXT"
+                      for source in sources for suffix in ("epoch", "iso")}
+        added = self._add_missing_columns(table, dict(
+            {"host": "TEXT NOT NULL DEFAULT ''", "hive_sha256": "TEXT", "key_last_write": "INTEGER", "data": "TEXT"},
+            **{column: SQL_COLUMN_TYPES[kind] for column, _, kind in subkey_columns(subkey_name)}, **companions))
+        if added & companions.keys():
+            self._backfill_timestamps(table, sources)
+
+    def _add_missing_columns(self, table: str, columns: dict) -> set:
+        """Add columns introduced after a table was first created (older databases); return the added names."""
+        existing = {row[1] for row in self.writer.query(f"PRAGMA table_info({table})")}
+        added = set()
+        for name, definition in columns.items():
+            if name not in existing:
+                self.writer.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                added.add(name)
+                logging.debug(f"Added column {name} to existing table {table}")
+        return added
+
+    def _normalize_timestamps(self, indexes: list, rows: list) -> list:
+        """Append the epoch/ISO companions of each timestamp column to a batch of rows, one column at a time."""
+        pairs = [self.timestamps.convert_column([row[index] for row in rows]) for index in indexes]
+        return [row + tuple(itertools.chain.from_iterable(converted)) for row, *converted in zip(rows, *pairs)]
+
+    def _backfill_timestamps(self, table: str, sources: list):
+        """Fill the companion columns just added to a table written by an older version."""
+        with self.writer.lock:
+            self.writer.execute("BEGIN")
+            for source in sources:
+                rows = self.writer.query(f"SELECT rowid, {source} FROM {table} WHERE {source} IS NOT NULL")
+                converted = self.timestamps.convert_column([value for _, value in rows])
+                self.writer.executemany(f"UPDATE {table} SET {source}_epoch = ?, {source}_iso = ? WHERE rowid = ?",
+                                        [(epoch, iso, rowid) for (rowid, _), (epoch, iso) in zip(rows, converted)])
+            self.writer.execute("COMMIT")
+        logging.debug(f"Backfilled normalised timestamps in {table}")
+
+    def _stored_entries(self, subkey_names: List[str]) -> dict:
+        """{subkey: {entry_id: key last write}} of this host, for pool workers to skip unchanged keys."""
+        stored = {}
+        for subkey_name in subkey_names:
+            table = table_name(subkey_name)
+            if table in self.known_entries:
+                stored[subkey_name] = self.known_entries[table]
+            elif self.writer.query_one("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)):
+                with self.writer.lock:
+                    stored[subkey_name] = stored_entries(self.writer.conn, table, self.host)
+        return {name: entries for name, entries in stored.items() if entries}
 
-    def _check_entry_exists(self, subkey_name: str, entry_id: str) -> bool:
-        """Check if an entry exists in the specified subkey table."""
+    def _needs_store(self, subkey_name: str, entry_id: str, last_write: Optional[int]) -> bool:
+        """Whether an entry is new or its key was written since it was stored; counts the outcome."""
+        if self.writer is None:
+            return False
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                safe_table_name = subkey_name.replace("-", "_").replace(" ", "_")
-                cursor.execute(f"SELECT 1 FROM {safe_table_name} WHERE entry_id = ?", (entry_id,))
-                return cursor.fetchone() is not None
+            stored = self._entry_index[subkey_name].last_write(entry_id)
         except sqlite3.OperationalError as e:
             logging.error(f"Error checking entry in {subkey_name}: {e}")
-            return False
+            stored = EntryIdIndex.MISSING
+        if stored is EntryIdIndex.MISSING:
+            self.new_entries += 1
+            return True
+        if stored != last_write:
+            self.changed_entries += 1
+            return True
+        self.unchanged_entries += 1
+        return False
 
-    def _insert_entry(self, subkey_name: str, entry_id: str, data: dict):
-        """Insert a new entry into the specified subkey table."""
+    def _insert_entry(self, subkey_name: str, entry_id: str, data: dict, last_write: Optional[int] = None):
+        """Queue a new or changed entry for batched upsert into the specified subkey table."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                safe_table_name = subkey_name.replace("-", "_").replace(" ", "_")
-                language_value = data.get("Language")
-                language_name = LCID_TO_LANGUAGE.get(int(language_value), "Unknown") if language_value and language_value.isdigit() else "Unknown"
-                if subkey_name == "InventoryApplicationFile":
-                    cursor.execute(f"""
-                        INSERT INTO {safe_table_name} (
-                            entry_id, ProgramId, FileId, LowerCaseLongPath, Name, OriginalFileName,
-                            Publisher, Version, BinFileVersion, BinaryType, ProductName,
-                            ProductVersion, LinkDate, BinProductVersion, Size, Language, LanguageName, Usn
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        entry_id,
-                        data.get("ProgramId"),
-                        data.get("FileId"),
-                        data.get("LowerCaseLongPath"),
-                        data.get("Name"),
-                        data.get("OriginalFileName"),
-                        data.get("Publisher"),
-                        data.get("Version"),
-                        data.get("BinFileVersion"),
-                        data.get("BinaryType"),
-                        data.get("ProductName"),
-                        data.get("ProductVersion"),
-                        data.get("LinkDate"),
-                        data.get("BinProductVersion"),
-                        data.get("Size"),
-                        data.get("Language"),
-                        language_name,
-                        data.get("Usn")
-                    ))
-                elif subkey_name == "InventoryApplication":
-                    cursor.execute(f"""
-                        INSERT INTO {safe_table_name} (
-                            entry_id, ProgramId, ProgramInstanceId, Name, Version, Publisher,
-                            Language, LanguageName, InstallDate, Source, RootDirPath, HiddenArp,
-                            UninstallString, RegistryKeyPath, MsiPackageCode, MsiProductCode,
-                            MsiInstallDate, DefaultValue
-                        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        entry_id,
-                        data.get("ProgramId"),
-                        data.get("ProgramInstanceId"),
-                        data.get("Name"),
-                        data.get("Version"),
-                        data.get("Publisher"),
-                        data.get("Language"),
-                        language_name,
-                        data.get("InstallDate"),
-                        data.get("Source"),
-                        data.get("RootDirPath"),
-                        data.get("HiddenArp"),
-                        data.get("UninstallString"),
-                        data.get("RegistryKeyPath"),
-                        data.get("MsiPackageCode"),
-                        data.get("MsiProductCode"),
-                        data.get("MsiInstallDate"),
-                        data.get("(default)")
-                    ))
-                else:
-                    cursor.execute(f"""
-                        INSERT INTO {safe_table_name} (entry_id, data)
-                        VALUES (?, ?)
-                    """, (entry_id, json.dumps(data)))
-                conn.commit()
-            logging.debug(f"Inserted entry {entry_id} into {subkey_name}")
+            sql, value_names, known, overflow_default, prepare = self._insert_sql[subkey_name]
+            row = [entry_id, self.host, self.hive_sha256, last_write]
+            for value_name in value_names:
+                row.append(data.get(value_name) if value_name is not None else language_name(data.get("Language")))
+            overflow = {name: value for name, value in data.items() if name not in known}
+            row.append(json.dumps(overflow) if overflow else overflow_default)
+            self.writer.add(table_name(subkey_name), sql, tuple(row), prepare)
+            self._entry_index[subkey_name].add(entry_id, last_write)
+            logging.debug(f"Queued entry {entry_id} for {subkey_name}")
         except sqlite3.OperationalError as e:
-            print(f"❌ Failed to insert entry {entry_id} into {subkey_name}: {e}")
-            logging.error(f"Failed to insert entry {entry_id} into {subkey_name}: {e}")
+            print(f"❌ Failed to insert batch containing {entry_id} into {subkey_name}: {e}")
+            logging.error(f"Failed to insert batch containing {entry_id} into {subkey_name}: {e}")
             self.failed_parses += 1
 
     def _save_to_json(self, output_path: str):
@@ -586,211 +2784,353 @@ class AmcacheParser:
                 subkeys = [row[0] for row in cursor.fetchall()]
                 data = {}
                 for subkey in subkeys:
-                    safe_table_name = subkey.replace("-", "_").replace(" ", "_")
-                    if subkey == "InventoryApplicationFile":
-                        cursor.execute(f"""
-                            SELECT entry_id, ProgramId, FileId, LowerCaseLongPath, Name, OriginalFileName,
-                                   Publisher, Version, BinFileVersion, BinaryType, ProductName,
-                                   ProductVersion, LinkDate, BinProductVersion, Size, Language, LanguageName, Usn
-                            FROM {safe_table_name}
-                        """)
-                        entries = [
-                            {
-                                "entry_id": row[0],
-                                "data": {
-                                    "ProgramId": row[1],
-                                    "FileId": row[2],
-                                    "LowerCaseLongPath": row[3],
-                                    "Name": row[4],
-                                    "OriginalFileName": row[5],
-                                    "Publisher": row[6],
-                                    "Version": row[7],
-                                    "BinFileVersion": row[8],
-                                    "BinaryType": row[9],
-                                    "ProductName": row[10],
-                                    "ProductVersion": row[11],
-                                    "LinkDate": row[12],
-                                    "BinProductVersion": row[13],
-                                    "Size": row[14],
-                                    "Language": row[15],
-                                    "LanguageName": row[16],
-                                    "Usn": row[17]
-                                }
-                            } for row in cursor.fetchall()
-                        ]
-                    elif subkey == "InventoryApplication":
-                        cursor.execute(f"""
-                            SELECT entry_id, ProgramId, ProgramInstanceId, Name, Version, Publisher,
-                                   Language, LanguageName, InstallDate, Source, RootDirPath, HiddenArp,
-                                   UninstallString, RegistryKeyPath, MsiPackageCode, MsiProductCode,
-                                   MsiInstallDate, DefaultValue
-                            FROM {safe_table_name}
-                        """)
-                        entries = [
-                            {
-                                "entry_id": row[0],
-                                "data": {
-                                    "ProgramId": row[1],
-                                    "ProgramInstanceId": row[2],
-                                    "Name": row[3],
-                                    "Version": row[4],
-                                    "Publisher": row[5],
-                                    "Language": row[6],
-                                    "LanguageName": row[7],
-                                    "InstallDate": row[8],
-                                    "Source": row[9],
-                                    "RootDirPath": row[10],
-                                    "HiddenArp": row[11],
-                                    "UninstallString": row[12],
-                                    "RegistryKeyPath": row[13],
-                                    "MsiPackageCode": row[14],
-                                    "MsiProductCode": row[15],
-                                    "MsiInstallDate": row[16],
-                                    "(default)": row[17]
-                                }
-                            } for row in cursor.fetchall()
-                        ]
-                    else:
-                        cursor.execute(f"SELECT entry_id, data FROM {safe_table_name}")
-                        entries = [{"entry_id": row[0], "data": json.loads(row[1])} for row in cursor.fetchall()]
+                    safe_table_name = table_name(subkey)
+                    existing = {row[1] for row in cursor.execute(f"PRAGMA table_info({safe_table_name})")}
+                    columns = [(column, value_name or column) for column, value_name, _ in subkey_columns(subkey)
+                               if column in existing]
+                    select = ", ".join(["entry_id"] + [column for column, _ in columns] + ["data"])
+                    entries = []
+                    for row in cursor.execute(f"SELECT {select} FROM {safe_table_name}"):
+                        values = {name: value for (_, name), value in zip(columns, row[1:-1])}
+                        if row[-1]:
+                            values.update(json.loads(row[-1]))
+                        entries.append({"entry_id": row[0], "data": values})
                     data[subkey] = entries
-            with open(output_path, 'w') as f:
+            with open_text_output(output_path, self.compression) as f:
                 json.dump(data, f, indent=2)
+            output_path = self._output_path(output_path)
             print(f"✓ Saved {len(data)} subkeys to JSON: {output_path}")
             logging.debug(f"Saved {len(data)} subkeys to JSON: {output_path}")
         except Exception as e:
             print(f"❌ Failed to save JSON: {e}")
             logging.error(f"Failed to save JSON to {output_path}: {e}")
 
-    def _save_to_csv(self, output_path: str):
-        """Save parsed entries to a CSV file with LanguageName."""
-        try:
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                with sqlite3.connect(self.db_path) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute("SELECT subkey_name FROM subkeys")
-                    subkeys = [row[0] for row in cursor.fetchall()]
-                    headers = [
-                        'subkey_name', 'entry_id', 'ProgramId', 'ProgramInstanceId', 'FileId', 'LowerCaseLongPath',
-                        'Name', 'OriginalFileName', 'Publisher', 'Version', 'BinFileVersion', 'BinaryType',
-                        'ProductName', 'ProductVersion', 'LinkDate', 'BinProductVersion', 'Size', 'Language',
-                        'LanguageName', 'Usn', 'InstallDate', 'Source', 'RootDirPath', 'HiddenArp', 'UninstallString',
-                        'RegistryKeyPath', 'MsiPackageCode', 'MsiProductCode', 'MsiInstallDate', 'DefaultValue'
-                    ]
-                    writer = csv.DictWriter(f, fieldnames=headers)
-                    writer.writeheader()
-                    for subkey in subkeys:
-                        safe_table_name = subkey.replace("-", "_").replace(" ", "_")
-                        if subkey == "InventoryApplicationFile":
-                            cursor.execute(f"""
-                                SELECT entry_id, ProgramId, FileId, LowerCaseLongPath, Name, OriginalFileName,
-                                       Publisher, Version, BinFileVersion, BinaryType, ProductName,
-                                       ProductVersion, LinkDate, BinProductVersion, Size, Language, LanguageName, Usn
-                                FROM {safe_table_name}
-                            """)
-                            for row in cursor.fetchall():
-                                writer.writerow({
-                                    'subkey_name': subkey,
-                                    'entry_id': row[0],
-                                    'ProgramId': row[1],
-                                    'FileId': row[2],
-                                    'LowerCaseLongPath': row[3],
-                                    'Name': row[4],
-                                    'OriginalFileName': row[5],
-                                    'Publisher': row[6],
-                                    'Version': row[7],
-                                    'BinFileVersion': row[8],
-                                    'BinaryType': row[9],
-                                    'ProductName': row[10],
-                                    'ProductVersion': row[11],
-                                    'LinkDate': row[12],
-                                    'BinProductVersion': row[13],
-                                    'Size': row[14],
-                                    'Language': row[15],
-                                    'LanguageName': row[16],
-                                    'Usn': row[17]
-                                })
-                        elif subkey == "InventoryApplication":
-                            cursor.execute(f"""
-                                SELECT entry_id, ProgramId, ProgramInstanceId, Name, Version, Publisher,
-                                       Language, LanguageName, InstallDate, Source, RootDirPath, HiddenArp,
-                                       UninstallString, RegistryKeyPath, MsiPackageCode, MsiProductCode,
-                                       MsiInstallDate, DefaultValue
-                                FROM {safe_table_name}
-                            """)
-                            for row in cursor.fetchall():
-                                writer.writerow({
-                                    'subkey_name': subkey,
-                                    'entry_id': row[0],
-                                    'ProgramId': row[1],
-                                    'ProgramInstanceId': row[2],
-                                    'Name': row[3],
-                                    'Version': row[4],
-                                    'Publisher': row[5],
-                                    'Language': row[6],
-                                    'LanguageName': row[7],
-                                    'InstallDate': row[8],
-                                    'Source': row[9],
-                                    'RootDirPath': row[10],
-                                    'HiddenArp': row[11],
-                                    'UninstallString': row[12],
-                                    'RegistryKeyPath': row[13],
-                                    'MsiPackageCode': row[14],
-                                    'MsiProductCode': row[15],
-                                    'MsiInstallDate': row[16],
-                                    'DefaultValue': row[17]
-                                })
-                        else:
-                            cursor.execute(f"SELECT entry_id, data FROM {safe_table_name}")
-                            for row in cursor.fetchall():
-                                writer.writerow({
-                                    'subkey_name': subkey,
-                                    'entry_id': row[0],
-                                    'data': row[1]
-                                })
-            print(f"✓ Saved entries to CSV: {output_path}")
-            logging.debug(f"Saved entries to CSV: {output_path}")
-        except Exception as e:
-            print(f"❌ Failed to save CSV: {e}")
-            logging.error(f"Failed to save CSV to {output_path}: {e}")
+    def _output_path(self, path: str) -> str:
+        """Name of a text output file as written, with the compression suffix if any."""
+        return self.compression.path(path) if self.compression is not None else path
+
+    def _open_sinks(self):
+        """Create the streaming output sinks fed directly by the key walk."""
+        if self.output_format == 'jsonl':
+            self.sinks.append(JSONLinesSink(self.db_path.replace('.db', '.jsonl'), self.compression))
+        elif self.output_format == 'csv':
+            self.sinks.append(CSVSink(self.db_path.replace('.db', '_csv'), compression=self.compression))
+        elif self.output_format in ('parquet', 'arrow'):
+            try:
+                self.sinks.append(ArrowSink(self.db_path.replace('.db', f'_{self.output_format}'), self.output_format,
+                                                self.row_group_size))
+            except ImportError:
+                print(f"❌ pyarrow is required for --output {self.output_format}: pip install pyarrow")
+                logging.error(f"pyarrow not installed for output format {self.output_format}")
+                sys.exit(1)
+
+    def _ioc_sweep(self) -> Optional[str]:
+        """Fingerprint of this run's IOC sweep: the indicator set and the subkeys it is applied to."""
+        if self.ioc is None:
+            return None
+        selection = ",".join(sorted(self.search_keys)) if self.search_keys else f"{self.engine} scope"
+        return f"{self.ioc.digest}:{selection}"
+
+    def _consumers_of_unchanged(self) -> List[str]:
+        """Outputs that need the keys the database already holds unchanged, so those keys must still be decoded.
+
+        Streaming outputs are full exports of the hive. An IOC sweep needs them unless the last
+        ingest of this host swept the same subkeys with the same indicators.
+        """
+        consumers = []
+        if self.output_format in STREAMING_OUTPUT_FORMATS:
+            consumers.append(f"{self.output_format} output")
+        if self.ioc is not None and self._ioc_sweep() != self.known_ioc_sweep:
+            consumers.append("IOC sweep")
+        return consumers
+
+    def _hive_already_parsed(self, selection: List[str]) -> Optional[List[str]]:
+        """Subkeys of the selection still to parse from a hive whose fingerprint is recorded for this host.
+
+        Returns None to parse the whole selection: the hive is new, or an output needs its unchanged keys.
+        An empty list means every selected subkey was ingested before and the hive is skipped.
+        """
+        if self.writer is None:
+            return None
+        row = self.writer.query_one("SELECT parsed_timestamp, subkeys FROM hives WHERE host = ? AND hive_sha256 = ?",
+                                    (self.host, self.hive_sha256))
+        if row is not None:
+            self._covered = json.loads(row[1]) if row[1] else {}
+            state = f"Hive unchanged since {row[0]}"
+        elif self.hive_sha256 in self.known_hives:
+            # A batch worker: the fingerprint is recorded in the main database, not in this partition.
+            self._covered = dict(self.known_hives[self.hive_sha256] or {})
+            state = "Hive already ingested for this host"
+        else:
+            return None
+        if self._consumers_of_unchanged():
+            return None
+        missing = [subkey_name for subkey_name in selection if subkey_name not in self._covered]
+        if missing:
+            print(f"⚙️ {state}, but not {', '.join(missing)}; parsing only those subkeys")
+            logging.debug(f"Hive {self.hive_sha256} already ingested without {', '.join(missing)}")
+            return missing
+        self.skipped_hive = True
+        for (subkey_name,) in self.writer.query("SELECT subkey_name FROM subkeys"):
+            self._upgrade_table(subkey_name, table_name(subkey_name))
+        entries = sum(self._covered[subkey_name] for subkey_name in selection)
+        print(f"✓ {state} (SHA-256 {self.hive_sha256[:16]}…); skipped all {entries} entries")
+        logging.debug(f"Skipped unchanged hive {self.file_path} ({self.hive_sha256})")
+        return missing
+
+    def _close_sinks(self):
+        for sink in self.sinks:
+            sink.close()
+
+    def _handle_entry(self, entry: AmcacheEntry, typed: bool, store: bool):
+        """Store one entry and feed it to the output sinks."""
+        if entry.decoded:
+            values = entry.values
+        else:
+            started = time.perf_counter()
+            values = entry.values
+            self.metrics.add_time('decode', time.perf_counter() - started)
+        self.metrics.count('entries_decoded')
+        self.metrics.count('values_decoded', len(values))
+        subkey_name, key_name = entry.subkey_name, entry.entry_id
+        values_dict = {name: str(value) for name, value in values.items()} if typed else values
+        sweep = self.ioc is not None and (store or self._sweep_unchanged)
+        matches = self._sweep_iocs(subkey_name, key_name, values_dict) if sweep else ()
+        item = (subkey_name, key_name, entry.last_write, values, values_dict, store, matches)
+        if self._pipeline is not None:
+            self._pipeline.put(item)
+        else:
+            self._store_item(item)
+            for sink in self.sinks:
+                sink.write(subkey_name, key_name, values if sink.typed else values_dict)
+        if store and self.keep_entries:
+            self.entries.append(entry)
+        self.parsed_count += 1
+
+    def _store_item(self, item: tuple):
+        """Write one decoded entry and its IOC matches to the database."""
+        subkey_name, key_name, last_write, _, values_dict, store, matches = item
+        if store:
+            self._insert_entry(subkey_name, key_name, values_dict, last_write)
+        if matches and self.writer is not None:
+            self._store_ioc_matches(subkey_name, key_name, matches)
+
+    def _store_batch(self, batch: list):
+        for item in batch:
+            self._store_item(item)
+
+    @staticmethod
+    def _sink_batch(sink, batch: list):
+        for subkey_name, key_name, _, values, values_dict, _, _ in batch:
+            sink.write(subkey_name, key_name, values if sink.typed else values_dict)
+
+    def _start_pipeline(self) -> Optional[WriterPipeline]:
+        """Start one writer thread for the database and one per streaming sink."""
+        consumers = {}
+        if self.writer is not None:
+            consumers['sqlite'] = self._store_batch
+        for sink in self.sinks:
+            consumers[type(sink).__name__] = functools.partial(self._sink_batch, sink)
+        if not consumers:
+            return None
+        print(f"⚙️ Pipelined writes: {', '.join(consumers)} on writer threads, queue depth {self.queue_depth}")
+        logging.debug(f"Pipelined writes to {', '.join(consumers)} with queue depth {self.queue_depth}")
+        return WriterPipeline(consumers, self.queue_depth)
+
+    def _sweep_iocs(self, subkey_name: str, key_name: str, values: dict) -> list:
+        """Sweep one entry against the loaded IOCs, counting and logging each match."""
+        matches = self.ioc.match(subkey_name, key_name, values)
+        for ioc_type, indicator, field, value in matches:
+            self.ioc_matches[ioc_type] += 1
+            logging.warning(f"IOC match ({ioc_type} {indicator}) in {subkey_name}\\{key_name}: {field}={value}")
+        return matches
+
+    def _store_ioc_matches(self, subkey_name: str, key_name: str, matches: list):
+        """Queue an entry's IOC matches for the ioc_matches table."""
+        for ioc_type, indicator, field, value in matches:
+            self.writer.add("ioc_matches", """
+                INSERT OR REPLACE INTO ioc_matches
+                (entry_id, host, hive_sha256, subkey_name, ioc_type, indicator, field, value, ioc_source)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (key_name, self.host, self.hive_sha256, subkey_name, ioc_type, indicator, field, value,
+                  self.ioc.source))
+
+    def _selected(self, engine, subkey_name: str, subkeys: Optional[List[str]] = None) -> bool:
+        """Whether a root subkey is parsed: the given subkeys or --search-keys, else the engine's scope."""
+        if subkeys or self.search_keys:
+            return subkey_name in (subkeys or self.search_keys)
+        return engine.scope is None or subkey_name.startswith(engine.scope)
+
+    def _plan_shards(self, engine, root_subkeys, typed: bool, subkeys: Optional[List[str]] = None) -> list:
+        """Split the selected root subkeys into key ranges of at most DEFAULT_SHARD_SIZE keys."""
+        shards = []
+        for subkey_name, subkey in root_subkeys:
+            if not self._selected(engine, subkey_name, subkeys):
+                continue
+            count = engine.subkey_count(subkey)
+            shards.extend((subkey_name, start, min(start + DEFAULT_SHARD_SIZE, count), typed)
+                          for start in range(0, count, DEFAULT_SHARD_SIZE))
+            if count == 0:
+                shards.append((subkey_name, 0, 0, typed))
+        return shards
+
+    def iter_entries(self, subkeys: Optional[List[str]] = None, fields: Optional[List[str]] = None, typed: bool = False):
+        """Yield an AmcacheEntry per key of the selected root subkeys, in hive order.
+
+        subkeys defaults to --search-keys (or the engine's scope); fields limits the values kept
+        per entry; typed keeps native value types instead of strings. Nothing is retained, so
+        memory stays flat however large the hive is.
+        """
+        engine = open_engine(self.engine, self.handle)
+        yield from self._walk(engine, engine.root_subkeys(), typed, subkeys, tuple(fields) if fields else None)
+
+    def _walk(self, engine, root_subkeys, typed: bool, subkeys: Optional[List[str]] = None, fields: Optional[tuple] = None,
+              pbar=None, on_subkey=None, stored: Optional[dict] = None):
+        """Generate entries serially, or from a process pool for offline hives with --workers.
+
+        stored ({subkey: {entry_id: last write}}) lets pool workers leave unchanged keys undecoded.
+        """
+        if self.workers > 1 and not self.live:
+            yield from self._walk_parallel(engine, root_subkeys, typed, subkeys, fields, pbar, on_subkey, stored)
+            return
+        for subkey_name, subkey in root_subkeys:
+            if not self._selected(engine, subkey_name, subkeys):
+                continue
+            if on_subkey is not None:
+                on_subkey(subkey_name)
+            for key_name, key in engine.iter_keys(subkey):
+                yield AmcacheEntry(subkey_name, key_name, engine.last_write(key), source=(engine, key, typed, fields))
+                if pbar is not None:
+                    pbar.update(1)
+
+    def _walk_parallel(self, engine, root_subkeys, typed: bool, subkeys: Optional[List[str]], fields: Optional[tuple],
+                       pbar, on_subkey, stored: Optional[dict] = None):
+        """Decode key ranges in a process pool and yield their entries in shard order."""
+        from concurrent.futures import ProcessPoolExecutor
+        shards = self._plan_shards(engine, root_subkeys, typed, subkeys)
+        print(f"⚙️ Parsing {len(shards)} shards with {self.workers} workers")
+        logging.debug(f"Parsing {len(shards)} shards with {self.workers} workers")
+        started = time.perf_counter()
+        current_subkey = None
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_shard_worker,
+                                 initargs=(self.file_path, self.engine, stored)) as executor:
+            # Keep a bounded window of shards in flight and consume them in submission
+            # order, so output is deterministic and memory stays proportional to the window.
+            pending = deque()
+            shard_iter = iter(shards)
+            for shard in itertools.islice(shard_iter, self.workers * 2):
+                pending.append(executor.submit(_parse_shard, shard))
+            while pending:
+                subkey_name, rows = pending.popleft().result()
+                for shard in itertools.islice(shard_iter, 1):
+                    pending.append(executor.submit(_parse_shard, shard))
+                if subkey_name != current_subkey:
+                    current_subkey = subkey_name
+                    if on_subkey is not None:
+                        on_subkey(subkey_name)
+                for key_name, last_write, values in rows:
+                    yield AmcacheEntry(subkey_name, key_name, last_write, None if values is None else _project(values, fields))
+                if pbar is not None:
+                    pbar.update(len(rows))
+        elapsed = time.perf_counter() - started
+        print(f"✓ Parallel decode of {len(shards)} shards took {elapsed:.2f}s with {self.workers} workers")
+        logging.debug(f"Parallel decode of {len(shards)} shards took {elapsed:.2f}s with {self.workers} workers")
 
     def parse(self):
         """Parse the Amcache hive and store results."""
+        from tqdm import tqdm
         try:
-            r = Registry.Registry(self.handle)
-            root = r.open("Root")
-            root_subkeys = root.subkeys()
+            engine = open_engine(self.engine, self.handle)
+            root_subkeys = engine.root_subkeys()
+            # The subkeys to walk: all selected ones, or those a previous ingest of the hive left out.
+            walk_subkeys = self._hive_already_parsed([name for name, _ in root_subkeys if self._selected(engine, name)])
+            if walk_subkeys == []:
+                return
             total_subkeys = len(root_subkeys)
-            print(f"🔍 Found {total_subkeys} subkeys to parse")
-            logging.debug(f"Found {total_subkeys} subkeys to parse")
-
-            with tqdm(total=total_subkeys, desc="Parsing Subkeys", unit="subkey") as pbar:
-                for subkey in root_subkeys:
-                    subkey_name = subkey.name()
-                    if self.search_keys and subkey_name not in self.search_keys:
-                        pbar.update(1)
+            print(f"🔍 Found {total_subkeys} subkeys to parse ({engine.name} engine)")
+            logging.debug(f"Found {total_subkeys} subkeys to parse with the {engine.name} engine")
+            self._open_sinks()
+            typed_sinks = any(sink.typed for sink in self.sinks)
+
+            if self.workers > 1 and self.live:
+                print("⚠️ --workers applies to offline hives only; parsing live hive serially")
+                logging.warning("--workers ignored for live analysis")
+            on_subkey = self._create_table_for_subkey if self.writer is not None else None
+            walked = {subkey_name: 0 for subkey_name, _ in root_subkeys if self._selected(engine, subkey_name, walk_subkeys)}
+            total_entries = sum(engine.subkey_count(subkey) for subkey_name, subkey in root_subkeys if subkey_name in walked)
+            # Each output decides whether it needs keys stored unchanged; the database never does.
+            consumers = self._consumers_of_unchanged()
+            skip_unchanged = self.writer is not None and not consumers
+            self._sweep_unchanged = "IOC sweep" in consumers
+            if self.writer is not None and consumers:
+                logging.debug(f"Decoding unchanged keys for: {', '.join(consumers)}")
+            stored = None
+            if skip_unchanged and self.workers > 1 and not self.live:
+                stored = self._stored_entries(list(walked))
+            if self.pipeline:
+                self._pipeline = self._start_pipeline()
+            with tqdm(total=total_entries, desc="Parsing entries", unit="entry", disable=not self.show_progress) as pbar, \
+                    self.metrics.stage('walk'):
+                for entry in self._walk(engine, root_subkeys, typed_sinks, walk_subkeys, pbar=pbar, on_subkey=on_subkey,
+                                        stored=stored):
+                    self.metrics.count('keys_walked')
+                    walked[entry.subkey_name] += 1
+                    store = self._needs_store(entry.subkey_name, entry.entry_id, entry.last_write)
+                    if not store and skip_unchanged:
+                        # Unchanged since it was stored: skip without decoding its values.
+                        if not entry.decoded:
+                            self.skipped_decodes += 1
                         continue
-                    self._create_table_for_subkey(subkey_name)
-                    subkey_entries = subkey.subkeys()
-                    for key in subkey_entries:
-                        key_name = key.name()
-                        values_dict = {value.name(): str(value.value()) for value in key.values()}
-                        if not self._check_entry_exists(subkey_name, key_name):
-                            self._insert_entry(subkey_name, key_name, values_dict)
-                            self.entries.append({
-                                'subkey_name': subkey_name,
-                                'entry_id': key_name,
-                                'data': values_dict
-                            })
-                        pbar.update(1)
-
-            print(f"✓ Parsed {len(self.entries)} entries, {self.failed_parses} failed")
-            logging.debug(f"Parsed {len(self.entries)} entries, {self.failed_parses} failed")
+                    self._handle_entry(entry, typed_sinks, store)
+
+            if self._pipeline is not None:
+                with self.metrics.stage('pipeline_drain'):
+                    self._pipeline.close()
+            with self.metrics.stage('close_sinks'):
+                self._close_sinks()
+            if self.writer is not None:
+                covered = dict(self._covered, **walked)
+                self.writer.execute(
+                    "INSERT OR REPLACE INTO hives (host, hive_sha256, source_path, file_size, entries, ioc_sweep, subkeys) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.host, self.hive_sha256, os.path.abspath(self.source_path), self.handle.max_size,
+                     sum(covered.values()), self._ioc_sweep(), json.dumps(covered, sort_keys=True)))
+                with self.metrics.stage('db_flush'):
+                    self.writer.flush()
+                if self.build_indexes:
+                    with self.metrics.stage('indexes'), self.writer.lock:
+                        index_report = build_query_indexes(self.writer.conn)
+                    print(f"✓ {index_report}")
+                    logging.debug(index_report)
+                self.writer.close()
+                self.failed_parses += self.writer.failed_rows
+            new_entries = f" ({self.new_entries + self.changed_entries} new or changed in database)" if self.writer is not None else ""
+            print(f"✓ Parsed {self.parsed_count} entries{new_entries}, {self.failed_parses} failed")
+            logging.debug(f"Parsed {self.parsed_count} entries{new_entries}, {self.failed_parses} failed")
+            if self.writer is not None:
+                print(f"✓ Incremental: {self.new_entries} new, {self.changed_entries} changed, {self.unchanged_entries} unchanged "
+                      f"({self.skipped_decodes} keys skipped without decoding)")
+                logging.debug(f"Incremental: {self.new_entries} new, {self.changed_entries} changed, "
+                              f"{self.unchanged_entries} unchanged, {self.skipped_decodes} decodes skipped")
+            if self.ioc is not None:
+                matches = sum(self.ioc_matches.values())
+                table = " (ioc_matches table)" if self.writer is not None and matches else ""
+                print(f"{'⚠️' if matches else '✓'} IOC sweep: {matches} matches{table}, "
+                      f"{self.ioc_matches['sha1']} by SHA-1 and {self.ioc_matches['path']} by path")
+                logging.debug(f"IOC sweep: {self.ioc_matches['sha1']} SHA-1 and {self.ioc_matches['path']} path matches")
+            components = [self.writer, self.timestamps] if self.writer is not None else []
+            if self._pipeline is not None:
+                components.append(self._pipeline)
+            for component in components + self.sinks:
+                print(f"✓ {component.report()}")
+                logging.debug(component.report())
 
             if self.output_format == 'json':
-                self._save_to_json(self.db_path.replace('.db', '.json'))
-            elif self.output_format == 'csv':
-                self._save_to_csv(self.db_path.replace('.db', '.csv'))
+                with self.metrics.stage('json_export'):
+                    self._save_to_json(self.db_path.replace('.db', '.json'))
+            if self.compression is not None:
+                print(f"✓ {self.compression.report()}")
+                logging.debug(self.compression.report())
 
         except Exception as e:
             print(f"❌ Error parsing hive: {e}")
@@ -798,7 +3138,633 @@ class AmcacheParser:
             self.failed_parses += 1
             sys.exit(1)
         finally:
+            if self._pipeline is not None:
+                self._pipeline.close(abort=True)
+            self._close_sinks()
+            if self.compression is not None:
+                self.compression.close()
+            if self.writer is not None:
+                self.writer.close()
             self.handle.close()
+            if self.metrics_path:
+                write_metrics(self.metrics_path, self.metrics_report())
+
+    def metrics_report(self) -> dict:
+        """Stage timings and counters of this run, as written by --metrics-json."""
+        counters = {
+            'hive_bytes': self.handle.max_size,
+            'bytes_read': getattr(self.handle, 'bytes_read', 0),
+            'read_syscalls': getattr(self.handle, 'syscalls', 0),
+            'read_copies': getattr(self.handle, 'copies', 0),
+            'replayed_log_entries': getattr(self.handle, 'replayed_entries', 0),
+            'entries_new': self.new_entries,
+            'entries_changed': self.changed_entries,
+            'entries_unchanged': self.unchanged_entries,
+            'skipped_decodes': self.skipped_decodes,
+            'failed': self.failed_parses,
+        }
+        if self.writer is not None:
+            counters.update(rows_written=self.writer.rows_written, commits=self.writer.commits,
+                            failed_rows=self.writer.failed_rows, database_bytes=path_bytes(self.db_path))
+            self.metrics.stages['sqlite_write'] = self.writer.write_seconds
+        export_paths = [getattr(sink, 'output_path', None) or sink.output_dir for sink in self.sinks]
+        if self.output_format == 'json':
+            export_paths.append(self._output_path(self.db_path.replace('.db', '.json')))
+        counters['export_bytes'] = sum(path_bytes(path) for path in export_paths)
+        if self.ioc is not None:
+            counters.update(ioc_sha1_matches=self.ioc_matches['sha1'], ioc_path_matches=self.ioc_matches['path'])
+        self.metrics.counters.update(counters)
+        if self._pipeline is not None:
+            self.metrics.sections['pipeline'] = self._pipeline.stats()
+        if self.compression is not None:
+            self.metrics.sections['compression'] = self.compression.stats()
+        return self.metrics.as_dict(
+            hive=os.path.abspath(self.file_path), hive_sha256=self.hive_sha256, host=self.host, engine=self.engine,
+            output_format=self.output_format, workers=self.workers, skipped_hive=self.skipped_hive,
+            started=self.analysis_time.isoformat())
+
+# Triage collections often keep the Windows path under the host: HOST/C/Windows/AppCompat/Programs/Amcache.hve.
+_HIVE_DIRS = ['windows', 'appcompat', 'programs']
+_DRIVE_DIR = re.compile(r"^[a-z](:|%3a|\$)?$", re.IGNORECASE)
+
+def derive_host(hive_path: str) -> str:
+    """Derive a host label from a collected hive path (HOST.hve, HOST/Amcache.hve or HOST/C/Windows/AppCompat/Programs/Amcache.hve)."""
+    parts = [part for part in os.path.abspath(hive_path).split(os.sep) if part]
+    name = parts.pop() if parts else hive_path
+    if name.lower() != 'amcache.hve':
+        return os.path.splitext(name)[0]
+    if [part.lower() for part in parts[-3:]] == _HIVE_DIRS:
+        del parts[-3:]
+        if parts and _DRIVE_DIR.match(parts[-1]):
+            parts.pop()
+    return parts[-1] if parts else name
+
+def find_hives(pattern: str) -> List[str]:
+    """Expand a directory or glob pattern into a sorted list of hive files."""
+    if os.path.isdir(pattern):
+        found = []
+        for dirpath, _, filenames in os.walk(pattern):
+            found.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith('.hve'))
+    else:
+        import glob
+        found = [p for p in glob.glob(pattern, recursive=True) if os.path.isfile(p)]
+    return sorted(found)
+
+def _ingest_hive(job: dict) -> dict:
+    """Parse one hive into its own partition; runs in a batch worker process."""
+    result = {'index': job['index'], 'path': job['path'], 'host': job['host'], 'db_path': job['db_path'], 'ok': False}
+    started = time.perf_counter()
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            ap = AmcacheParser(job['path'], job['db_path'], job['output_format'], host=job['host'], show_progress=False,
+                               known_hives=job.get('known_hives'), build_indexes=False,
+                               source_path=job.get('source_path'), known_entries=job.get('known_entries'),
+                               known_ioc_sweep=job.get('known_ioc_sweep'), **job['options'])
+            ap.parse()
+        result.update(ok=True, entries=ap.parsed_count, failed=ap.failed_parses, hive_sha256=ap.hive_sha256,
+                      skipped=ap.skipped_hive, ioc_matches=sum(ap.ioc_matches.values()))
+        if job.get('metrics'):
+            result['metrics'] = ap.metrics_report()
+    except (Exception, SystemExit) as e:  # AmcacheParser reports fatal errors through sys.exit; Ctrl+C propagates
+        errors = [line for line in output.getvalue().splitlines() if line.startswith('❌')]
+        result['error'] = errors[-1].lstrip('❌ ') if errors else (str(e) or type(e).__name__)
+    result['seconds'] = time.perf_counter() - started
+    return result
+
+class BatchIngestor:
+    """Parses many hives in a bounded process pool and merges them into one multi-host database."""
+    def __init__(self, output_dir: str, output_format: str = 'sqlite', options: Optional[dict] = None,
+                 workers: Optional[int] = None, keep_partitions: bool = False, metrics_path: Optional[str] = None):
+        # options are the AmcacheParser keyword arguments every hive is parsed with (see parser_options()).
+        self.options = dict(options or {})
+        if self.options.get('ioc_path'):
+            self.options['ioc_path'] = os.path.abspath(self.options['ioc_path'])
+        self.output_dir = output_dir
+        self.metrics_path = metrics_path
+        self.metrics = ParseMetrics()
+        self.ioc_path = self.options.get('ioc_path')
+        self.db_path = os.path.join(output_dir, 'amcache.db')
+        self.partition_dir = os.path.join(output_dir, 'partitions')
+        self.output_format = output_format
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.use_database = self.options.get('use_database', True)
+        self.keep_partitions = keep_partitions or not self.use_database
+        self._job_index = 0
+
+    def make_job(self, hive_path: str, host: Optional[str] = None) -> dict:
+        """Describe one hive parse; each job writes to its own partition files."""
+        host = host or derive_host(hive_path)
+        safe_host = "".join(c if c.isalnum() or c in '-_.' else '_' for c in host)
+        job = {
+            'index': self._job_index,
+            'path': hive_path,
+            'host': host,
+            'db_path': os.path.join(self.partition_dir, f"{self._job_index:05d}_{safe_host}.db"),
+            'output_format': self.output_format,
+            'metrics': self.metrics_path is not None,
+            'options': self.options,
+        }
+        self._job_index += 1
+        return job
+
+    def merge_partition(self, conn: sqlite3.Connection, partition_db: str) -> int:
+        """Copy a partition database into the main database, writing only new or changed entries."""
+        conn.execute("ATTACH DATABASE ? AS part", (partition_db,))
+        copied = 0
+        try:
+            conn.execute("BEGIN")
+            tables = conn.execute("SELECT name, sql FROM part.sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'").fetchall()
+            for name, sql in tables:
+                if conn.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?", (name,)).fetchone() is None:
+                    conn.execute(sql)
+                main_columns = {row[1] for row in conn.execute(f"PRAGMA main.table_info({name})")}
+                for row in conn.execute(f"PRAGMA part.table_info({name})").fetchall():
+                    if row[1] not in main_columns and not row[5]:
+                        conn.execute(f"ALTER TABLE main.{name} ADD COLUMN {row[1]} {row[2]}")
+                        main_columns.add(row[1])
+                columns = ", ".join(row[1] for row in conn.execute(f"PRAGMA part.table_info({name})") if row[1] in main_columns)
+                if name == 'subkeys':
+                    conn.execute(f"INSERT OR IGNORE INTO main.{name} ({columns}) SELECT {columns} FROM part.{name}")
+                elif name in ('hives', 'ioc_matches'):
+                    conn.execute(f"INSERT OR REPLACE INTO main.{name} ({columns}) SELECT {columns} FROM part.{name}")
+                else:
+                    # Upsert only entries whose key was written since the stored copy.
+                    cursor = conn.execute(f"""
+                        INSERT OR REPLACE INTO main.{name} ({columns})
+                        SELECT {columns} FROM part.{name} AS p
+                        WHERE NOT EXISTS (
+                            SELECT 1 FROM main.{name} AS m
+                            WHERE m.host = p.host AND m.entry_id = p.entry_id AND m.key_last_write IS p.key_last_write
+                        )
+                    """)
+                    copied += max(cursor.rowcount, 0)
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.execute("DETACH DATABASE part")
+        return copied
+
+    def _finish(self, conn: Optional[sqlite3.Connection], result: dict):
+        """Merge a successful partition into the main database and drop it if no longer needed."""
+        if not result['ok'] or conn is None:
+            return
+        if not result.get('skipped'):
+            with self.metrics.stage('merge'):
+                result['merged'] = self.merge_partition(conn, result['db_path'])
+        if not self.keep_partitions or result.get('skipped'):
+            os.remove(result['db_path'])
+
+    def known_hives(self, conn: sqlite3.Connection) -> dict:
+        """Fingerprints already ingested into the main database with their {subkey: entries}, by host."""
+        known = {}
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(hives)")}
+        if columns:
+            # Databases from before subkeys were recorded: treat no subkey as ingested.
+            subkeys = "subkeys" if "subkeys" in columns else "NULL"
+            for host, hive_sha256, covered in conn.execute(f"SELECT host, hive_sha256, {subkeys} FROM hives"):
+                known.setdefault(host, {})[hive_sha256] = json.loads(covered) if covered else {}
+        return known
+
+    def host_entries(self, conn: sqlite3.Connection, host: str) -> dict:
+        """{table: {entry_id: key last write}} the main database holds for a host."""
+        entries = {}
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'subkeys'").fetchone() is None:
+            return entries
+        for (subkey_name,) in conn.execute("SELECT subkey_name FROM subkeys").fetchall():
+            table = table_name(subkey_name)
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone():
+                stored = stored_entries(conn, table, host)
+                if stored:
+                    entries[table] = stored
+        return entries
+
+    def last_ioc_sweep(self, conn: sqlite3.Connection, host: str) -> Optional[str]:
+        """The IOC sweep recorded with the latest ingest of a host, if any."""
+        try:
+            row = conn.execute("SELECT ioc_sweep FROM hives WHERE host = ? ORDER BY rowid DESC LIMIT 1", (host,)).fetchone()
+        except sqlite3.OperationalError:  # no hives table yet, or one from before IOC sweeps were recorded
+            return None
+        return row[0] if row else None
+
+    def with_baseline(self, conn: Optional[sqlite3.Connection], job: dict) -> dict:
+        """The job plus what the main database holds for its host, so the worker decodes only changed keys.
+
+        Read just before the job is submitted; it is only valid if no other job of the host merges first.
+        """
+        if conn is None or self.output_format in STREAMING_OUTPUT_FORMATS:
+            return job
+        return dict(job, known_entries=self.host_entries(conn, job['host']),
+                    known_ioc_sweep=self.last_ioc_sweep(conn, job['host']))
+
+    def run(self, jobs: List[dict]) -> List[dict]:
+        """Parse all jobs in parallel, merging partitions in job order as they complete."""
+        from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+        from tqdm import tqdm
+        os.makedirs(self.partition_dir, exist_ok=True)
+        conn = enable_fts_sync(sqlite3.connect(self.db_path, isolation_level=None)) if self.use_database else None
+        if conn is not None and self.output_format not in STREAMING_OUTPUT_FORMATS:
+            known = self.known_hives(conn)
+            for job in jobs:
+                job['known_hives'] = known.get(job['host'], {})
+        print(f"📦 Batch ingest of {len(jobs)} hives with {self.workers} workers into {self.output_dir}")
+        logging.debug(f"Batch ingest of {len(jobs)} hives with {self.workers} workers into {self.output_dir}")
+        started = time.perf_counter()
+        results = []
+        done = {}
+        next_index = jobs[0]['index'] if jobs else 0
+        # A host collected more than once merges several partitions, so its baseline would go stale.
+        repeated = {host for host, count in Counter(job['host'] for job in jobs).items() if count > 1}
+        for host in sorted(repeated):
+            paths = [job['path'] for job in jobs if job['host'] == host]
+            print(f"⚠️ {len(paths)} hives map to host {host}; later ones overwrite the same entries: {', '.join(paths)}")
+            logging.warning(f"{len(paths)} hives map to host {host}: {', '.join(paths)}")
+        queued = deque(jobs)
+        in_flight = set()
+        try:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor, \
+                    tqdm(total=len(jobs), desc="Ingesting Hives", unit="hive") as pbar:
+                while queued or in_flight:
+                    # Submit a bounded window so each baseline is read from the database just before its job runs.
+                    while queued and len(in_flight) < self.workers * 2:
+                        job = queued.popleft()
+                        if job['host'] not in repeated:
+                            job = self.with_baseline(conn, job)
+                        in_flight.add(executor.submit(_ingest_hive, job))
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for result in (future.result() for future in finished):
+                        self._record(result, results, pbar)
+                        # Merge in job order so duplicate keys across hives resolve deterministically.
+                        done[result['index']] = result
+                        while next_index in done:
+                            self._finish(conn, done.pop(next_index))
+                            next_index += 1
+            if conn is not None:
+                with self.metrics.stage('indexes'):
+                    index_report = build_query_indexes(conn)
+                print(f"✓ {index_report}")
+                logging.debug(index_report)
+        finally:
+            if conn is not None:
+                conn.close()
+        if not self.keep_partitions:
+            # Fails while per-hive streaming outputs (jsonl, csv, ...) are in it; those are reported below.
+            with contextlib.suppress(OSError):
+                os.rmdir(self.partition_dir)
+        self._summarize(results, time.perf_counter() - started)
+        kept = sorted(os.listdir(self.partition_dir)) if os.path.isdir(self.partition_dir) else []
+        if kept:
+            print(f"✓ Kept {len(kept)} per-hive files in {self.partition_dir}")
+            logging.debug(f"Kept {len(kept)} per-hive files in {self.partition_dir}: {', '.join(kept)}")
+        if self.metrics_path:
+            ok = [r for r in results if r['ok']]
+            self.metrics.counters.update(hives=len(results), hives_failed=len(results) - len(ok),
+                                         entries=sum(r['entries'] for r in ok), rows_merged=sum(r.get('merged', 0) for r in ok))
+            write_metrics(self.metrics_path, {
+                'batch': self.metrics.as_dict(output_dir=os.path.abspath(self.output_dir), workers=self.workers),
+                'hives': [r['metrics'] for r in sorted(ok, key=lambda r: r['index']) if 'metrics' in r],
+            })
+        return results
+
+    def _record(self, result: dict, results: List[dict], pbar):
+        results.append(result)
+        if result.get('skipped'):
+            pbar.write(f"✓ {result['host']}: unchanged since the last ingest, skipped ({result['path']})")
+            logging.debug(f"Batch skipped unchanged hive {result['path']}")
+        elif result['ok']:
+            pbar.write(f"✓ {result['host']}: {result['entries']} entries in {result['seconds']:.2f}s ({result['path']})")
+            logging.debug(f"Batch parsed {result['path']} as {result['host']}: {result['entries']} entries")
+        else:
+            pbar.write(f"❌ {result['host']}: {result['error']} ({result['path']})")
+            logging.error(f"Batch failed for {result['path']}: {result['error']}")
+        pbar.update(1)
+
+    def _summarize(self, results: List[dict], elapsed: float):
+        ok = [r for r in results if r['ok']]
+        failed = [r for r in results if not r['ok']]
+        entries = sum(r['entries'] for r in ok)
+        print(f"✓ Batch complete: {len(ok)}/{len(results)} hives, {entries} entries in {elapsed:.2f}s "
+              f"({entries / max(elapsed, 1e-9):.0f} entries/sec)")
+        logging.debug(f"Batch complete: {len(ok)}/{len(results)} hives, {entries} entries in {elapsed:.2f}s")
+        skipped = sum(1 for r in ok if r.get('skipped'))
+        if skipped:
+            print(f"✓ Skipped {skipped} unchanged hives")
+        if self.ioc_path:
+            matches = sum(r.get('ioc_matches', 0) for r in ok)
+            hosts = sorted({r['host'] for r in ok if r.get('ioc_matches')})
+            print(f"{'⚠️' if matches else '✓'} IOC sweep: {matches} matches across {len(hosts)} hosts"
+                  + (f" ({', '.join(hosts)})" if hosts else ""))
+        if self.use_database:
+            merged = sum(r.get('merged', 0) for r in ok)
+            print(f"✓ Merged database: {self.db_path} ({merged} new or changed rows)")
+        if failed:
+            print(f"❌ {len(failed)} hives failed:")
+            for r in sorted(failed, key=lambda r: r['index']):
+                print(f"   - {r['path']}: {r['error']}")
+
+def _warm_worker() -> int:
+    """Import the hive parser in a fresh pool worker so the first real job does not pay for it."""
+    from Registry import Registry  # noqa: F401
+    return os.getpid()
+
+class HiveWatcher:
+    """--watch daemon: ingests hives dropped into a directory with a warm worker pool and one long-lived database connection.
+
+    A hive is claimed only once its size and mtime (and those of its .LOG1/.LOG2) have been stable for
+    settle_seconds, by renaming it into .processing/, so half-copied files are never parsed. Failed hives
+    are retried with exponential backoff and moved to .quarantine/ after max_attempts; ingested hives
+    are moved to .processed/. Progress is written to a JSON status file on every poll.
+    """
+    def __init__(self, watch_dir: str, ingestor: BatchIngestor, poll_interval: float = DEFAULT_WATCH_INTERVAL,
+                 settle_seconds: float = DEFAULT_WATCH_SETTLE, max_attempts: int = DEFAULT_WATCH_RETRIES,
+                 backoff: float = DEFAULT_WATCH_BACKOFF, status_path: Optional[str] = None):
+        self.watch_dir = os.path.abspath(watch_dir)
+        self.ingestor = ingestor
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.status_path = status_path or os.path.join(ingestor.output_dir, 'amcache_watch_status.json')
+        self.processing_dir = os.path.join(self.watch_dir, '.processing')
+        self.processed_dir = os.path.join(self.watch_dir, '.processed')
+        self.quarantine_dir = os.path.join(self.watch_dir, '.quarantine')
+        self.totals = dict(ingested=0, skipped=0, failed_attempts=0, quarantined=0, entries=0, rows_merged=0)
+        self._seen = {}          # path -> (signature, stable since)
+        self._queue = deque()    # claimed hives waiting for a worker: (claim dir, hive path, attempts)
+        self._retries = []       # (due, claim dir, hive path, attempts)
+        self._in_flight = {}     # future -> (job, claim dir, attempts)
+        self._finished = {}      # job index -> (job, claim dir, attempts, result), merged in claim order
+        self._next_index = None
+        self._recent = deque()   # (finished at, entries) within the rate window
+        self._errors = deque(maxlen=20)
+        self._claims = 0
+        self._hosts = {}         # host -> the source path it was last derived from
+        self._stop = False
+        self._started = time.time()
+        self._merged_since_index = 0
+        self._indexed_at = time.monotonic()
+        self._executor = None
+        self._conn = None
+
+    def stop(self, *_):
+        self._stop = True
+
+    def _signature(self, path: str):
+        paths = [path] + find_hive_logs(path)
+        return tuple((os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in paths)
+
+    def scan(self) -> List[str]:
+        """Hives in the watch directory whose files have not changed for settle_seconds."""
+        now = time.monotonic()
+        ready, present = [], set()
+        for dirpath, dirnames, filenames in os.walk(self.watch_dir):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            for name in sorted(filenames):
+                if not name.lower().endswith('.hve'):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    signature = self._signature(path)
+                except OSError:
+                    continue
+                present.add(path)
+                previous = self._seen.get(path)
+                if previous is None or previous[0] != signature or not signature[0][0]:
+                    self._seen[path] = (signature, now)
+                elif now - previous[1] >= self.settle_seconds:
+                    ready.append(path)
+        for path in set(self._seen) - present:
+            del self._seen[path]
+        return ready
+
+    def claim(self, path: str) -> Optional[tuple]:
+        """Atomically move a stable hive and its logs into its own .processing/ directory."""
+        host = derive_host(path)
+        self._claims += 1
+        claim_dir = os.path.join(self.processing_dir, f"{datetime.now().strftime('%Y%m%dT%H%M%S')}_{self._claims:06d}")
+        target = os.path.join(claim_dir, f"{host}.hve")
+        os.makedirs(claim_dir)
+        logs = find_hive_logs(path)
+        try:
+            os.rename(path, target)
+        except OSError as e:
+            # Still open for writing on Windows, or gone: leave it for a later poll.
+            os.rmdir(claim_dir)
+            self._seen.pop(path, None)
+            logging.debug(f"Could not claim {path} yet: {e}")
+            return None
+        self._seen.pop(path, None)
+        for log in logs:
+            try:
+                os.rename(log, target + log[len(path):])
+            except OSError as e:
+                logging.warning(f"Could not move transaction log {log} with its hive: {e}")
+        with open(os.path.join(claim_dir, 'source.txt'), 'w') as f:
+            f.write(path)
+        if self._hosts.get(host, path) != path:
+            print(f"⚠️ {path} maps to host {host} like {self._hosts[host]}; their entries are merged as one host")
+            logging.warning(f"{path} and {self._hosts[host]} both map to host {host}")
+        self._hosts[host] = path
+        print(f"📦 Claimed {path} as host {host}")
+        logging.debug(f"Claimed {path} into {claim_dir} as host {host}")
+        return claim_dir, target
+
+    def _recover(self):
+        """Requeue hives claimed by a previous run that did not finish them."""
+        if not os.path.isdir(self.processing_dir):
+            return
+        for name in sorted(os.listdir(self.processing_dir)):
+            claim_dir = os.path.join(self.processing_dir, name)
+            hives = [f for f in os.listdir(claim_dir) if f.lower().endswith('.hve')] if os.path.isdir(claim_dir) else []
+            if hives:
+                self._queue.append((claim_dir, os.path.join(claim_dir, hives[0]), 0))
+                print(f"⚙️ Requeued unfinished hive {os.path.join(claim_dir, hives[0])}")
+                logging.debug(f"Requeued unfinished hive in {claim_dir}")
+
+    def _submit(self, claim_dir: str, hive_path: str, attempts: int):
+        job = self.ingestor.make_job(hive_path, derive_host(hive_path))
+        with contextlib.suppress(OSError), open(os.path.join(claim_dir, 'source.txt')) as f:
+            job['source_path'] = f.read()
+        if self._conn is not None and self.ingestor.output_format not in STREAMING_OUTPUT_FORMATS:
+            job['known_hives'] = self.ingestor.known_hives(self._conn).get(job['host'], {})
+            # Another collection of the host still to merge would make the baseline stale.
+            pending = [entry[0]['host'] for entry in itertools.chain(self._in_flight.values(), self._finished.values())]
+            if job['host'] not in pending:
+                job = self.ingestor.with_baseline(self._conn, job)
+        if self._next_index is None:
+            self._next_index = job['index']
+        self._in_flight[self._executor.submit(_ingest_hive, job)] = (job, claim_dir, attempts)
+
+    def _collect(self, future):
+        job, claim_dir, attempts = self._in_flight.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:  # a worker died (BrokenProcessPool); the pool is rebuilt below
+            result = {'index': job['index'], 'path': job['path'], 'host': job['host'], 'db_path': job['db_path'],
+                      'ok': False, 'error': f"worker failed: {e}", 'seconds': 0.0}
+        self._finished[job['index']] = (job, claim_dir, attempts, result)
+        # Merge in claim order so a later collection of the same host always wins.
+        while self._next_index in self._finished:
+            self._complete(*self._finished.pop(self._next_index))
+            self._next_index += 1
+
+    def _complete(self, job: dict, claim_dir: str, attempts: int, result: dict):
+        if result['ok']:
+            try:
+                self.ingestor._finish(self._conn, result)
+            except sqlite3.Error as e:
+                result.update(ok=False, error=f"merge failed: {e}")
+        if result['ok']:
+            self.totals['skipped' if result.get('skipped') else 'ingested'] += 1
+            self.totals['entries'] += result['entries']
+            self.totals['rows_merged'] += result.get('merged', 0)
+            self._merged_since_index += result.get('merged', 0)
+            self._recent.append((time.monotonic(), result['entries']))
+            self._move(claim_dir, self.processed_dir)
+            state = 'unchanged since the last ingest, skipped' if result.get('skipped') else f"{result['entries']} entries in {result['seconds']:.2f}s"
+            print(f"✓ {result['host']}: {state}")
+            logging.debug(f"Watch ingested {job['path']} as {result['host']}: {state}")
+            if result.get('ioc_matches'):
+                self.totals['ioc_matches'] = self.totals.get('ioc_matches', 0) + result['ioc_matches']
+                print(f"⚠️ IOC sweep: {result['ioc_matches']} matches on {result['host']}")
+            return
+        with contextlib.suppress(OSError):
+            os.remove(result['db_path'])
+        attempts += 1
+        self.totals['failed_attempts'] += 1
+        self._errors.append({'path': job['path'], 'host': job['host'], 'error': result['error'], 'attempt': attempts,
+                             'at': datetime.now(tz=timezone.utc).isoformat()})
+        if attempts < self.max_attempts:
+            delay = self.backoff * 2 ** (attempts - 1)
+            self._retries.append((time.monotonic() + delay, claim_dir, job['path'], attempts))
+            print(f"⚠️ {result['host']}: {result['error']}; retry {attempts}/{self.max_attempts - 1} in {delay:.0f}s")
+            logging.warning(f"Watch failed on {job['path']} (attempt {attempts}): {result['error']}; retrying in {delay:.0f}s")
+            return
+        self.totals['quarantined'] += 1
+        target = self._move(claim_dir, self.quarantine_dir)
+        with contextlib.suppress(OSError), open(os.path.join(target, 'error.txt'), 'w') as f:
+            f.write(f"{job['path']}\n{attempts} attempts, last error: {result['error']}\n")
+        print(f"❌ {result['host']}: {result['error']}; quarantined after {attempts} attempts in {target}")
+        logging.error(f"Watch quarantined {job['path']} after {attempts} attempts: {result['error']}")
+
+    def _move(self, claim_dir: str, destination: str) -> str:
+        os.makedirs(destination, exist_ok=True)
+        target = os.path.join(destination, os.path.basename(claim_dir))
+        try:
+            os.rename(claim_dir, target)
+        except OSError as e:
+            logging.error(f"Could not move {claim_dir} to {destination}: {e}")
+            return claim_dir
+        return target
+
+    def _maybe_index(self, idle: bool):
+        """Rebuild query indexes once the queue is idle, or periodically under continuous load."""
+        if self._conn is None or not self._merged_since_index:
+            return
+        if not idle and time.monotonic() - self._indexed_at < WATCH_INDEX_INTERVAL:
+            return
+        report = build_query_indexes(self._conn)
+        self._merged_since_index = 0
+        self._indexed_at = time.monotonic()
+        print(f"✓ {report}")
+        logging.debug(report)
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        while self._recent and now - self._recent[0][0] > WATCH_RATE_WINDOW:
+            self._recent.popleft()
+        window = min(WATCH_RATE_WINDOW, max(time.time() - self._started, 1e-9))
+        return {
+            'state': 'stopping' if self._stop else 'running',
+            'pid': os.getpid(),
+            'watch_dir': self.watch_dir,
+            'database': self.ingestor.db_path if self.ingestor.use_database else None,
+            'workers': self.ingestor.workers,
+            'started': datetime.fromtimestamp(self._started, tz=timezone.utc).isoformat(),
+            'updated': datetime.now(tz=timezone.utc).isoformat(),
+            'queue': {'settling': len(self._seen), 'waiting': len(self._queue), 'in_flight': len(self._in_flight),
+                      'awaiting_merge': len(self._finished), 'retry_scheduled': len(self._retries)},
+            'queue_length': len(self._seen) + len(self._queue) + len(self._in_flight) + len(self._retries),
+            'totals': dict(self.totals),
+            'rate': {'window_seconds': round(window),
+                     'hives_per_minute': round(len(self._recent) * 60 / window, 2),
+                     'entries_per_second': round(sum(entries for _, entries in self._recent) / window, 1)},
+            'recent_errors': list(self._errors),
+        }
+
+    def write_status(self, state: Optional[str] = None):
+        status = self.status()
+        if state:
+            status['state'] = state
+        temp_path = self.status_path + '.tmp'
+        try:
+            with open(temp_path, 'w') as f:
+                json.dump(status, f, indent=2)
+            os.replace(temp_path, self.status_path)
+        except OSError as e:
+            logging.error(f"Failed to write watch status to {self.status_path}: {e}")
+
+    def _start_pool(self):
+        from concurrent.futures import ProcessPoolExecutor
+        self._executor = ProcessPoolExecutor(max_workers=self.ingestor.workers)
+        for future in [self._executor.submit(_warm_worker) for _ in range(self.ingestor.workers)]:
+            future.result()
+
+    def poll(self):
+        """One round of the daemon: claim settled hives, submit queued ones, collect finished ones and write the status."""
+        from concurrent.futures import FIRST_COMPLETED, wait
+        capacity = self.ingestor.workers * 2 - len(self._queue) - len(self._in_flight)
+        if not self._stop:
+            for path in self.scan()[:max(0, capacity)]:
+                claimed = self.claim(path)
+                if claimed is not None:
+                    self._queue.append(claimed + (0,))
+        now = time.monotonic()
+        self._queue.extend(entry[1:] for entry in self._retries if entry[0] <= now)
+        self._retries = [entry for entry in self._retries if entry[0] > now]
+        while self._queue and len(self._in_flight) < self.ingestor.workers and not self._stop:
+            self._submit(*self._queue.popleft())
+        if self._in_flight:
+            done, _ = wait(list(self._in_flight), timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._collect(future)
+            if any(future.exception() is not None for future in done if not future.cancelled()):
+                self._executor.shutdown(cancel_futures=True)
+                self._start_pool()
+        else:
+            time.sleep(self.poll_interval)
+        self._maybe_index(idle=not (self._queue or self._in_flight))
+        self.write_status()
+
+    def run(self):
+        """Poll the watch directory until stopped (Ctrl+C or SIGTERM), then finish the hives in flight."""
+        import signal
+        os.makedirs(self.ingestor.partition_dir, exist_ok=True)
+        with contextlib.suppress(ValueError, AttributeError):
+            signal.signal(signal.SIGTERM, self.stop)
+        self._conn = enable_fts_sync(sqlite3.connect(self.ingestor.db_path, isolation_level=None)) if self.ingestor.use_database else None
+        self._start_pool()
+        print(f"👀 Watching {self.watch_dir} with {self.ingestor.workers} warm workers; status in {self.status_path}")
+        logging.debug(f"Watching {self.watch_dir} with {self.ingestor.workers} workers")
+        self._recover()
+        try:
+            while not (self._stop and not self._in_flight):
+                try:
+                    self.poll()
+                except KeyboardInterrupt:
+                    print("⚠️ Stopping: finishing the hives in flight (Ctrl+C again to abort)")
+                    self.stop()
+        finally:
+            self._executor.shutdown(cancel_futures=True)
+            self._maybe_index(idle=True)
+            if self._conn is not None:
+                self._conn.close()
+            self.write_status('stopped')
+        print(f"✓ Watch stopped: {self.totals['ingested']} hives ingested, {self.totals['skipped']} unchanged, "
+              f"{self.totals['quarantined']} quarantined, {self.totals['entries']} entries")
+        logging.debug(f"Watch stopped: {self.totals}")
 
 def interactive_menu():
     """Display interactive menu for user input."""
@@ -806,22 +3772,597 @@ def interactive_menu():
     print("Welcome to AmcacheParser")
     print("1. Live Analysis (requires admin privileges)")
     print("2. Offline Analysis")
-    print("3. Select Output Format (SQLite, JSON, CSV)")
+    print("3. Select Output Format (SQLite, JSON, JSONL, CSV)")
     print("4. Exit")
     choice = input("Select an option (1-4): ").strip()
     return choice
 
+def run_export(args, db_path: str, output_format: str):
+    """Export-only mode: stream a query or filter over an existing database to a file, without parsing a hive."""
+    if output_format == 'sqlite':
+        output_format = 'jsonl'
+    if output_format not in EXPORT_FORMATS:
+        print(f"❌ Exports are written as {', '.join(EXPORT_FORMATS)}, not {output_format}")
+        logging.error(f"Unsupported export format: {output_format}")
+        sys.exit(1)
+    if not os.path.exists(db_path):
+        print(f"❌ Database does not exist: {db_path}")
+        logging.error(f"Export database does not exist: {db_path}")
+        sys.exit(1)
+    output_path = args.export_path or os.path.join(os.path.dirname(db_path) or '.', f"amcache_export.{output_format}")
+    compression = None
+    if args.compress and output_format in TEXT_OUTPUT_FORMATS:
+        compression = OutputCompression(args.compress, args.compress_threads)
+    elif args.compress:
+        print(f"⚠️ --compress applies to jsonl and csv exports; {output_format} is written uncompressed")
+        logging.warning(f"--compress ignored for export format {output_format}")
+    metrics = ParseMetrics()
+    started = time.perf_counter()
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        conn.execute("PRAGMA query_only = ON")
+        if args.export_query:
+            sql, params = args.export_query, ()
+        else:
+            sql, params = build_export_filter(conn, args.export_table, args.export_filter)
+        logging.debug(f"Export query: {sql} {params}")
+        with metrics.stage('export'):
+            rows = export_query(conn, sql, params, output_format, output_path, args.array_size, args.row_group_size,
+                                compression)
+    except ImportError:
+        print(f"❌ pyarrow is required for --output {output_format}: pip install pyarrow")
+        logging.error(f"pyarrow not installed for export format {output_format}")
+        sys.exit(1)
+    except (sqlite3.Error, ValueError, OSError) as e:
+        print(f"❌ Export failed: {e}")
+        logging.error(f"Export failed: {e}")
+        sys.exit(1)
+    finally:
+        conn.close()
+        if compression is not None:
+            compression.close()
+    elapsed = time.perf_counter() - started
+    if compression is not None:
+        output_path = compression.path(output_path)
+    print(f"✓ Exported {rows} rows to {output_path} in {elapsed:.2f}s ({rows / max(elapsed, 1e-9):.0f} rows/sec)")
+    logging.debug(f"Exported {rows} rows to {output_path} in {elapsed:.2f}s")
+    if compression is not None:
+        print(f"✓ {compression.report()}")
+        logging.debug(compression.report())
+        metrics.sections['compression'] = compression.stats()
+    if args.metrics_json:
+        metrics.counters.update(rows_exported=rows, export_bytes=path_bytes(output_path), array_size=args.array_size)
+        write_metrics(args.metrics_json, metrics.as_dict(database=os.path.abspath(db_path), query=sql,
+                                                         output_format=output_format))
+
+def ensure_wal(db_path: str) -> str:
+    """Switch a database to WAL so readers never block the ingest writer; returns the journal mode in use."""
+    conn = sqlite3.connect(db_path)
+    mode = 'unknown'
+    try:
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if mode != 'wal':
+            mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    except sqlite3.OperationalError as e:
+        logging.warning(f"Cannot switch {db_path} to WAL: {e}")
+    finally:
+        conn.close()
+    return mode
+
+class ReadOnlyPool:
+    """A fixed set of read-only SQLite connections shared by the serve threads."""
+    def __init__(self, db_path: str, size: int = DEFAULT_SERVE_POOL):
+        self.db_path = os.path.abspath(db_path)
+        self.size = max(1, size)
+        self.waits = 0
+        import queue
+        self._idle = queue.Queue()
+        self._empty = queue.Empty
+        for _ in range(self.size):
+            conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute("PRAGMA query_only = ON")
+            conn.execute("PRAGMA mmap_size = 268435456")
+            self._idle.put(conn)
+
+    @contextlib.contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except self._empty:
+            self.waits += 1
+            conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        for _ in range(self.size):
+            self._idle.get().close()
+
+class ResultCache:
+    """LRU of encoded query responses, dropped as a whole when the set of ingested hives changes."""
+    def __init__(self, max_entries: int = DEFAULT_SERVE_CACHE):
+        self.max_entries = max_entries
+        self.hits = self.misses = self.invalidations = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+
+    def validate(self, version) -> bool:
+        """Record the database version; clear the cache and return True if it changed."""
+        with self._lock:
+            if version == self._version:
+                return False
+            if self._version is not None:
+                self.invalidations += 1
+                self._entries.clear()
+            self.generation += 1
+            self._version = version
+            return True
+
+    def get(self, key) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body: bytes, generation: int):
+        """Cache a response computed while the cache was at generation; results read before an invalidation are dropped."""
+        if self.max_entries <= 0 or len(body) > SERVE_CACHE_MAX_BODY:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {'entries': len(self._entries), 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hits / max(self.hits + self.misses, 1), 3), 'invalidations': self.invalidations}
+
+def _encode_cursor(values: list) -> str:
+    return json.dumps(values, separators=(',', ':')).encode('utf-8').hex()
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(bytes.fromhex(cursor))
+    except ValueError:
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list) or not values or not isinstance(values[0], int):
+        raise ValueError("Malformed cursor")
+    return values
+
+def _page_limit(value: Optional[str], default: int) -> int:
+    """Rows per page from the limit parameter, clamped to MAX_PAGE_SIZE."""
+    if value is None:
+        return default
+    digits = value.strip().lstrip('0')
+    if not (digits.isascii() and digits.isdigit()):
+        raise ValueError("limit must be a positive integer")
+    # Compare lengths first so a huge value is clamped without converting it.
+    return MAX_PAGE_SIZE if len(digits) > len(str(MAX_PAGE_SIZE)) else min(int(digits), MAX_PAGE_SIZE)
+
+def _time_bound(value: str, now: float) -> int:
+    """Epoch seconds, a relative time such as -7d, or an ISO 8601 date/time (UTC unless it has an offset)."""
+    relative = _RELATIVE_TIME.match(value)
+    if relative:
+        return int(now) - int(relative.group(1)) * _RELATIVE_UNITS[relative.group(2)]
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid time {value!r}: use epoch seconds, -7d style or ISO 8601")
+    return int((moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp())
+
+class QueryService:
+    """Lookups over a parsed database for --serve: by hash, path prefix, ProgramId and timeline range.
+
+    Each lookup is a list of sources (table, SELECT, parameters, order columns) read in order with
+    keyset pagination, so every page is an index range scan however deep the client pages.
+    """
+    ROUTES = ('hash', 'path', 'program', 'timeline')
+
+    def __init__(self, db_path: str, pool_size: int = DEFAULT_SERVE_POOL, cache_size: int = DEFAULT_SERVE_CACHE,
+                 page_size: int = DEFAULT_PAGE_SIZE, array_size: int = DEFAULT_EXPORT_ARRAY_SIZE):
+        self.db_path = os.path.abspath(db_path)
+        self.journal_mode = ensure_wal(self.db_path)
+        self.pool = ReadOnlyPool(self.db_path, pool_size)
+        self.cache = ResultCache(cache_size)
+        self.page_size = min(max(1, page_size), MAX_PAGE_SIZE)
+        self.array_size = array_size
+        self.requests = dict.fromkeys(self.ROUTES + ('stats', 'index'), 0)
+        self.errors = 0
+        self.rows_streamed = 0
+        self._columns = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._counters_lock = threading.Lock()
+
+    def count(self, route: str, rows: int = 0):
+        """Count a request to a route and the rows it streamed; handler threads call this concurrently."""
+        with self._counters_lock:
+            if route in self.requests:
+                self.requests[route] += 1
+            self.rows_streamed += rows
+
+    def count_error(self):
+        with self._counters_lock:
+            self.errors += 1
+
+    def _version(self, conn: sqlite3.Connection):
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'hives'").fetchone() is None:
+            return tuple(os.stat(path).st_mtime_ns if os.path.exists(path) else 0
+                         for path in (self.db_path, self.db_path + '-wal'))
+        return conn.execute("SELECT COUNT(*), MAX(parsed_timestamp), TOTAL(entries) FROM hives").fetchone() + \
+            conn.execute("PRAGMA schema_version").fetchone()
+
+    def refresh(self):
+        """Drop cached results and table layouts once new hives have been ingested (checked at most once a second)."""
+        now = time.monotonic()
+        if now - self._checked_at < SERVE_VERSION_CHECK:
+            return
+        self._checked_at = now
+        with self.pool.connection() as conn:
+            self._refresh(conn)
+
+    def _refresh(self, conn: sqlite3.Connection):
+        if self.cache.validate(self._version(conn)):
+            with self._lock:
+                self._columns = {
+                    name: {row[1] for row in conn.execute(f"PRAGMA table_info({name})")}
+                    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+                    if name.isidentifier() and not name.endswith(('_fts', '_config', '_data', '_docsize', '_idx', '_pending'))
+                }
+
+    def _has(self, table: str, *columns: str) -> bool:
+        return table in self._columns and set(columns) <= self._columns[table]
+
+    def _sources(self, route: str, arg: str, params: dict) -> list:
+        """Turn a request into [(table, SELECT, parameters, order columns)]; raises ValueError or LookupError."""
+        host = params.get('host')
+        host_sql = " AND host = ?" if host is not None else ""
+        host_args = [host] if host is not None else []
+        sources = []
+        if route == 'hash':
+            digest = SHA1Set.normalize(arg)
+            if digest is None:
+                raise ValueError(f"Not a SHA-1: {arg!r}")
+            hex_digest = digest.hex()
+            for subkey_name, columns in IOC_HASH_FIELDS.items():
+                table = table_name(subkey_name)
+                for column in columns:
+                    if self._has(table, column):
+                        sources.append((table, f"SELECT rowid AS _rowid, * FROM {table} WHERE {column} IN (?, ?, ?, ?){host_sql}",
+                                        ['0000' + hex_digest, hex_digest, '0000' + hex_digest.upper(), hex_digest.upper()]
+                                        + host_args, ('_rowid',)))
+        elif route == 'path':
+            prefix = params.get('prefix')
+            table = params.get('table', 'InventoryApplicationFile')
+            if not prefix:
+                raise ValueError("path needs a prefix parameter")
+            column = params.get('column') or next(iter(IOC_PATH_FIELDS.get(table, ())), None)
+            if column is None or not self._has(table, column):
+                raise LookupError(f"No path column {column!r} in table {table!r}")
+            if column.startswith('LowerCase'):
+                prefix = prefix.lower()
+            # A range on the indexed column instead of LIKE, so the prefix is an index seek.
+            sources.append((table, f"SELECT rowid AS _rowid, * FROM {table} WHERE {column} >= ? AND {column} < ?{host_sql}",
+                            [prefix, prefix + '\U0010ffff'] + host_args, (column, '_rowid')))
+        elif route == 'program':
+            if not arg:
+                raise ValueError("program needs a ProgramId: /program/<ProgramId>")
+            for table in ('InventoryApplication', 'InventoryApplicationFile'):
+                if self._has(table, 'ProgramId'):
+                    sources.append((table, f"SELECT rowid AS _rowid, * FROM {table} WHERE ProgramId = ?{host_sql}",
+                                    [arg] + host_args, ('_rowid',)))
+        elif route == 'timeline':
+            now = time.time()
+            start = _time_bound(params['start'], now) if params.get('start') else 0
+            end = _time_bound(params['end'], now) if params.get('end') else 1 << 62
+            column = params.get('column', 'key_last_write_epoch')
+            if not column.endswith('_epoch'):
+                raise ValueError(f"Timeline column must be an _epoch column, not {column!r}")
+            table = params.get('table')
+            if table:
+                if not self._has(table, column):
+                    raise LookupError(f"No column {column!r} in table {table!r}")
+                sources.append((table, f"SELECT rowid AS _rowid, * FROM {table} WHERE {column} BETWEEN ? AND ?{host_sql}",
+                                [start, end] + host_args, (column, '_rowid')))
+            else:
+                arms, args = [], []
+                for name in sorted(self._columns):
+                    if self._has(name, column, 'host', 'entry_id', 'key_last_write_iso'):
+                        arms.append(f"SELECT '{name}' AS \"table\", rowid AS _rowid, host, entry_id, key_last_write_iso, "
+                                    f"{column} FROM {name} WHERE {column} BETWEEN ? AND ?{host_sql}")
+                        args += [start, end] + host_args
+                if arms:
+                    sources.append(('timeline', " UNION ALL ".join(arms), args, (column, 'table', '_rowid')))
+        else:
+            raise LookupError(f"Unknown lookup {route!r}: use {', '.join(self.ROUTES)}")
+        if not sources:
+            raise LookupError(f"No table in {os.path.basename(self.db_path)} supports the {route} lookup")
+        return sources
+
+    def _rows(self, conn: sqlite3.Connection, sources: list, after: Optional[list], limit: Optional[int]):
+        """Yield (source index, order values, row) after the cursor position, at most limit + 1 rows."""
+        start = after[0] if after else 0
+        remaining = limit + 1 if limit is not None else None
+        for index in range(start, len(sources)):
+            table, select, args, order = sources[index]
+            order_sql = ", ".join(f'"{column}"' for column in order)
+            where = ""
+            args = list(args)
+            if after and index == start:
+                if len(after) != len(order) + 1:
+                    raise ValueError("Cursor does not match this lookup")
+                where = f" WHERE ({order_sql}) > ({', '.join('?' * len(order))})"
+                args += after[1:]
+            sql = f"SELECT * FROM ({select}){where} ORDER BY {order_sql}"
+            if remaining is not None:
+                sql += " LIMIT ?"
+                args.append(remaining)
+            cursor = conn.execute(sql, args)
+            columns = [column[0] for column in cursor.description]
+            positions = [columns.index(column) for column in order]
+            while True:
+                batch = cursor.fetchmany(self.array_size)
+                if not batch:
+                    break
+                for values in batch:
+                    row = {column: _export_value(value) for column, value in zip(columns, values) if column != '_rowid'}
+                    if len(sources) > 1:
+                        row = {'table': table, **row}
+                    yield index, [values[i] for i in positions], row
+                    if remaining is not None:
+                        remaining -= 1
+                        if not remaining:
+                            return
+
+    def _split(self, path: str) -> tuple:
+        parts = path.strip('/').split('/', 1)
+        return parts[0], (parts[1] if len(parts) > 1 else '')
+
+    def page(self, path: str, params: dict) -> bytes:
+        """One JSON page of a lookup: {"rows": [...], "next": cursor or null}, served from the cache when it can be."""
+        route, arg = self._split(path)
+        if route == 'stats':
+            self.count('stats')
+            return json.dumps(self.stats()).encode('utf-8')
+        self.refresh()
+        if route == '':
+            self.count('index')
+            return json.dumps({'database': self.db_path, 'lookups': {
+                'hash': '/hash/<sha1>', 'path': '/path?prefix=<path>[&table=&column=]',
+                'program': '/program/<ProgramId>', 'timeline': '/timeline?start=<time>&end=<time>[&table=&column=]',
+                'stats': '/stats'}, 'common': 'host=<host>, limit=<n>, cursor=<next>, format=jsonl (stream every row)',
+                'tables': sorted(self._columns)}).encode('utf-8')
+        limit = _page_limit(params.get('limit'), self.page_size)
+        key = (route, arg, tuple(sorted(dict(params, limit=limit).items())))
+        generation = self.cache.generation
+        body = self.cache.get(key)
+        self.count(route)
+        if body is not None:
+            return body
+        with self.pool.connection() as conn:
+            sources = self._sources(route, arg, params)
+            after = _decode_cursor(params['cursor']) if params.get('cursor') else None
+            rows, last = [], None
+            for index, order_values, row in self._rows(conn, sources, after, limit):
+                if len(rows) == limit:
+                    break
+                rows.append(row)
+                last = [index] + order_values
+            else:
+                last = None
+            body = json.dumps({'rows': rows, 'count': len(rows),
+                               'next': _encode_cursor(last) if last is not None else None}).encode('utf-8')
+        self.cache.put(key, body, generation)
+        return body
+
+    def prepare_stream(self, path: str, params: dict) -> tuple:
+        """Check a JSON Lines lookup before any response is sent; raises ValueError or LookupError."""
+        route, arg = self._split(path)
+        self.refresh()
+        sources = self._sources(route, arg, params)
+        after = _decode_cursor(params['cursor']) if params.get('cursor') else None
+        if after and not (0 <= after[0] < len(sources) and len(after) == len(sources[after[0]][3]) + 1):
+            raise ValueError("Cursor does not match this lookup")
+        return route, sources, after
+
+    def stream(self, prepared: tuple, write):
+        """Write every row of a prepared lookup as JSON Lines through write(bytes), a batch at a time; returns the row count."""
+        route, sources, after = prepared
+        with self.pool.connection() as conn:
+            count, lines = 0, []
+            for _, _, row in self._rows(conn, sources, after, None):
+                lines.append(json.dumps(row, ensure_ascii=False))
+                count += 1
+                if len(lines) == self.array_size:
+                    write(("\n".join(lines) + "\n").encode('utf-8'))
+                    lines = []
+            if lines:
+                write(("\n".join(lines) + "\n").encode('utf-8'))
+        self.count(route, count)
+        return count
+
+    def stats(self) -> dict:
+        with self._counters_lock:
+            requests, errors, rows_streamed = dict(self.requests), self.errors, self.rows_streamed
+        return {'database': self.db_path, 'journal_mode': self.journal_mode, 'requests': requests,
+                'errors': errors, 'rows_streamed': rows_streamed, 'cache': self.cache.stats(),
+                'pool': {'connections': self.pool.size, 'waits': self.pool.waits}}
+
+    def report(self) -> str:
+        cache = self.cache.stats()
+        return (f"Query service: {sum(self.requests.values())} requests, {self.errors} errors, "
+                f"cache hit rate {cache['hit_rate']:.0%} ({cache['invalidations']} invalidations), "
+                f"{self.rows_streamed} rows streamed, {self.pool.waits} waits for a pooled connection")
+
+def _make_query_handler(service: QueryService):
+    """Build the request handler class; http.server is imported only when serving."""
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qsl, urlsplit
+
+    class QueryHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status: int, body: bytes):
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _error(self, status: int, message: str):
+            service.count_error()
+            self._send(status, json.dumps({'error': message}).encode('utf-8'))
+
+        def do_GET(self):
+            # Reject requests addressed to any other name, so a web page cannot reach the service through DNS rebinding.
+            if self.headers.get('Host', '').rsplit(':', 1)[0] not in SERVE_HOSTS:
+                return self._error(403, "Only localhost requests are served")
+            url = urlsplit(self.path)
+            params = dict(parse_qsl(url.query))
+            try:
+                if params.pop('format', 'json') == 'jsonl':
+                    # Validate first: once the 200 and chunked headers are out, an error can no longer be reported.
+                    prepared = service.prepare_stream(url.path, params)
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'application/x-ndjson')
+                    self.send_header('Transfer-Encoding', 'chunked')
+                    self.end_headers()
+                    write = lambda chunk: self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))  # noqa: E731
+                    try:
+                        service.stream(prepared, write)
+                    finally:
+                        self.wfile.write(b"0\r\n\r\n")
+                    return
+                self._send(200, service.page(url.path, params))
+            except LookupError as e:
+                self._error(404, str(e))
+            except ValueError as e:
+                self._error(400, str(e))
+            except sqlite3.Error as e:
+                logging.error(f"Query service error on {self.path}: {e}")
+                self._error(500, f"Database error: {e}")
+
+        def log_message(self, format, *args):
+            logging.debug(f"serve {self.address_string()} {format % args}")
+
+    return QueryHandler
+
+def run_serve(args, db_path: str):
+    """Serve read-only lookups over an existing database on localhost until interrupted."""
+    from http.server import ThreadingHTTPServer
+    import signal
+    if not os.path.exists(db_path):
+        print(f"❌ Database does not exist: {db_path}")
+        logging.error(f"Serve database does not exist: {db_path}")
+        sys.exit(1)
+    try:
+        service = QueryService(db_path, args.pool_size, args.cache_size, args.page_size, args.array_size)
+        server = ThreadingHTTPServer(('127.0.0.1', args.port), _make_query_handler(service))
+    except (sqlite3.Error, OSError) as e:
+        print(f"❌ Cannot start the query service: {e}")
+        logging.error(f"Cannot start the query service: {e}")
+        sys.exit(1)
+    server.daemon_threads = True
+
+    def interrupt(*_):
+        raise KeyboardInterrupt
+
+    with contextlib.suppress(ValueError, AttributeError):
+        signal.signal(signal.SIGTERM, interrupt)
+    if service.journal_mode != 'wal':
+        print(f"⚠️ {db_path} stays in {service.journal_mode} journal mode: ingests will block queries while they commit")
+    print(f"🔍 Serving {db_path} on http://127.0.0.1:{server.server_address[1]}/ "
+          f"({service.pool.size} read-only connections, {service.cache.max_entries} cached results); Ctrl+C to stop")
+    logging.debug(f"Serving {db_path} on 127.0.0.1:{server.server_address[1]} in {service.journal_mode} mode")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.pool.close()
+    print(f"✓ {service.report()}")
+    logging.debug(service.report())
+
+def parser_options(args, output_format: str) -> dict:
+    """AmcacheParser keyword arguments taken from the command line, shared by single-hive, batch and watch runs."""
+    return {
+        'search_keys': args.search_keys.split(',') if args.search_keys else None,
+        'batch_size': args.batch_size,
+        # --no-database only applies to streaming outputs; the other formats are exported from the database.
+        'use_database': not (args.no_database and output_format in STREAMING_OUTPUT_FORMATS),
+        'row_group_size': args.row_group_size,
+        'engine': args.engine,
+        'ioc_path': args.ioc,
+        'pipeline': args.pipeline,
+        'queue_depth': args.queue_depth,
+        'compress': args.compress,
+        'compress_threads': args.compress_threads,
+    }
+
 def main():
+    import argparse
+    from platform import system, version
     parser = argparse.ArgumentParser(description="AmcacheParser: Parse Windows Amcache.hve files")
     parser.add_argument('--live', action='store_true', help="Perform live analysis")
     parser.add_argument('--offline', type=str, help="Path to offline Amcache.hve file")
-    parser.add_argument('--output', choices=['sqlite', 'json', 'csv'], default='sqlite', help="Output format")
+    parser.add_argument('--output', choices=OUTPUT_FORMATS, default='sqlite', help="Output format")
+    parser.add_argument('--no-database', action='store_true', help="Skip the SQLite database (streaming outputs such as jsonl only)")
     parser.add_argument('--search-keys', type=str, help="Comma-separated list of subkeys to parse")
     parser.add_argument('--non-interactive', action='store_true', help="Run without interactive menu")
+    parser.add_argument('--bootstrap', action='store_true', help="Create the virtual environment and install missing dependencies before running")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows buffered per SQLite transaction")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes: per-hive decoders, or hives in parallel with --batch (default: CPU count)")
+    parser.add_argument('--output-path', type=str, help="Output directory for the database, exports and logs")
+    parser.add_argument('--host', type=str, default='', help="Host label stored with every row of this hive")
+    parser.add_argument('--batch', type=str, help="Directory or glob of hives to ingest into one multi-host database")
+    parser.add_argument('--engine', choices=ENGINES, default='registry', help="Hive walker: python-registry objects, or the native regf cell walker (Root\\Inventory* only)")
+    parser.add_argument('--keep-partitions', action='store_true', help="Keep the per-hive partition databases after a batch merge")
+    parser.add_argument('--ioc', type=str, help="File of SHA-1 and path IOCs (one per line) to sweep every parsed entry against")
+    parser.add_argument('--metrics-json', type=str, help="Write per-stage timings and counters of the run to this JSON file")
+    parser.add_argument('--profile', action='store_true', help="Run under cProfile and save the stats in the output directory")
+    parser.add_argument('--export-query', type=str, help="Export the rows of a SQL query against an existing database (no hive is parsed)")
+    parser.add_argument('--export-filter', type=str, help="Export rows of --export-table matching \"column op value [and ...]\" from an existing database")
+    parser.add_argument('--export-table', type=str, default='InventoryApplicationFile', help="Table searched by --export-filter")
+    parser.add_argument('--export-path', type=str, help="File written by --export-query/--export-filter (default: amcache_export.<format> in the output directory)")
+    parser.add_argument('--array-size', type=int, default=DEFAULT_EXPORT_ARRAY_SIZE, help="Rows fetched per round trip when exporting")
+    parser.add_argument('--compress', choices=list(COMPRESSIONS), help="Compress the json, jsonl and csv outputs as they are written")
+    parser.add_argument('--compress-threads', type=int, default=1, help="Threads for --compress; above 1, 1 MiB blocks are compressed in parallel as independent members")
+    parser.add_argument('--pipeline', action='store_true', help="Overlap decoding with output writes: rows go through bounded queues to one writer thread per output")
+    parser.add_argument('--queue-depth', type=int, default=DEFAULT_QUEUE_DEPTH, help=f"Batches of {DEFAULT_PIPELINE_BATCH} rows queued per writer thread with --pipeline")
+    parser.add_argument('--row-group-size', type=int, default=DEFAULT_ROW_GROUP_SIZE, help="Rows per Parquet row group / Arrow record batch")
+    parser.add_argument('--serve', action='store_true', help="Serve read-only lookups over an existing database on http://127.0.0.1 (no hive is parsed)")
+    parser.add_argument('--port', type=int, default=DEFAULT_SERVE_PORT, help="Localhost port for --serve")
+    parser.add_argument('--pool-size', type=int, default=DEFAULT_SERVE_POOL, help="Read-only SQLite connections shared by --serve request threads")
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_SERVE_CACHE, help="Query results kept in the --serve LRU cache (0 disables it)")
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE, help=f"Rows per --serve page when the request sets no limit (max {MAX_PAGE_SIZE})")
+    parser.add_argument('--watch', type=str, help="Daemon mode: ingest hives dropped into this directory into one multi-host database until stopped")
+    parser.add_argument('--poll-interval', type=float, default=DEFAULT_WATCH_INTERVAL, help="Seconds between scans of the --watch directory")
+    parser.add_argument('--settle-seconds', type=float, default=DEFAULT_WATCH_SETTLE, help="Seconds a hive's size and mtime must stay unchanged before --watch claims it")
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_WATCH_RETRIES, help="Attempts per hive in --watch before it is moved to .quarantine/")
+    parser.add_argument('--retry-backoff', type=float, default=DEFAULT_WATCH_BACKOFF, help="Seconds before the first retry of a failed hive in --watch; doubles per attempt")
+    parser.add_argument('--status-file', type=str, help="JSON status file rewritten by --watch on every poll (default: amcache_watch_status.json in the output directory)")
     args = parser.parse_args()
 
+    if args.output_path:
+        os.makedirs(args.output_path, exist_ok=True)
     logging.basicConfig(
-        filename=r'C:\Amcache\amcache_parser.log',
+        filename=os.path.join(args.output_path, 'amcache_parser.log') if args.output_path else r'C:\Amcache\amcache_parser.log',
         level=logging.DEBUG,
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
@@ -829,9 +4370,54 @@ def main():
     print(LOGO)  # Display logo in all modes
 
     file_path = None
-    db_path = DEFAULT_DATABASE_PATH
+    db_path = os.path.join(args.output_path, 'amcache.db') if args.output_path else DEFAULT_DATABASE_PATH
     output_format = args.output
-    search_keys = args.search_keys.split(',') if args.search_keys else None
+    profile_dir = (os.path.dirname(db_path) or '.') if args.profile else None
+
+    def parse_hive(file_path: str, live: bool):
+        # output_format is read at call time: the interactive menu can change it between parses.
+        with profiled(profile_dir):
+            AmcacheParser(file_path, db_path, output_format, live=live, workers=args.workers or 1, host=args.host,
+                          metrics_path=args.metrics_json, **parser_options(args, output_format)).parse()
+
+    if (args.non_interactive or args.batch or args.watch) and args.no_database and output_format not in STREAMING_OUTPUT_FORMATS:
+        print(f"❌ --no-database requires a streaming output format: {', '.join(STREAMING_OUTPUT_FORMATS)}")
+        logging.error(f"--no-database used with output format {output_format}")
+        sys.exit(1)
+
+    if args.export_query or args.export_filter:
+        with profiled(profile_dir):
+            run_export(args, db_path, output_format)
+        return
+
+    if args.serve:
+        with profiled(profile_dir):
+            run_serve(args, db_path)
+        return
+
+    if args.batch or args.watch:
+        hives = find_hives(args.batch) if args.batch else []
+        if args.batch and not hives:
+            print(f"❌ No hives found for batch input: {args.batch}")
+            logging.error(f"No hives found for batch input: {args.batch}")
+            sys.exit(1)
+        if args.watch and not os.path.isdir(args.watch):
+            print(f"❌ Watch directory does not exist: {args.watch}")
+            logging.error(f"Watch directory does not exist: {args.watch}")
+            sys.exit(1)
+        ingestor = BatchIngestor(os.path.dirname(db_path) or '.', output_format, parser_options(args, output_format),
+                                 workers=args.workers, keep_partitions=args.keep_partitions,
+                                 metrics_path=args.metrics_json)
+        if args.watch:
+            watcher = HiveWatcher(args.watch, ingestor, poll_interval=args.poll_interval,
+                                  settle_seconds=args.settle_seconds, max_attempts=args.max_attempts,
+                                  backoff=args.retry_backoff, status_path=args.status_file)
+            with profiled(profile_dir):
+                watcher.run()
+            return
+        with profiled(profile_dir):
+            results = ingestor.run([ingestor.make_job(path) for path in hives])
+        sys.exit(0 if all(r['ok'] for r in results) else 1)
 
     if args.non_interactive:
         if args.live:
@@ -858,8 +4444,7 @@ def main():
             print("❌ Your system is not compatible with Amcache.hve")
             logging.error("System not compatible with Amcache.hve")
             sys.exit(1)
-        ap = AmcacheParser(file_path, db_path, output_format, search_keys)
-        ap.parse()
+        parse_hive(file_path, args.live)
         return
 
     while True:
@@ -876,8 +4461,7 @@ def main():
                 print("❌ Your system is not compatible with Amcache.hve")
                 logging.error("System not compatible with Amcache.hve")
                 continue
-            ap = AmcacheParser(file_path, db_path, output_format, search_keys)
-            ap.parse()
+            parse_hive(file_path, live=True)
         elif choice == '2':
             file_path = input("Enter offline Amcache.hve path: ").strip()
             if not file_path:
@@ -888,12 +4472,11 @@ def main():
                 print(f"❌ Input file does not exist: {file_path}")
                 logging.error(f"Input file does not exist: {file_path}")
                 continue
-            ap = AmcacheParser(file_path, db_path, output_format, search_keys)
-            ap.parse()
+            parse_hive(file_path, live=False)
         elif choice == '3':
-            output_format = input("Enter output format (sqlite, json, csv) [sqlite]: ").strip().lower() or 'sqlite'
-            if output_format not in ['sqlite', 'json', 'csv']:
-                print("❌ Invalid output format. Choose sqlite, json, or csv")
+            output_format = input(f"Enter output format ({', '.join(OUTPUT_FORMATS)}) [sqlite]: ").strip().lower() or 'sqlite'
+            if output_format not in OUTPUT_FORMATS:
+                print(f"❌ Invalid output format. Choose {', '.join(OUTPUT_FORMATS)}")
                 logging.error(f"Invalid output format: {output_format}")
                 continue
             print(f"✓ Output format set to: {output_format}")
@@ -906,5 +4489,12 @@ def main():
             print("❌ Invalid choice. Please select 1-4")
             logging.error(f"Invalid menu choice: {choice}")
 
+def bootstrap_requested(argv: List[str]) -> bool:
+    """Return True when the venv bootstrap was explicitly requested."""
+    return '--bootstrap' in argv or os.environ.get('AMCACHE_BOOTSTRAP') == '1'
+
 if __name__ == '__main__':
+    if bootstrap_requested(sys.argv[1:]):
+        ensure_venv_and_relaunch()
+        check_and_install_packages()
     main()
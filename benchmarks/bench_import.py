@@ -0,0 +1,53 @@
+"""
+Cold-start benchmark for Amcache.py.
+
+Measures how long a fresh interpreter takes to import the module and fails
+when the import exceeds its budget. The import is timed inside each child
+interpreter, so the (noisy) cost of starting the interpreter itself is not
+part of the measurement.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMPORT_BUDGET_MS = 60.0
+TIMED_IMPORT = "import time; start = time.perf_counter(); import Amcache; print((time.perf_counter() - start) * 1000)"
+
+
+def _time_imports(runs: int) -> list:
+    env = os.environ.copy()
+    env['PYTHONPATH'] = REPO_DIR + os.pathsep + env.get('PYTHONPATH', '')
+    env.pop('AMCACHE_BOOTSTRAP', None)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    # Warm-up launch so the measured runs use cached bytecode, as installed copies do.
+    subprocess.run([sys.executable, '-c', 'import Amcache'], check=True, env=env)
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', TIMED_IMPORT], check=True, env=env, capture_output=True, text=True)
+        samples.append(float(result.stdout.split()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold-start import cost of Amcache.py")
+    parser.add_argument('--runs', type=int, default=21, help="Interpreter launches to time")
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS, help="Allowed median import time")
+    args = parser.parse_args()
+
+    samples = sorted(_time_imports(args.runs))
+    cost = statistics.median(samples)
+    print(f"import Amcache: median {cost:.1f} ms, fastest {samples[0]:.1f} ms, slowest {samples[-1]:.1f} ms "
+          f"over {len(samples)} runs (budget {args.budget_ms:.0f} ms)")
+    if cost > args.budget_ms:
+        print("❌ Import cost exceeds budget")
+        return 1
+    print("✓ Import cost within budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,189 @@
+"""
+Parse throughput benchmark for Amcache.py.
+
+Generates (or reuses) synthetic hives of the requested sizes, parses each one with
+every engine, output format and worker count in a fresh process, and reports
+entries/sec, peak RSS and time per stage. Results can be saved as JSON and compared against a
+baseline saved on another commit; the run fails when throughput drops by more
+than the tolerance.
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+STAGES = ('load', 'walk', 'close_sinks', 'indexes', 'save_json')
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB, or None where it cannot be read."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        pass
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class _Counters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+        counters = _Counters()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters),
+                                                 counters.cb)
+        return counters.PeakWorkingSetSize / (1 << 20)
+    except (AttributeError, OSError):
+        return None
+
+
+def _timed(stages: dict, stage: str, func):
+    """Wrap func so the time spent in it is added to stages[stage]."""
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stages[stage] += time.perf_counter() - started
+    return wrapper
+
+
+def run_case(case: dict) -> dict:
+    """Parse one hive with one engine, output format and worker count; runs in its own process."""
+    import Amcache
+    stages = dict.fromkeys(STAGES, 0.0)
+    Amcache.build_query_indexes = _timed(stages, 'indexes', Amcache.build_query_indexes)
+    Amcache.AmcacheParser._save_to_json = _timed(stages, 'save_json', Amcache.AmcacheParser._save_to_json)
+    Amcache.AmcacheParser._close_sinks = _timed(stages, 'close_sinks', Amcache.AmcacheParser._close_sinks)
+    out_dir = tempfile.mkdtemp(prefix='amcache-bench-')
+    try:
+        # Log at DEBUG to a file like the CLI does, so logging cost is part of the measurement.
+        logging.basicConfig(filename=os.path.join(out_dir, 'amcache_parser.log'), level=logging.DEBUG)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            started = time.perf_counter()
+            parser = Amcache.AmcacheParser(case['hive'], os.path.join(out_dir, 'amcache.db'), case['output'],
+                                           engine=case['engine'], show_progress=False,
+                                           workers=case.get('workers', 1))
+            stages['load'] = time.perf_counter() - started
+            parser.parse()
+            total = time.perf_counter() - started
+    finally:
+        logging.shutdown()
+        shutil.rmtree(out_dir, ignore_errors=True)
+    stages['walk'] = total - sum(seconds for stage, seconds in stages.items() if stage != 'walk')
+    return {'entries': parser.parsed_count, 'seconds': total, 'entries_per_sec': parser.parsed_count / max(total, 1e-9),
+            'peak_rss_mb': _peak_rss_mb(), 'stages': stages}
+
+
+def _spawn_case(case: dict) -> dict:
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case)],
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def _compare(results: list, baseline_path: str, tolerance: float) -> int:
+    """Report throughput against a saved baseline; return 1 if any case regressed beyond the tolerance."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    base = {(r['hive_entries'], r['engine'], r['output'], r.get('workers', 1)): r for r in baseline['results']}
+    status = 0
+    print(f"\nAgainst baseline {baseline.get('commit', '?')} (tolerance {tolerance:.0%}):")
+    for r in results:
+        before = base.get((r['hive_entries'], r['engine'], r['output'], r['workers']))
+        if before is None:
+            continue
+        change = r['entries_per_sec'] / max(before['entries_per_sec'], 1e-9) - 1
+        regressed = change < -tolerance
+        status |= regressed
+        print(f"  {'❌' if regressed else '✓'} {r['hive_entries']:>8} {r['engine']:<9} {r['output']:<7} {r['workers']:>7} "
+              f"{before['entries_per_sec']:10.0f} -> {r['entries_per_sec']:10.0f} entries/sec ({change:+.1%})")
+    return status
+
+
+def main():
+    import Amcache
+    parser = argparse.ArgumentParser(description="Benchmark Amcache.py parsing on synthetic hives")
+    parser.add_argument('--entries', default='1000,10000', help="Comma-separated hive sizes in entries (1k-1M)")
+    parser.add_argument('--engines', default=','.join(Amcache.ENGINES), help="Comma-separated engines to run")
+    parser.add_argument('--outputs', default='sqlite,json,jsonl,csv', help="Comma-separated output formats to run")
+    parser.add_argument('--workers', default='1',
+                        help="Comma-separated worker counts to run; each is compared with the serial (1 worker) run")
+    parser.add_argument('--runs', type=int, default=1, help="Runs per case; the fastest is reported")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the synthetic hives")
+    parser.add_argument('--workdir', default=os.path.join(tempfile.gettempdir(), 'amcache-bench'),
+                        help="Directory where generated hives are cached between runs")
+    parser.add_argument('--save', help="Write the results as JSON to this file")
+    parser.add_argument('--baseline', help="Results JSON from an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.15, help="Allowed throughput drop against the baseline")
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(json.loads(args.run_case))))
+        return 0
+
+    import synth_hive
+    os.makedirs(args.workdir, exist_ok=True)
+    results = []
+    worker_counts = sorted({int(n) for n in args.workers.split(',')})
+    if any(n > 1 for n in worker_counts):
+        print(f"⚙️ {os.cpu_count()} CPUs available for --workers")
+    print(f"{'entries':>8} {'engine':<9} {'output':<7} {'workers':>7} {'entries/s':>10} {'speedup':>7} {'peak MB':>8} "
+          + " ".join(f"{stage:>11}" for stage in STAGES))
+    for entries in (int(n) for n in args.entries.split(',')):
+        hive = os.path.join(args.workdir, f"synth_{entries}_{args.seed}.hve")
+        if not os.path.exists(hive):
+            synth_hive.write_amcache(hive, entries, args.seed)
+        for engine in args.engines.split(','):
+            for output in args.outputs.split(','):
+                serial = None
+                for workers in worker_counts:
+                    case = {'hive': hive, 'engine': engine, 'output': output, 'workers': workers}
+                    best = max((_spawn_case(case) for _ in range(args.runs)), key=lambda r: r['entries_per_sec'])
+                    best.update(hive_entries=entries, engine=engine, output=output, workers=workers)
+                    results.append(best)
+                    if workers == 1:
+                        serial = best
+                    speedup = f"{best['entries_per_sec'] / serial['entries_per_sec']:6.2f}x" if serial else f"{'n/a':>7}"
+                    peak = f"{best['peak_rss_mb']:8.1f}" if best['peak_rss_mb'] is not None else f"{'n/a':>8}"
+                    print(f"{entries:>8} {engine:<9} {output:<7} {workers:>7} {best['entries_per_sec']:10.0f} {speedup} {peak} "
+                          + " ".join(f"{best['stages'][stage]:10.3f}s" for stage in STAGES))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'commit': _commit(), 'python': platform.python_version(), 'platform': platform.platform(),
+                       'cpus': os.cpu_count(), 'seed': args.seed, 'results': results}, f, indent=2)
+        print(f"✓ Saved results to {args.save}")
+    if args.baseline:
+        return _compare(results, args.baseline, args.tolerance)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
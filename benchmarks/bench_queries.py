@@ -0,0 +1,93 @@
+"""
+Query benchmark for the Amcache.py SQLite output.
+
+Copies a database, strips the secondary indexes, FTS5 tables and planner
+statistics, and times typical analyst queries. It then rebuilds them with
+build_query_indexes() and times the same queries again.
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Amcache  # noqa: E402
+
+# (label, plain SQL, SQL using the FTS5 table when it differs)
+QUERIES = [
+    ("path lookup", "SELECT * FROM InventoryApplicationFile WHERE LowerCaseLongPath = :path", None),
+    ("SHA-1 lookup", "SELECT * FROM InventoryApplicationFile WHERE FileId = :file_id", None),
+    ("files of a program",
+     "SELECT f.Name FROM InventoryApplication a JOIN InventoryApplicationFile f ON f.ProgramId = a.ProgramId "
+     "WHERE a.Name = :app_name", None),
+    ("publisher", "SELECT COUNT(*) FROM InventoryApplicationFile WHERE Publisher = :publisher", None),
+    ("install date range",
+     "SELECT Name FROM InventoryApplication WHERE InstallDate_epoch BETWEEN :epoch AND :epoch + 86400 * 30", None),
+    ("path substring",
+     "SELECT COUNT(*) FROM InventoryApplicationFile WHERE LowerCaseLongPath LIKE '%' || :fragment || '%'",
+     "SELECT COUNT(*) FROM InventoryApplicationFile_fts WHERE InventoryApplicationFile_fts MATCH '\"' || :fragment || '\"'"),
+]
+
+
+def _strip(conn: sqlite3.Connection):
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'").fetchall():
+        conn.execute(f"DROP INDEX {name}")
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE '%\\_fts\\_a_' ESCAPE '\\'").fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+    for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND (name LIKE '%\\_fts' ESCAPE '\\' "
+                                "OR name LIKE '%\\_fts\\_pending' ESCAPE '\\')").fetchall():
+        conn.execute(f"DROP TABLE {name}")
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone():
+        conn.execute("DELETE FROM sqlite_stat1")
+
+
+def _params(conn: sqlite3.Connection) -> dict:
+    """Pick parameters from a row in the middle of the data so lookups hit real values."""
+    count = conn.execute("SELECT COUNT(*) FROM InventoryApplicationFile").fetchone()[0]
+    path, file_id, publisher = conn.execute(
+        "SELECT LowerCaseLongPath, FileId, Publisher FROM InventoryApplicationFile LIMIT 1 OFFSET ?", (count // 2,)).fetchone()
+    app_name, install_epoch = conn.execute("SELECT Name, InstallDate_epoch FROM InventoryApplication LIMIT 1").fetchone()
+    return {"path": path, "file_id": file_id, "publisher": publisher, "app_name": app_name,
+            "epoch": install_epoch or 0, "fragment": os.path.basename(path or "")[:6] or "exe"}
+
+
+def _time(conn: sqlite3.Connection, sql: str, params: dict, runs: int) -> float:
+    best = float('inf')
+    for _ in range(runs):
+        start = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time analyst queries on an Amcache.py database with and without query indexes")
+    parser.add_argument('database', help="SQLite database written by Amcache.py")
+    parser.add_argument('--runs', type=int, default=5, help="Executions per query; the fastest is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        shutil.copyfile(args.database, path)
+        conn = sqlite3.connect(path, isolation_level=None)
+        _strip(conn)
+        params = _params(conn)
+        before = {label: _time(conn, sql, params, args.runs) for label, sql, _ in QUERIES}
+        report = Amcache.build_query_indexes(conn)
+        after = {label: _time(conn, fts_sql or sql, params, args.runs) for label, sql, fts_sql in QUERIES}
+        conn.close()
+
+    print(report)
+    print(f"{'query':<20} {'scan ms':>10} {'indexed ms':>11} {'speedup':>9}")
+    for label, _, _ in QUERIES:
+        print(f"{label:<20} {before[label]:10.2f} {after[label]:11.2f} {before[label] / max(after[label], 1e-6):8.1f}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""
+Synthetic Amcache.hve generator for the benchmark suite.
+
+Writes a valid regf file with the Root\\InventoryApplication,
+InventoryApplicationFile and InventoryDriverBinary layout of a Windows 10
+Amcache hive. Value names, types and formats follow real hives, and the data
+is random but reproducible from the seed, so the same command produces the
+same hive on every machine and commit. All cells go in a single hive bin. Large
+subkeys use ri index roots over lh lists, like Windows does.
+"""
+
+import argparse
+import hashlib
+import random
+import struct
+import sys
+import time
+
+REG_SZ = 1
+REG_DWORD = 4
+REG_QWORD = 11
+
+_HBIN_START = 0x1000
+_LH_CHUNK = 512
+_FILETIME_EPOCH_DELTA = 116444736000000000
+_WRITTEN_AT = 1700000000  # fixed so the same seed always gives byte-identical hives
+
+
+def _filetime(epoch: float) -> int:
+    return int(epoch * 10_000_000) + _FILETIME_EPOCH_DELTA
+
+
+def _lh_hash(name: str) -> int:
+    h = 0
+    for ch in name.upper():
+        h = (h * 37 + ord(ch)) & 0xFFFFFFFF
+    return h
+
+
+class _CellAllocator:
+    """Append-only cell allocator over a single hive bin."""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def alloc(self, payload: bytes) -> int:
+        size = (len(payload) + 4 + 7) & ~7
+        offset = len(self.buf)
+        self.buf += struct.pack('<i', -size) + payload + b'\x00' * (size - 4 - len(payload))
+        return offset + 0x20
+
+
+class HiveWriter:
+    """Build a minimal but valid regf file containing a Root key tree."""
+
+    def __init__(self):
+        self.cells = _CellAllocator()
+
+    def _value(self, name: str, data_type: int, value) -> int:
+        if data_type == REG_SZ:
+            data = (value + '\x00').encode('utf-16le')
+        elif data_type == REG_DWORD:
+            data = struct.pack('<I', value)
+        elif data_type == REG_QWORD:
+            data = struct.pack('<Q', value)
+        else:
+            data = bytes(value)
+        raw_name = name.encode('latin-1')
+        if len(data) <= 4:
+            size_field = len(data) | 0x80000000
+            offset_field = struct.unpack('<I', data.ljust(4, b'\x00'))[0]
+        else:
+            size_field = len(data)
+            offset_field = self.cells.alloc(data)
+        vk = struct.pack('<2sHIIIHH', b'vk', len(raw_name), size_field, offset_field, data_type, 1, 0) + raw_name
+        return self.cells.alloc(vk)
+
+    def _subkey_list(self, children) -> int:
+        children = sorted(children, key=lambda c: c[0].upper())
+        lists = []
+        for start in range(0, len(children), _LH_CHUNK):
+            chunk = children[start:start + _LH_CHUNK]
+            body = b''.join(struct.pack('<II', off, _lh_hash(name)) for name, off in chunk)
+            lists.append(self.cells.alloc(struct.pack('<2sH', b'lh', len(chunk)) + body))
+        if len(lists) == 1:
+            return lists[0]
+        return self.cells.alloc(struct.pack('<2sH', b'ri', len(lists)) + b''.join(struct.pack('<I', o) for o in lists))
+
+    def key(self, name: str, values=(), children=(), last_write: float = 0.0, flags: int = 0x20) -> int:
+        """Write an nk cell; children are (name, nk offset) pairs already written."""
+        value_offsets = [self._value(n, t, v) for n, t, v in values]
+        values_list = self.cells.alloc(b''.join(struct.pack('<I', o) for o in value_offsets)) if value_offsets else 0xFFFFFFFF
+        subkeys_list = self._subkey_list(children) if children else 0xFFFFFFFF
+        raw_name = name.encode('latin-1')
+        nk = struct.pack(
+            '<2sHQ15IHH',
+            b'nk', flags, _filetime(last_write or _WRITTEN_AT), 0, 0xFFFFFFFF,
+            len(children), 0, subkeys_list, 0xFFFFFFFF,
+            len(value_offsets), values_list, 0xFFFFFFFF, 0xFFFFFFFF,
+            0, 0, 0, 0, 0, len(raw_name), 0,
+        ) + raw_name
+        return self.cells.alloc(nk)
+
+    def write(self, f, root_offset: int) -> int:
+        """Write the base block and the single hive bin to a binary file; return the bytes written."""
+        cells = self.cells.buf
+        bin_size = (len(cells) + 0x20 + 8 + 0xFFF) & ~0xFFF
+        free = bin_size - 0x20 - len(cells)
+        base = bytearray(0x1000)
+        struct.pack_into('<4sIIQIIIIIII', base, 0, b'regf', 1, 1, _filetime(_WRITTEN_AT), 1, 5, 0, 1,
+                         root_offset, bin_size, 1)
+        checksum = 0
+        for (dword,) in struct.iter_unpack('<I', bytes(base[:0x1FC])):
+            checksum ^= dword
+        struct.pack_into('<I', base, 0x1FC, checksum)
+        f.write(base)
+        f.write(struct.pack('<4sIIQQI', b'hbin', 0, bin_size, 0, 0, 0))
+        f.write(cells)
+        f.write(struct.pack('<i', free) + b'\x00' * (free - 4))
+        return len(base) + bin_size
+
+
+def _sha1(rng: random.Random) -> str:
+    return hashlib.sha1(rng.getrandbits(64).to_bytes(8, 'little')).hexdigest()
+
+
+def _date(rng: random.Random) -> str:
+    return time.strftime('%m/%d/%Y %H:%M:%S', time.gmtime(rng.randint(1262304000, 1767225600)))
+
+
+def build_amcache(entries: int, seed: int = 0) -> tuple:
+    """Build a synthetic Amcache hive with roughly ``entries`` keys; return (writer, root offset)."""
+    rng = random.Random(seed)
+    writer = HiveWriter()
+    publishers = ['microsoft corporation', 'google llc', 'mozilla corporation', 'adobe inc.', '']
+    n_apps = max(1, entries // 20)
+    n_drivers = max(1, entries // 20)
+    n_files = max(1, entries - n_apps - n_drivers)
+
+    program_ids = ['0000' + _sha1(rng) for _ in range(n_apps)]
+    apps = []
+    for program_id in program_ids:
+        values = [
+            ('ProgramId', REG_SZ, program_id),
+            ('ProgramInstanceId', REG_SZ, '0000' + _sha1(rng)),
+            ('Name', REG_SZ, f'Application {rng.randint(0, 99999)}'),
+            ('Version', REG_SZ, f'{rng.randint(1, 20)}.{rng.randint(0, 9)}.{rng.randint(0, 9999)}'),
+            ('Publisher', REG_SZ, rng.choice(publishers)),
+            ('Language', REG_DWORD, rng.choice([1033, 1033, 2057, 1031, 65535])),
+            ('Source', REG_SZ, rng.choice(['AddRemoveProgram', 'Msi'])),
+            ('InstallDate', REG_SZ, _date(rng)),
+            ('RootDirPath', REG_SZ, f'c:\\program files\\app{rng.randint(0, 9999)}'),
+            ('UninstallString', REG_SZ, 'msiexec.exe /x {%s}' % _sha1(rng)[:32]),
+        ]
+        apps.append((program_id, writer.key(program_id, values)))
+
+    files = []
+    for i in range(n_files):
+        name = f'file{i}.{rng.choice(["exe", "dll", "sys"])}'
+        directory = rng.choice(['c:\\windows\\system32', 'c:\\program files\\vendor', f'c:\\users\\user{rng.randint(0, 9)}\\appdata\\local\\temp'])
+        entry_id = f'{name}|{_sha1(rng)[:16]}'
+        values = [
+            ('ProgramId', REG_SZ, rng.choice(program_ids)),
+            ('FileId', REG_SZ, '0000' + _sha1(rng)),
+            ('LowerCaseLongPath', REG_SZ, f'{directory}\\{name}'),
+            ('LongPathHash', REG_SZ, entry_id.split('|')[1]),
+            ('Name', REG_SZ, name),
+            ('OriginalFileName', REG_SZ, name),
+            ('Publisher', REG_SZ, rng.choice(publishers)),
+            ('Version', REG_SZ, f'10.0.{rng.randint(10000, 22000)}.1'),
+            ('BinFileVersion', REG_SZ, f'10.0.{rng.randint(10000, 22000)}.1'),
+            ('BinaryType', REG_SZ, rng.choice(['pe32_i386', 'pe64_amd64'])),
+            ('ProductName', REG_SZ, 'product'),
+            ('ProductVersion', REG_SZ, '1.0'),
+            ('LinkDate', REG_SZ, _date(rng)),
+            ('BinProductVersion', REG_SZ, '1.0.0.0'),
+            ('Size', REG_QWORD, rng.randint(1024, 50_000_000)),
+            ('Language', REG_DWORD, rng.choice([0, 1033, 1049])),
+            ('IsPeFile', REG_DWORD, 1),
+            ('IsOsComponent', REG_DWORD, rng.randint(0, 1)),
+            ('Usn', REG_QWORD, rng.randint(0, 2 ** 40)),
+        ]
+        files.append((entry_id, writer.key(entry_id, values, last_write=rng.randint(1262304000, 1767225600))))
+
+    drivers = []
+    for i in range(n_drivers):
+        name = f'drv{i}.sys'
+        entry_id = f'c:/windows/system32/drivers/{name}'
+        values = [
+            ('DriverName', REG_SZ, name),
+            ('DriverId', REG_SZ, '0000' + _sha1(rng)),
+            ('DriverVersion', REG_SZ, f'10.0.{rng.randint(10000, 22000)}.1'),
+            ('DriverCompany', REG_SZ, rng.choice(publishers)),
+            ('DriverSigned', REG_DWORD, rng.randint(0, 1)),
+            ('DriverInBox', REG_DWORD, rng.randint(0, 1)),
+            ('DriverIsKernelMode', REG_DWORD, 1),
+            ('DriverTimeStamp', REG_DWORD, rng.randint(1262304000, 1767225600)),
+            ('DriverLastWriteTime', REG_SZ, _date(rng)),
+            ('ImageSize', REG_DWORD, rng.randint(4096, 4_000_000)),
+            ('Service', REG_SZ, name[:-4]),
+        ]
+        drivers.append((entry_id, writer.key(entry_id, values)))
+
+    inventories = [
+        ('InventoryApplication', writer.key('InventoryApplication', children=apps)),
+        ('InventoryApplicationFile', writer.key('InventoryApplicationFile', children=files)),
+        ('InventoryDriverBinary', writer.key('InventoryDriverBinary', children=drivers)),
+    ]
+    root = writer.key('Root', children=inventories)
+    top = writer.key('{' + _sha1(rng)[:8] + '}', children=[('Root', root)], flags=0x2C)
+    return writer, top
+
+
+def write_amcache(path: str, entries: int, seed: int = 0) -> int:
+    """Write a synthetic hive to path; return its size in bytes."""
+    writer, root = build_amcache(entries, seed)
+    with open(path, 'wb') as f:
+        return writer.write(f, root)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Amcache.hve for benchmarking")
+    parser.add_argument('output', help="Destination hive path")
+    parser.add_argument('--entries', type=int, default=10000, help="Approximate number of Inventory entries (1k-1M; about 1.5 KB each)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for reproducible hives")
+    args = parser.parse_args()
+    started = time.perf_counter()
+    size = write_amcache(args.output, args.entries, args.seed)
+    print(f"✓ Wrote {size} bytes to {args.output} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
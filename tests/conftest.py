@@ -0,0 +1,47 @@
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, 'benchmarks'))
+
+
+@pytest.fixture(scope='session')
+def synth_hive(tmp_path_factory):
+    """A small synthetic Amcache.hve shared by the tests of a session."""
+    import synth_hive
+    path = str(tmp_path_factory.mktemp('hives') / 'Amcache.hve')
+    synth_hive.write_amcache(path, 300, seed=1)
+    return path
+
+
+@pytest.fixture(scope='session')
+def parse_hive():
+    """Parse a hive into a SQLite database with the progress output silenced; returns the parser."""
+    import Amcache
+
+    def parse(hive, db_path, **options):
+        with contextlib.redirect_stdout(io.StringIO()):
+            parser = Amcache.AmcacheParser(hive, str(db_path), 'sqlite', show_progress=False, **options)
+            parser.parse()
+        return parser
+    return parse
+
+
+@pytest.fixture(scope='session')
+def cli_args():
+    """Build the argparse namespace main() hands to parser_options, with the defaults overridden as given."""
+    import Amcache
+
+    def args(**overrides):
+        values = dict(search_keys=None, batch_size=Amcache.DEFAULT_BATCH_SIZE, no_database=False,
+                      row_group_size=Amcache.DEFAULT_ROW_GROUP_SIZE, engine='registry', ioc=None, pipeline=False,
+                      queue_depth=Amcache.DEFAULT_QUEUE_DEPTH, compress=None, compress_threads=1)
+        values.update(overrides)
+        return argparse.Namespace(**values)
+    return args
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+
+import pytest
+
+import Amcache
+
+
+@pytest.mark.parametrize('output_format, no_database, use_database', [
+    ('sqlite', False, True),
+    ('sqlite', True, True),
+    ('jsonl', False, True),
+    ('jsonl', True, False),
+])
+def test_parser_options_use_database(output_format, no_database, use_database, cli_args):
+    assert Amcache.parser_options(cli_args(no_database=no_database), output_format)['use_database'] is use_database
+
+
+def test_parser_options_are_accepted_by_the_parser(synth_hive, tmp_path, cli_args):
+    options = Amcache.parser_options(cli_args(search_keys='InventoryApplication,InventoryDriverBinary', engine='native'), 'sqlite')
+    parser = Amcache.AmcacheParser(synth_hive, str(tmp_path / 'amcache.db'), 'sqlite', show_progress=False, **options)
+    assert (parser.search_keys, parser.engine) == (['InventoryApplication', 'InventoryDriverBinary'], 'native')
+
+
+def test_batch_jobs_carry_the_parser_options(synth_hive, tmp_path, cli_args):
+    options = Amcache.parser_options(cli_args(search_keys='InventoryDriverBinary', engine='native'), 'sqlite')
+    ingestor = Amcache.BatchIngestor(str(tmp_path), 'sqlite', options, workers=1)
+    job = ingestor.make_job(synth_hive, 'HOSTA')
+    assert job['options'] == options
+    os.makedirs(ingestor.partition_dir)
+    result = Amcache._ingest_hive(job)
+    assert result['ok'], result.get('error')
+    conn = sqlite3.connect(job['db_path'])
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE 'Inventory%'")}
+    finally:
+        conn.close()
+    assert tables == {'InventoryDriverBinary'}
+
+
+@pytest.mark.parametrize('path, host', [
+    ('collect/HOSTA.hve', 'HOSTA'),
+    ('collect/HOSTA/Amcache.hve', 'HOSTA'),
+    ('collect/HOSTA/C/Windows/AppCompat/Programs/Amcache.hve', 'HOSTA'),
+    ('collect/HOSTB/c%3A/windows/appcompat/programs/AMCACHE.HVE', 'HOSTB'),
+    ('collect/HOSTC/Windows/AppCompat/Programs/Amcache.hve', 'HOSTC'),
+    ('collect/HOSTD/Programs/Amcache.hve', 'Programs'),
+])
+def test_derive_host(path, host):
+    assert Amcache.derive_host(os.path.join(*path.split('/'))) == host
+
+
+def test_batch_warns_when_hives_share_a_host(synth_hive, tmp_path, capsys, cli_args):
+    paths = []
+    for collection in ('first', 'second'):
+        path = tmp_path / collection / 'HOSTA' / 'C' / 'Windows' / 'AppCompat' / 'Programs' / 'Amcache.hve'
+        path.parent.mkdir(parents=True)
+        path.write_bytes(open(synth_hive, 'rb').read())
+        paths.append(str(path))
+    ingestor = Amcache.BatchIngestor(str(tmp_path / 'out'), 'sqlite', Amcache.parser_options(cli_args(), 'sqlite'), workers=1)
+    results = ingestor.run([ingestor.make_job(path) for path in paths])
+    assert all(result['ok'] and result['host'] == 'HOSTA' for result in results)
+    assert "⚠️ 2 hives map to host HOSTA" in capsys.readouterr().out
+
+
+def _failing_job(tmp_path, monkeypatch, cli_args, error):
+    def parse(self):
+        print("❌ Hive is corrupt")
+        raise error
+    monkeypatch.setattr(Amcache.AmcacheParser, 'parse', parse)
+    ingestor = Amcache.BatchIngestor(str(tmp_path), 'sqlite', Amcache.parser_options(cli_args(), 'sqlite'), workers=1)
+    os.makedirs(ingestor.partition_dir)
+    return ingestor
+
+
+def test_batch_job_failures_are_reported_per_hive(synth_hive, tmp_path, monkeypatch, cli_args):
+    ingestor = _failing_job(tmp_path, monkeypatch, cli_args, SystemExit(1))
+    result = Amcache._ingest_hive(ingestor.make_job(synth_hive, 'HOSTA'))
+    assert (result['ok'], result['error']) == (False, "Hive is corrupt")
+
+
+def test_batch_job_lets_ctrl_c_through(synth_hive, tmp_path, monkeypatch, cli_args):
+    ingestor = _failing_job(tmp_path, monkeypatch, cli_args, KeyboardInterrupt())
+    with pytest.raises(KeyboardInterrupt):
+        Amcache._ingest_hive(ingestor.make_job(synth_hive, 'HOSTA'))
+
+
+@pytest.mark.parametrize('output_format, kept', [('sqlite', None), ('jsonl', ['00000_HOSTA.jsonl'])])
+def test_batch_reports_the_per_hive_files_it_keeps(synth_hive, tmp_path, capsys, output_format, kept, cli_args):
+    ingestor = Amcache.BatchIngestor(str(tmp_path), output_format, Amcache.parser_options(cli_args(), output_format),
+                                     workers=1)
+    [result] = ingestor.run([ingestor.make_job(synth_hive, 'HOSTA')])
+    assert result['ok'], result.get('error')
+    partition_dir = tmp_path / 'partitions'
+    if kept is None:
+        assert not partition_dir.exists()
+        assert "per-hive files" not in capsys.readouterr().out
+    else:
+        assert sorted(os.listdir(partition_dir)) == kept
+        assert f"✓ Kept 1 per-hive files in {partition_dir}" in capsys.readouterr().out
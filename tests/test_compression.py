@@ -0,0 +1,112 @@
+import bz2
+import contextlib
+import io
+import lzma
+import os
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import Amcache
+
+DECOMPRESS = {'gzip': lambda data: _members(data, lambda: zlib.decompressobj(31)),
+              'bz2': lambda data: _members(data, bz2.BZ2Decompressor),
+              'xz': lambda data: _members(data, lzma.LZMADecompressor)}
+
+
+def _members(data, decompressor):
+    """Decompress concatenated members one at a time; returns (data, member count)."""
+    out, count = [], 0
+    while data:
+        member = decompressor()
+        out.append(member.decompress(data))
+        data = member.unused_data
+        count += 1
+    return b''.join(out), count
+
+
+def _parse(hive, out_dir, output_format, compress=None, threads=1):
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser = Amcache.AmcacheParser(hive, str(out_dir / 'amcache.db'), output_format, show_progress=False,
+                                       use_database=False, compress=compress, compress_threads=threads)
+        parser.parse()
+    return parser
+
+
+def _outputs(out_dir):
+    """{relative path without the compression suffix: (data, member count)} of every output file under out_dir."""
+    files = {}
+    for dirpath, _, filenames in os.walk(out_dir):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            stem, suffix = os.path.splitext(os.path.relpath(path, out_dir))
+            method = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}.get(suffix)
+            data = open(path, 'rb').read()
+            files[stem if method else stem + suffix] = (DECOMPRESS[method](data) if method else (data, 1))
+    return files
+
+
+@pytest.mark.parametrize('output_format', ['jsonl', 'csv'])
+@pytest.mark.parametrize('method', ['gzip', 'bz2', 'xz'])
+@pytest.mark.parametrize('threads', [1, 3])
+def test_compressed_outputs_decompress_to_the_plain_output(synth_hive, tmp_path, output_format, method, threads):
+    (tmp_path / 'plain').mkdir()
+    (tmp_path / 'packed').mkdir()
+    _parse(synth_hive, tmp_path / 'plain', output_format)
+    parser = _parse(synth_hive, tmp_path / 'packed', output_format, method, threads)
+    plain, packed = _outputs(tmp_path / 'plain'), _outputs(tmp_path / 'packed')
+    plain.pop('amcache_parser.log', None)
+    packed.pop('amcache_parser.log', None)
+    assert plain.keys() == packed.keys() and plain
+    for name, (data, _) in plain.items():
+        assert packed[name][0] == data, name
+    if threads == 1:
+        assert all(count == 1 for _, count in packed.values())
+    stats = parser.compression.stats()
+    assert stats['uncompressed_bytes'] == sum(len(data) for data, _ in plain.values())
+
+
+@pytest.mark.parametrize('method', ['gzip', 'bz2', 'xz'])
+def test_threaded_output_is_independent_members(tmp_path, method):
+    lines = [f"{n},c:\\windows\\system32\\file{n}.dll,{n * 7919 % 100003}\n" for n in range(60000)]
+    compression = Amcache.OutputCompression(method, threads=3, block_size=256 << 10)
+    try:
+        with compression.open(str(tmp_path / 'rows.csv'), newline='') as f:
+            f.writelines(lines)
+    finally:
+        compression.close()
+    data, members = DECOMPRESS[method](open(compression.path(str(tmp_path / 'rows.csv')), 'rb').read())
+    assert data == ''.join(lines).encode('utf-8')
+    assert members > 1
+    assert compression.stats()['uncompressed_bytes'] == len(data)
+
+
+def test_close_writes_pending_blocks_in_order(tmp_path, monkeypatch):
+    compress_block = Amcache._compress_block
+
+    def slow_first_block(method, level, block):
+        if block.startswith(b'0000'):
+            time.sleep(0.2)  # finishes after the blocks submitted behind it
+        return compress_block(method, level, block)
+
+    monkeypatch.setattr(Amcache, '_compress_block', slow_first_block)
+    blocks = [f"{n:04d}".encode() * 8 for n in range(12)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        raw = Amcache._CompressedFile(str(tmp_path / 'out.gz'), 'gzip', 6, executor, block_size=32, max_pending=len(blocks))
+        for block in blocks:
+            raw.write(block)
+        assert raw.compressed_bytes == 0  # every block is still pending
+        raw.close()
+    data, members = DECOMPRESS['gzip'](open(tmp_path / 'out.gz', 'rb').read())
+    assert data == b''.join(blocks) and members == len(blocks)
+    assert raw.raw_bytes == len(data) and raw.compressed_bytes == os.path.getsize(tmp_path / 'out.gz')
+
+
+def test_close_flushes_a_partial_block(tmp_path):
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        raw = Amcache._CompressedFile(str(tmp_path / 'out.xz'), 'xz', 6, executor, block_size=1 << 20)
+        raw.write(b'short tail')
+        raw.close()
+    assert DECOMPRESS['xz'](open(tmp_path / 'out.xz', 'rb').read()) == (b'short tail', 1)
@@ -0,0 +1,63 @@
+import pytest
+
+import Amcache
+import synth_hive
+
+REG_BINARY = 3
+
+
+def _walk(engine, path):
+    """Every Inventory key as (subkey, key name, last write, typed values)."""
+    handle = Amcache.MappedHiveFile(path)
+    try:
+        walker = Amcache.open_engine(engine, handle)
+        return [(name, key_name, walker.last_write(key), walker.values(key, True))
+                for name, subkey in walker.root_subkeys() if name.startswith('Inventory')
+                for key_name, key in walker.iter_keys(subkey)]
+    finally:
+        handle.close()
+
+
+@pytest.fixture(scope='module')
+def resident_hive(tmp_path_factory):
+    """A hive whose values keep 0-4 bytes of data resident in the vk offset field."""
+    writer = synth_hive.HiveWriter()
+    keys = [
+        (f'entry{size}', writer.key(f'entry{size}', [
+            ('Blob', REG_BINARY, bytes(range(1, size + 1))),
+            ('Name', synth_hive.REG_SZ, 'a' * (size // 2)),
+        ], last_write=1700000000.1234567 + size))
+        for size in range(5)
+    ]
+    root = writer.key('Root', children=[('InventoryApplication', writer.key('InventoryApplication', children=keys))])
+    top = writer.key('{00000000}', children=[('Root', root)], flags=0x2C)
+    path = str(tmp_path_factory.mktemp('hives') / 'resident.hve')
+    with open(path, 'wb') as f:
+        writer.write(f, top)
+    return path
+
+
+def test_native_rows_match_registry_rows(synth_hive):
+    assert _walk('native', synth_hive) == _walk('registry', synth_hive)
+
+
+def test_native_resident_data_matches_registry(resident_hive):
+    native = _walk('native', resident_hive)
+    assert native == _walk('registry', resident_hive)
+    assert [values['Blob'] for _, _, _, values in native] == [bytes(range(1, size + 1)) for size in range(5)]
+
+
+def test_registry_last_write_falls_back_to_public_timestamp(synth_hive):
+    class PublicKey:
+        def __init__(self, key):
+            self.timestamp = key.timestamp
+
+    handle = Amcache.MappedHiveFile(synth_hive)
+    try:
+        walker = Amcache.open_engine('registry', handle)
+        _, key = next(walker.iter_keys(walker.subkey('InventoryApplicationFile')))
+        raw = walker.last_write(key)
+        assert walker.last_write(PublicKey(key)) == Amcache.filetime(key.timestamp())
+        assert abs(walker.last_write(PublicKey(key)) - raw) < 10
+    finally:
+        handle.close()
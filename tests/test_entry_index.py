@@ -0,0 +1,49 @@
+import sqlite3
+
+import pytest
+
+import Amcache
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = Amcache.SQLiteWriter(str(tmp_path / 'amcache.db'))
+    writer.execute("CREATE TABLE items (entry_id TEXT, host TEXT, key_last_write INTEGER)")
+    writer.executemany("INSERT INTO items VALUES (?, ?, ?)",
+                       [(f"id{n}", 'HOSTA', 1000 + n) for n in range(50)] + [('other', 'HOSTB', 7)])
+    yield writer
+    writer.close()
+
+
+def test_small_tables_are_held_in_memory(writer):
+    index = Amcache.EntryIdIndex(writer, 'items', 'HOSTA', max_in_memory=50)
+    assert index._bloom is None
+    assert index.last_write('id7') == 1007 and 'id49' in index
+    assert index.last_write('other') is Amcache.EntryIdIndex.MISSING
+    assert index.disk_lookups == 0
+
+
+def test_large_tables_fall_back_to_a_bloom_filter_and_sql(writer):
+    index = Amcache.EntryIdIndex(writer, 'items', 'HOSTA', max_in_memory=10)
+    assert index._bloom is not None and index._ids == {}
+    # Stored IDs pass the filter and are confirmed (with their last-write time) by a lookup.
+    assert [index.last_write(f"id{n}") for n in range(50)] == [1000 + n for n in range(50)]
+    assert index.disk_lookups == 50
+    # New IDs are almost all rejected by the filter without touching the database.
+    assert not any(f"new{n}" in index for n in range(1000))
+    assert index.disk_lookups - 50 < 50
+    assert 'other' not in index  # stored, but for another host
+    index.add('new0', 5)
+    lookups = index.disk_lookups
+    assert index.last_write('new0') == 5 and index.disk_lookups == lookups
+
+
+def test_parse_with_a_bloom_index_finds_stored_entries(synth_hive, tmp_path, parse_hive, monkeypatch):
+    db_path = tmp_path / 'amcache.db'
+    first = parse_hive(synth_hive, db_path)
+    with sqlite3.connect(str(db_path)) as conn:
+        conn.execute("DELETE FROM hives")  # forget the hive so the rerun walks every key again
+    monkeypatch.setattr(Amcache.EntryIdIndex.__init__, '__defaults__', ('', 10))
+    second = parse_hive(synth_hive, db_path)
+    assert second._entry_index and all(index._bloom is not None for index in second._entry_index.values())
+    assert (second.new_entries, second.unchanged_entries) == (0, first.new_entries)
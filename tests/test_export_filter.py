@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+import Amcache
+
+NOW = 1_700_000_000
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE InventoryApplicationFile (entry_id TEXT, Name TEXT, Size INTEGER, key_last_write_epoch INTEGER)")
+    conn.executemany("INSERT INTO InventoryApplicationFile VALUES (?, ?, ?, ?)", [
+        ('c:/a.exe', 'a.exe', 10, NOW - 3600),
+        ('c:/b.exe', 'b;c.exe', 20, NOW - 30 * 86400),
+        ('c:/users/x/c.exe', None, 30, NOW),
+    ])
+    yield conn
+    conn.close()
+
+
+def _names(conn, expression):
+    sql, params = Amcache.build_export_filter(conn, 'InventoryApplicationFile', expression, now=NOW)
+    return [row[0] for row in conn.execute(sql, params)]
+
+
+@pytest.mark.parametrize('expression, expected', [
+    ('', ['c:/a.exe', 'c:/b.exe', 'c:/users/x/c.exe']),
+    ('size >= 20', ['c:/b.exe', 'c:/users/x/c.exe']),
+    ('key_last_write_epoch >= -1d', ['c:/a.exe', 'c:/users/x/c.exe']),
+    ('key_last_write_epoch < -2w and Size > 0', ['c:/b.exe']),
+    ("Name = 'b;c.exe'", ['c:/b.exe']),
+    ('Name = b;c.exe', ['c:/b.exe']),
+    ('Size > -1.5', ['c:/a.exe', 'c:/b.exe', 'c:/users/x/c.exe']),
+    ('Size < 10.5', ['c:/a.exe']),
+    ('key_last_write_epoch > -3', ['c:/a.exe', 'c:/b.exe', 'c:/users/x/c.exe']),
+    ('Name = null', ['c:/users/x/c.exe']),
+    ('entry_id contains /USERS/', ['c:/users/x/c.exe']),
+])
+def test_filter_selects_rows(conn, expression, expected):
+    assert _names(conn, expression) == expected
+
+
+def test_values_are_bound_not_interpolated(conn):
+    sql, params = Amcache.build_export_filter(conn, 'InventoryApplicationFile', 'Name = "x\' or 1=1 --"', now=NOW)
+    assert 'or' not in sql.lower().split('where', 1)[1]
+    assert conn.execute(sql, params).fetchall() == []
+
+
+@pytest.mark.parametrize('expression, message', [
+    ('Nope = 1', 'no such column'),
+    ('Name; = 1', 'no such column'),
+    ('Name like 1', 'unknown operator'),
+    ('Size = 1 or Size = 2', "expected 'and'"),
+    ('Size = 1 OR 1 = 1', "expected 'and'"),
+    ('Size = 1 and', 'expression ends with'),
+    ('Size =', 'incomplete condition'),
+    ('Size = 1 ; DROP TABLE InventoryApplicationFile', "expected 'and' before ';'"),
+    ('key_last_write_epoch >= -7x', 'bad relative time'),
+    ('key_last_write_epoch >= -7dd', 'bad relative time'),
+    ('key_last_write_epoch >= -1.5d', 'bad relative time'),
+    ('key_last_write_epoch >= -7D', 'bad relative time'),
+])
+def test_filter_rejects(conn, expression, message):
+    with pytest.raises(ValueError, match=message):
+        Amcache.build_export_filter(conn, 'InventoryApplicationFile', expression, now=NOW)
+    assert conn.execute("SELECT count(*) FROM InventoryApplicationFile").fetchone()[0] == 3
+
+
+@pytest.mark.parametrize('table', ['Missing', 'InventoryApplicationFile; DROP TABLE x'])
+def test_filter_rejects_unknown_tables(conn, table):
+    with pytest.raises(ValueError, match='no such table'):
+        Amcache.build_export_filter(conn, table, 'Size = 1', now=NOW)
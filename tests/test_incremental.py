@@ -0,0 +1,126 @@
+import contextlib
+import io
+import json
+import shutil
+import sqlite3
+
+import pytest
+
+import Amcache
+
+SUBKEY = 'InventoryApplicationFile'
+
+
+@pytest.fixture
+def touched_hive(synth_hive, tmp_path):
+    """A copy of the hive with one InventoryApplicationFile key's last-write time moved forward."""
+    path = str(tmp_path / 'touched.hve')
+    shutil.copyfile(synth_hive, path)
+    handle = Amcache.MappedHiveFile(path)
+    try:
+        engine = Amcache.NativeEngine(handle)
+        entry_id, nk = next(engine.iter_keys(engine.subkey(SUBKEY)))
+        last_write = engine.last_write(nk)
+    finally:
+        handle.close()
+    with open(path, 'r+b') as f:
+        f.seek(nk + 4)
+        f.write((last_write + 10_000_000).to_bytes(8, 'little'))
+    return path, entry_id
+
+
+def _ioc_file(tmp_path, name, *indicators):
+    path = tmp_path / name
+    path.write_text('\n'.join(indicators), encoding='utf-8')
+    return str(path)
+
+
+@pytest.fixture
+def ingest(tmp_path, cli_args):
+    """Batch-ingest one hive as HOSTA into tmp_path/out; returns the job result."""
+    def run(hive, **overrides):
+        ingestor = Amcache.BatchIngestor(str(tmp_path / 'out'), 'sqlite',
+                                         Amcache.parser_options(cli_args(**overrides), 'sqlite'), workers=1)
+        with contextlib.redirect_stdout(io.StringIO()):
+            [result] = ingestor.run([ingestor.make_job(hive, 'HOSTA')])
+        assert result['ok'], result.get('error')
+        return result
+    return run
+
+
+def test_batch_rerun_decodes_only_changed_keys(synth_hive, touched_hive, tmp_path, ingest):
+    hive, entry_id = touched_hive
+    first = ingest(synth_hive)
+    second = ingest(hive)
+    assert first['entries'] > 1
+    assert (second['entries'], second['merged']) == (1, 1)
+    with sqlite3.connect(str(tmp_path / 'out' / 'amcache.db')) as conn:
+        assert conn.execute(f"SELECT COUNT(*) FROM {SUBKEY} WHERE host = 'HOSTA' AND entry_id = ?",
+                            (entry_id,)).fetchone()[0] == 1
+
+
+def test_batch_rerun_with_the_same_iocs_skips_the_sweep(synth_hive, touched_hive, tmp_path, ingest):
+    iocs = _ioc_file(tmp_path, 'iocs.txt', '*.exe')
+    ingest(synth_hive, ioc=iocs)
+    assert ingest(synth_hive, ioc=iocs)['skipped']
+    assert ingest(touched_hive[0], ioc=iocs)['entries'] == 1
+    # New indicators have not been swept over the stored keys yet.
+    changed = ingest(touched_hive[0], ioc=_ioc_file(tmp_path, 'more.txt', '*.exe', '*.dll'))
+    assert not changed['skipped'] and changed['entries'] > 1
+
+
+def test_rerun_with_the_same_iocs_skips_the_hive(synth_hive, tmp_path, parse_hive):
+    db_path = tmp_path / 'amcache.db'
+    iocs = _ioc_file(tmp_path, 'iocs.txt', '*.exe')
+    first = parse_hive(synth_hive, db_path, ioc_path=iocs)
+    assert not first.skipped_hive and sum(first.ioc_matches.values()) > 0
+    assert parse_hive(synth_hive, db_path, ioc_path=iocs).skipped_hive
+    narrower = parse_hive(synth_hive, db_path, ioc_path=iocs, search_keys=[SUBKEY])
+    assert not narrower.skipped_hive and narrower.skipped_decodes == 0
+
+
+def test_workers_skip_unchanged_keys(synth_hive, touched_hive, tmp_path, parse_hive):
+    db_path = tmp_path / 'amcache.db'
+    first = parse_hive(synth_hive, db_path, workers=2)
+    second = parse_hive(touched_hive[0], db_path, workers=2)
+    walked = first.new_entries
+    assert (second.changed_entries, second.unchanged_entries) == (1, walked - 1)
+    assert second.skipped_decodes == walked - 1
+
+
+def _covered(db_path):
+    with sqlite3.connect(str(db_path)) as conn:
+        return {sha: json.loads(subkeys) for sha, subkeys in conn.execute("SELECT hive_sha256, subkeys FROM hives")}
+
+
+def test_known_hive_is_skipped_with_its_own_message(synth_hive, tmp_path, parse_hive):
+    parse_hive(synth_hive, tmp_path / 'main.db')
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        parser = Amcache.AmcacheParser(synth_hive, str(tmp_path / 'partition.db'), 'sqlite', show_progress=False,
+                                       known_hives=_covered(tmp_path / 'main.db'))
+        parser.parse()
+    assert parser.skipped_hive
+    assert "Hive already ingested for this host" in output.getvalue()
+
+
+def test_rerun_with_a_wider_selection_parses_the_missing_subkeys(synth_hive, tmp_path, parse_hive):
+    db_path = tmp_path / 'amcache.db'
+    narrow = parse_hive(synth_hive, db_path, search_keys=['InventoryApplication'])
+    wide = parse_hive(synth_hive, db_path)
+    assert not wide.skipped_hive and wide.new_entries > 0 and wide.unchanged_entries == 0
+    with sqlite3.connect(str(db_path)) as conn:
+        for table in ('InventoryApplication', 'InventoryApplicationFile', 'InventoryDriverBinary'):
+            assert conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] > 0
+    [covered] = _covered(db_path).values()
+    assert covered['InventoryApplication'] == narrow.new_entries
+    assert sum(covered.values()) == narrow.new_entries + wide.new_entries
+    assert parse_hive(synth_hive, db_path).skipped_hive
+    assert parse_hive(synth_hive, db_path, search_keys=['InventoryDriverBinary']).skipped_hive
+
+
+def test_batch_rerun_with_a_wider_selection_parses_the_missing_subkeys(synth_hive, tmp_path, ingest):
+    ingest(synth_hive, search_keys='InventoryApplication')
+    wide = ingest(synth_hive)
+    assert not wide['skipped'] and wide['merged'] == wide['entries'] > 0
+    assert ingest(synth_hive)['skipped']
@@ -0,0 +1,115 @@
+import hashlib
+
+import pytest
+
+import Amcache
+
+
+def _sha1_set(*values):
+    buckets = Amcache.SHA1Set.new_buckets()
+    for value in values:
+        digest = Amcache.SHA1Set.normalize(value)
+        buckets[digest[0] << 8 | digest[1]] += digest
+    return Amcache.SHA1Set(buckets)
+
+
+def _sha1(n):
+    return hashlib.sha1(str(n).encode()).hexdigest()
+
+
+def test_sha1_set_hits_and_misses():
+    hashes = [_sha1(n) for n in range(2000)]
+    # Digests sharing a 16-bit prefix land in one bucket, so the bisection has work to do.
+    crowded = ['abcd' + _sha1(n)[4:] for n in range(100)]
+    sha1s = _sha1_set(*hashes, *crowded, '0000' + _sha1('prefixed'), _sha1(0))
+    assert len(sha1s) == 2000 + 100 + 1
+    for value in hashes + crowded + [_sha1('prefixed')]:
+        assert bytes.fromhex(value) in sha1s
+    for n in range(2000, 2200):
+        assert bytes.fromhex(_sha1(n)) not in sha1s
+    assert bytes.fromhex('abcd' + '0' * 36) not in sha1s
+    assert bytes.fromhex('ff' * 20) not in sha1s
+
+
+def test_sha1_set_does_not_match_across_digest_boundaries():
+    first = bytes.fromhex('abab' + '00' * 8 + 'abab' + '11' * 8)
+    second = bytes.fromhex('abab' + '22' * 18)
+    sha1s = _sha1_set(first.hex(), second.hex())
+    # The tail of one digest and the head of the next form a 20-byte run in the packed data.
+    straddling = first[10:] + second[:10]
+    assert straddling in first + second
+    assert straddling not in sha1s
+    assert first in sha1s and second in sha1s
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('0000' + 'a' * 40, bytes.fromhex('a' * 40)),
+    ('  ' + 'A' * 40 + '\n', bytes.fromhex('a' * 40)),
+    ('a' * 39, None),
+    ('1111' + 'a' * 40, None),
+    ('g' * 40, None),
+    (12345, None),
+    (None, None),
+])
+def test_sha1_normalize(value, expected):
+    assert Amcache.SHA1Set.normalize(value) == expected
+
+
+def _matches(patterns, path):
+    matcher = Amcache.PathMatcher([Amcache.PathMatcher.normalize(p) for p in patterns])
+    return sorted(matcher.matches(Amcache.PathMatcher.normalize(path)))
+
+
+@pytest.mark.parametrize('patterns, path, expected', [
+    # Literals are case-insensitive substrings, with / and \ treated alike.
+    (['\\temp\\'], 'C:/Users/x/AppData/Local/Temp/a.exe', ['\\temp\\']),
+    (['mimikatz'], 'c:\\tools\\MimiKatz64.exe', ['mimikatz']),
+    (['mimikatz'], 'c:\\tools\\mimi.exe', []),
+    # Overlapping literals and literals that prefix one another are all reported.
+    (['evil', 'evil.exe', 'il.ex'], 'c:\\evil.exe', ['evil', 'evil.exe', 'il.ex']),
+    (['bad', 'evil'], 'c:\\evil\\bad.dll', ['bad', 'evil']),
+    (['evil.exe'], 'c:\\evil.ex', []),
+    # Globs match the whole path.
+    (['*\\psexec*.exe'], 'c:\\windows\\psexesvc.exe', []),
+    (['*\\psexe?vc.exe'], 'c:\\windows\\psexesvc.exe', ['*\\psexe?vc.exe']),
+    (['c:\\temp\\*'], 'd:\\c:\\temp\\x', []),
+    (['*.ps1'], 'c:\\scripts\\run.ps1.txt', []),
+    (['c:\\users\\*\\downloads\\*.exe'], 'C:\\Users\\bob\\Downloads\\setup.exe', ['c:\\users\\*\\downloads\\*.exe']),
+    # ? is exactly one character; [...] is a character class and [! negates it.
+    (['*\\a?.dll'], 'c:\\a.dll', []),
+    (['*\\tool[0-9].exe'], 'c:\\tool7.exe', ['*\\tool[0-9].exe']),
+    (['*\\tool[!0-9].exe'], 'c:\\tool7.exe', []),
+    # An unclosed [ is a literal bracket, not an error.
+    (['*\\[draft*'], 'c:\\[draft] notes.exe', ['*\\[draft*']),
+    # Regex metacharacters in a pattern are literal.
+    (['a+b(1).exe'], 'c:\\a+b(1).exe', ['a+b(1).exe']),
+    (['*\\a+b(?).exe'], 'c:\\a+b(1).exe', ['*\\a+b(?).exe']),
+    # Literals and globs are reported together.
+    (['\\temp\\', '*.exe', '*.dll'], 'c:\\temp\\x.exe', ['*.exe', '\\temp\\']),
+])
+def test_path_matcher(patterns, path, expected):
+    assert _matches(patterns, path) == sorted(expected)
+
+
+def test_path_matcher_without_patterns_matches_nothing():
+    assert Amcache.PathMatcher([]).matches('c:\\anything') == []
+
+
+def test_ioc_file_is_split_into_hashes_and_patterns(tmp_path):
+    path = tmp_path / 'iocs.txt'
+    path.write_text('\n'.join([
+        '# comment',
+        '',
+        '0000' + _sha1(1).upper() + '\tdropper',
+        _sha1(2),
+        'd41d8cd98f00b204e9800998ecf8427e',
+        'C:/Temp/*.EXE',
+    ]), encoding='utf-8')
+    matcher = Amcache.IOCMatcher.load(str(path))
+    assert (len(matcher.hashes), len(matcher.paths), matcher.ignored) == (2, 1, 1)
+    found = matcher.match('InventoryApplicationFile', 'c:\\temp\\x.exe', {
+        'FileId': '0000' + _sha1(1), 'LowerCaseLongPath': 'c:\\temp\\x.exe'})
+    assert ('sha1', _sha1(1), 'FileId', '0000' + _sha1(1)) in found
+    assert any(kind == 'path' and pattern == 'c:\\temp\\*.exe' for kind, pattern, _, _ in found)
+    assert matcher.match('InventoryApplicationFile', 'c:\\other.exe', {
+        'FileId': '0000' + _sha1(3), 'LowerCaseLongPath': 'c:\\other.exe'}) == []
@@ -0,0 +1,51 @@
+import contextlib
+import io
+import os
+import sqlite3
+
+import pytest
+
+import Amcache
+
+
+@pytest.fixture(params=Amcache.ENGINES)
+def parser(synth_hive, tmp_path, request):
+    """A parser that never touches a database, as library callers create it."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser = Amcache.AmcacheParser(synth_hive, str(tmp_path / 'db' / 'unused.db'), use_database=False,
+                                       engine=request.param)
+    yield parser
+    parser.handle.close()
+
+
+def test_entries_match_a_database_parse(parser, synth_hive, tmp_path, parse_hive):
+    parse_hive(synth_hive, tmp_path / 'amcache.db')
+    with sqlite3.connect(str(tmp_path / 'amcache.db')) as conn:
+        stored = {(subkey, entry_id, last_write)
+                  for subkey in ('InventoryApplication', 'InventoryApplicationFile', 'InventoryDriverBinary')
+                  for entry_id, last_write in conn.execute(f"SELECT entry_id, key_last_write FROM {subkey}")}
+    assert {(entry.subkey_name, entry.entry_id, entry.last_write) for entry in parser.iter_entries()} == stored
+    assert not os.path.exists(tmp_path / 'db')
+
+
+def test_values_are_decoded_on_first_access(parser):
+    entry = next(parser.iter_entries(subkeys=['InventoryApplicationFile']))
+    assert not entry.decoded
+    values = entry.values
+    assert entry.decoded and values['LowerCaseLongPath'].endswith(values['Name'])
+    assert entry.as_dict() == {'subkey_name': 'InventoryApplicationFile', 'entry_id': entry.entry_id, 'data': values}
+
+
+def test_subkeys_fields_and_typed_values(parser):
+    entries = list(parser.iter_entries(subkeys=['InventoryDriverBinary'], fields=['DriverName', 'ImageSize']))
+    assert entries and {entry.subkey_name for entry in entries} == {'InventoryDriverBinary'}
+    assert all(set(entry.values) <= {'DriverName', 'ImageSize'} and 'DriverName' in entry.values for entry in entries)
+    assert all(isinstance(entry.values['ImageSize'], str) for entry in entries if 'ImageSize' in entry.values)
+    typed = next(parser.iter_entries(subkeys=['InventoryApplicationFile'], fields=['Size'], typed=True))
+    assert isinstance(typed.values['Size'], int)
+
+
+def test_entries_are_not_retained_and_can_be_walked_again(parser):
+    count = sum(1 for _ in parser.iter_entries())
+    assert count > 0 and parser.entries == []
+    assert sum(1 for _ in parser.iter_entries()) == count
@@ -0,0 +1,114 @@
+import logging
+import shutil
+import struct
+
+import pytest
+
+import Amcache
+
+ORIGINAL = 'Application '.encode('utf-16le')
+REPLAYED = 'Replayed-Ok '.encode('utf-16le')
+TORN = 'Torn-Write!! '.encode('utf-16le')[:len(ORIGINAL)]
+
+
+def _log_entry(sequence, bins_size, pages, torn=False):
+    """An HvLE entry writing each (hive bin offset, bytes) page; a torn entry has a stale body hash."""
+    refs = b''.join(struct.pack('<II', offset, len(data)) for offset, data in pages)
+    body = refs + b''.join(data for _, data in pages)
+    size = (0x28 + len(body) + 0x1FF) & ~0x1FF
+    entry = bytearray(size)
+    struct.pack_into('<4sIIIII', entry, 0, b'HvLE', size, 0, sequence, bins_size, len(pages))
+    entry[0x28:0x28 + len(body)] = body
+    struct.pack_into('<Q', entry, 0x18, Amcache.marvin32(entry[0x28:]))
+    struct.pack_into('<Q', entry, 0x20, Amcache.marvin32(entry[:0x20]))
+    if torn:
+        entry[-1] ^= 0xFF
+    return bytes(entry)
+
+
+def _write_log(path, entries):
+    base = bytearray(0x200)
+    struct.pack_into('<4sII', base, 0, b'regf', 1, 1)
+    struct.pack_into('<I', base, 0x1C, Amcache._LOG_FILE_TYPE_NEW)
+    struct.pack_into('<I', base, 0x1FC, Amcache.regf_checksum(base))
+    with open(path, 'wb') as f:
+        f.write(base + b''.join(entries))
+
+
+def _patched_page(hive, replacement):
+    """The hive bin page holding the first application name, with that name replaced."""
+    at = hive.index(ORIGINAL)
+    start = (at - Amcache._HBIN_START) & ~0xFFF
+    page = bytearray(hive[Amcache._HBIN_START + start:Amcache._HBIN_START + start + 0x1000])
+    position = at - Amcache._HBIN_START - start
+    page[position:position + len(replacement)] = replacement
+    return start, bytes(page)
+
+
+def _names(path, replay_logs=True):
+    handle = Amcache.MappedHiveFile(path, replay_logs=replay_logs)
+    try:
+        walker = Amcache.open_engine('native', handle)
+        names = [walker.values(key, False)['Name']
+                 for _, key in walker.iter_keys(walker.subkey('InventoryApplication'))]
+        return names, handle.dirty, handle.replayed_entries
+    finally:
+        handle.close()
+
+
+@pytest.fixture
+def dirty_hive(synth_hive, tmp_path):
+    """A copy of the synthetic hive whose base block says sequence 1 is not yet flushed."""
+    path = str(tmp_path / 'Amcache.hve')
+    shutil.copyfile(synth_hive, path)
+    with open(path, 'r+b') as f:
+        base = bytearray(f.read(0x200))
+        struct.pack_into('<II', base, 4, 2, 1)
+        struct.pack_into('<I', base, 0x1FC, Amcache.regf_checksum(base))
+        f.seek(0)
+        f.write(base)
+    with open(path, 'rb') as f:
+        hive = f.read()
+    return path, hive, struct.unpack_from('<I', hive, 0x28)[0]
+
+
+def test_clean_hive_is_not_dirty(synth_hive):
+    with open(synth_hive, 'rb') as f:
+        assert not Amcache.hive_is_dirty(f.read(0x200))
+
+
+def test_dirty_hive_replays_log1(dirty_hive):
+    path, hive, bins_size = dirty_hive
+    _write_log(path + '.LOG1', [_log_entry(1, bins_size, [_patched_page(hive, REPLAYED)])])
+
+    names, dirty, replayed = _names(path)
+    assert dirty and replayed == 1
+    assert any(name.startswith('Replayed-Ok') for name in names)
+    # The replay goes to a private copy; the hive on disk is untouched.
+    with open(path, 'rb') as f:
+        assert f.read() == hive
+    assert not any(name.startswith('Replayed-Ok') for name in _names(path, replay_logs=False)[0])
+
+
+def test_replay_stops_at_torn_entry(dirty_hive, caplog):
+    path, hive, bins_size = dirty_hive
+    _write_log(path + '.LOG1', [
+        _log_entry(1, bins_size, [_patched_page(hive, REPLAYED)]),
+        _log_entry(2, bins_size, [_patched_page(hive, TORN)], torn=True),
+    ])
+
+    with caplog.at_level(logging.WARNING):
+        names, dirty, replayed = _names(path)
+    assert dirty and replayed == 1
+    assert any(name.startswith('Replayed-Ok') for name in names)
+    assert not any(name.startswith('Torn') for name in names)
+    assert 'torn entry 2' in caplog.text
+
+
+def test_replay_skips_entries_already_in_the_primary_file(dirty_hive):
+    path, hive, bins_size = dirty_hive
+    _write_log(path + '.LOG1', [_log_entry(0, bins_size, [_patched_page(hive, REPLAYED)])])
+
+    names, dirty, replayed = _names(path)
+    assert dirty and replayed == 0
+    assert not any(name.startswith('Replayed-Ok') for name in names)
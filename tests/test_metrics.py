@@ -0,0 +1,72 @@
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+import Amcache
+
+
+def _metrics(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_sqlite_parse_metrics(synth_hive, tmp_path, parse_hive):
+    parser = parse_hive(synth_hive, tmp_path / 'amcache.db', metrics_path=str(tmp_path / 'metrics.json'), pipeline=True)
+    metrics = _metrics(tmp_path / 'metrics.json')
+    assert (metrics['hive'], metrics['hive_sha256'], metrics['engine']) == (synth_hive, parser.hive_sha256, 'registry')
+    assert (metrics['output_format'], metrics['workers'], metrics['skipped_hive']) == ('sqlite', 1, False)
+    assert {'load_hive', 'hash', 'db_init', 'walk', 'decode', 'pipeline_drain', 'db_flush', 'indexes', 'sqlite_write'} <= metrics['stages'].keys()
+    counters = metrics['counters']
+    entries = parser.new_entries
+    assert entries > 0
+    assert counters['keys_walked'] == counters['entries_decoded'] == counters['entries_new'] == entries
+    assert counters['rows_written'] == entries and counters['failed_rows'] == counters['failed'] == 0
+    assert (counters['entries_changed'], counters['entries_unchanged'], counters['skipped_decodes']) == (0, 0, 0)
+    assert counters['hive_bytes'] == counters['hashed_bytes'] == os.path.getsize(synth_hive)
+    assert counters['database_bytes'] == os.path.getsize(tmp_path / 'amcache.db')
+    assert counters['values_decoded'] > entries
+    walk = metrics['stages']['walk']
+    assert metrics['rates']['keys_per_sec'] == pytest.approx(entries / walk, rel=1e-3)
+    assert metrics['total_seconds'] >= walk
+    assert metrics['pipeline']['sqlite']['items'] == entries and 'compression' not in metrics
+
+
+def test_streaming_parse_metrics(synth_hive, tmp_path):
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser = Amcache.AmcacheParser(synth_hive, str(tmp_path / 'amcache.db'), 'jsonl', show_progress=False,
+                                       use_database=False, compress='gzip', metrics_path=str(tmp_path / 'metrics.json'))
+        parser.parse()
+    metrics = _metrics(tmp_path / 'metrics.json')
+    counters = metrics['counters']
+    assert counters['keys_walked'] == counters['entries_decoded'] == parser.parsed_count > 0
+    # Without a database there is nothing to compare against, so no entry counts as new.
+    assert counters['entries_new'] == 0
+    assert 'rows_written' not in counters and 'sqlite_write' not in metrics['stages']
+    assert counters['export_bytes'] == os.path.getsize(tmp_path / 'amcache.jsonl.gz')
+    assert metrics['compression']['method'] == 'gzip'
+    assert metrics['compression']['compressed_bytes'] == counters['export_bytes']
+
+
+def test_rerun_of_an_unchanged_hive_reports_the_skip(synth_hive, tmp_path, parse_hive):
+    parse_hive(synth_hive, tmp_path / 'amcache.db')
+    parse_hive(synth_hive, tmp_path / 'amcache.db', metrics_path=str(tmp_path / 'metrics.json'))
+    metrics = _metrics(tmp_path / 'metrics.json')
+    assert metrics['skipped_hive'] is True
+    assert metrics['counters']['entries_new'] == metrics['counters'].get('keys_walked', 0) == 0
+
+
+def test_batch_metrics_list_every_ingested_hive(synth_hive, tmp_path, cli_args):
+    ingestor = Amcache.BatchIngestor(str(tmp_path / 'out'), 'sqlite', Amcache.parser_options(cli_args(), 'sqlite'),
+                                     workers=1, metrics_path=str(tmp_path / 'metrics.json'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = ingestor.run([ingestor.make_job(synth_hive, 'HOSTA'), ingestor.make_job(synth_hive, 'HOSTB')])
+    metrics = _metrics(tmp_path / 'metrics.json')
+    counters = metrics['batch']['counters']
+    assert (counters['hives'], counters['hives_failed']) == (2, 0)
+    assert counters['entries'] == counters['rows_merged'] == sum(r['entries'] for r in results) > 0
+    assert {'merge', 'indexes'} <= metrics['batch']['stages'].keys()
+    assert [hive['host'] for hive in metrics['hives']] == ['HOSTA', 'HOSTB']
+    assert all(hive['counters']['entries_new'] == counters['entries'] // 2 for hive in metrics['hives'])
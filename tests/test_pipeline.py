@@ -0,0 +1,31 @@
+import sqlite3
+
+
+def _tables(db_path):
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY host, entry_id").fetchall()
+                for table in ('InventoryApplication', 'InventoryApplicationFile', 'InventoryDriverBinary')}
+    finally:
+        conn.close()
+
+
+def _without_parsed_timestamp(tables):
+    return {table: [row[:-1] for row in rows] for table, rows in tables.items()}
+
+
+def test_pipeline_writes_the_same_rows_as_a_serial_run(synth_hive, tmp_path, parse_hive):
+    parse_hive(synth_hive, tmp_path / 'serial.db')
+    parse_hive(synth_hive, tmp_path / 'pipeline.db', pipeline=True, queue_depth=1)
+    assert _without_parsed_timestamp(_tables(tmp_path / 'serial.db')) == \
+        _without_parsed_timestamp(_tables(tmp_path / 'pipeline.db'))
+
+
+def test_pipeline_rerun_shares_the_connection_with_lookups(synth_hive, tmp_path, parse_hive):
+    db_path = tmp_path / 'amcache.db'
+    first = parse_hive(synth_hive, db_path, pipeline=True, host='a')
+    # A second host re-reads the tables (entry index, schema checks) while the writer thread is busy.
+    second = parse_hive(synth_hive, db_path, pipeline=True, host='b', queue_depth=1)
+    assert first.new_entries == second.new_entries > 0
+    tables = _tables(db_path)
+    assert all(len(rows) == 2 * len({row[0] for row in rows}) for rows in tables.values())
@@ -0,0 +1,97 @@
+import sqlite3
+
+import pytest
+
+import Amcache
+
+COLUMNS = Amcache.FTS_COLUMNS['InventoryApplicationFile']
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = Amcache.enable_fts_sync(sqlite3.connect(str(tmp_path / 'amcache.db'), isolation_level=None))
+    conn.execute(f"CREATE TABLE InventoryApplicationFile (host TEXT, entry_id TEXT, {', '.join(COLUMNS)}, "
+                 "PRIMARY KEY (host, entry_id))")
+    _upsert(conn, [('a', f'c:/dir{n}/app{n}.exe') for n in range(50)])
+    yield conn
+    conn.close()
+
+
+def _upsert(conn, rows):
+    conn.executemany("INSERT OR REPLACE INTO InventoryApplicationFile (host, entry_id, LowerCaseLongPath, Name, "
+                     "OriginalFileName) VALUES (?, ?, ?, ?, ?)",
+                     [(host, path, path, path.rsplit('/', 1)[1], None) for host, path in rows])
+
+
+def _search(conn, text):
+    return sorted(row[0] for row in conn.execute(
+        "SELECT f.host || ':' || f.entry_id FROM InventoryApplicationFile_fts JOIN InventoryApplicationFile f "
+        "ON f.rowid = InventoryApplicationFile_fts.rowid WHERE InventoryApplicationFile_fts MATCH ?", (f'"{text}"',)))
+
+
+def _build(conn):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        Amcache.build_query_indexes(conn)
+    finally:
+        conn.set_trace_callback(None)
+    return [sql for sql in statements if "'rebuild'" in sql]
+
+
+def _check(conn):
+    conn.execute("INSERT INTO InventoryApplicationFile_fts(InventoryApplicationFile_fts, rank) VALUES ('integrity-check', 1)")
+
+
+def test_fts_is_rebuilt_only_when_created(conn):
+    assert len(_build(conn)) == 1
+    assert _search(conn, 'dir7/app7') == ['a:c:/dir7/app7.exe']
+
+    # Replacing, adding and deleting rows keeps the index current without another rebuild.
+    conn.execute("BEGIN")
+    _upsert(conn, [('a', 'c:/dir7/app7.exe'), ('b', 'c:/dir7/app7.exe'), ('b', 'c:/newdir/tool.exe')])
+    conn.execute("UPDATE InventoryApplicationFile SET LowerCaseLongPath = 'c:/moved/app8.exe' WHERE entry_id = 'c:/dir8/app8.exe'")
+    conn.execute("DELETE FROM InventoryApplicationFile WHERE entry_id = 'c:/dir9/app9.exe'")
+    conn.execute("COMMIT")
+    assert _build(conn) == []
+    _check(conn)
+    assert _search(conn, 'dir7/app7') == ['a:c:/dir7/app7.exe', 'b:c:/dir7/app7.exe']
+    assert _search(conn, 'newdir') == ['b:c:/newdir/tool.exe']
+    assert _search(conn, 'moved/app8') == ['a:c:/dir8/app8.exe']
+    assert _search(conn, 'dir8/app8') == []
+    assert _search(conn, 'dir9') == []
+
+    # Rows replaced or deleted before they were ever indexed never reach the index.
+    _upsert(conn, [('c', 'c:/short/lived.exe'), ('c', 'c:/gone.exe')])
+    _upsert(conn, [('c', 'c:/short/lived.exe')])
+    conn.execute("DELETE FROM InventoryApplicationFile WHERE entry_id = 'c:/gone.exe'")
+    assert _build(conn) == []
+    _check(conn)
+    assert _search(conn, 'short/lived') == ['c:c:/short/lived.exe']
+    assert _search(conn, 'gone') == []
+
+
+def test_fts_without_triggers_is_rebuilt_once(conn):
+    _build(conn)
+    for suffix in ('ai', 'ad', 'au'):
+        conn.execute(f"DROP TRIGGER InventoryApplicationFile_fts_{suffix}")
+    _upsert(conn, [('c', 'c:/written/before/triggers.exe')])
+    assert len(_build(conn)) == 1
+    assert _search(conn, 'written/before') == ['c:c:/written/before/triggers.exe']
+    assert _build(conn) == []
+    _check(conn)
+
+
+def test_ingests_keep_fts_in_step(synth_hive, tmp_path, parse_hive):
+    db_path = tmp_path / 'amcache.db'
+    parse_hive(synth_hive, db_path, host='a')
+    parse_hive(synth_hive, db_path, host='b', pipeline=True)
+    conn = sqlite3.connect(str(db_path))
+    try:
+        _check(conn)
+        total = conn.execute("SELECT COUNT(*) FROM InventoryApplicationFile").fetchone()[0]
+        indexed = conn.execute("SELECT COUNT(*) FROM InventoryApplicationFile_fts WHERE InventoryApplicationFile_fts "
+                               "MATCH '\"exe\" OR \"dll\" OR \"sys\"'").fetchone()[0]
+        assert total == indexed > 0
+    finally:
+        conn.close()
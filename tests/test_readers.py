@@ -0,0 +1,98 @@
+import random
+import sys
+
+import pytest
+
+import Amcache
+
+
+def _nt_file(path):
+    """Open path through the Windows API, as live hives are read."""
+    Amcache._bind_windows_api()
+    handle = Amcache.ctypes.windll.kernel32.CreateFileW(path, Amcache._GENERIC_READ, 1, None, 3, 0, None)
+    return Amcache.NTFileLikeObject(handle)
+
+
+RAW_READERS = {
+    'file': lambda path: open(path, 'rb'),
+    'mapped': Amcache.MappedHiveFile,
+    'nt': pytest.param(_nt_file, marks=pytest.mark.skipif(sys.platform != 'win32', reason="Windows API")),
+}
+
+
+@pytest.fixture
+def hive_bytes(synth_hive):
+    with open(synth_hive, 'rb') as f:
+        return f.read()
+
+
+def test_mapped_readinto_matches_file(synth_hive, hive_bytes):
+    handle = Amcache.MappedHiveFile(synth_hive)
+    try:
+        buffer = bytearray(5000)
+        handle.seek(4000)
+        assert handle.readinto(buffer) == 5000
+        assert buffer == hive_bytes[4000:9000]
+        handle.seek(len(hive_bytes) - 10)
+        assert handle.readinto(buffer) == 10
+        assert handle.tell() == len(hive_bytes)
+    finally:
+        handle.close()
+
+
+@pytest.mark.parametrize('opener', RAW_READERS.values(), ids=RAW_READERS.keys())
+def test_whole_hive_file_over_raw_reader(opener, synth_hive, hive_bytes):
+    handle = Amcache.WholeHiveFile(opener(synth_hive))
+    try:
+        assert handle.max_size == len(hive_bytes)
+        assert bytes(handle.buffer()) == hive_bytes
+        rng = random.Random(0)
+        for _ in range(200):
+            offset, size = rng.randrange(len(hive_bytes)), rng.randrange(1, 70000)
+            handle.seek(offset)
+            if rng.random() < 0.5:
+                assert handle.read(size) == hive_bytes[offset:offset + size]
+            else:
+                buffer = bytearray(size)
+                count = handle.readinto(buffer)
+                assert bytes(buffer[:count]) == hive_bytes[offset:offset + size]
+            assert handle.tell() == min(offset + size, len(hive_bytes))
+        handle.seek(0)
+        assert handle.read()[:] == hive_bytes
+    finally:
+        handle.close()
+
+
+def test_whole_hive_file_takes_mapping_without_copy(synth_hive):
+    mapped = Amcache.MappedHiveFile(synth_hive)
+    handle = Amcache.WholeHiveFile(mapped)
+    try:
+        assert handle.read() is mapped.mapping
+        assert handle.copies == 0
+    finally:
+        handle.close()
+
+
+def test_whole_hive_file_reads_plain_file_once(synth_hive):
+    handle = Amcache.WholeHiveFile(open(synth_hive, 'rb'))
+    try:
+        assert handle.syscalls == 1
+        handle.seek(0)
+        handle.read()
+        assert handle.copies == 0
+    finally:
+        handle.close()
+
+
+@pytest.mark.parametrize('engine', Amcache.ENGINES)
+def test_engines_decode_the_same_through_whole_hive_file(engine, synth_hive):
+    def rows(handle):
+        try:
+            walker = Amcache.open_engine(engine, handle)
+            return [(name, key_name, walker.values(key, True))
+                    for name, subkey in walker.root_subkeys() if name.startswith('Inventory')
+                    for key_name, key in walker.iter_keys(subkey)]
+        finally:
+            handle.close()
+
+    assert rows(Amcache.WholeHiveFile(open(synth_hive, 'rb'))) == rows(Amcache.MappedHiveFile(synth_hive))
@@ -0,0 +1,61 @@
+import sqlite3
+
+import Amcache
+
+# Tables as the first release of the parser created them: no host, hashes, key times or
+# timestamp companions, and a NOT NULL JSON blob for every subkey without a fixed layout.
+OLD_TABLES = """
+    CREATE TABLE subkeys (subkey_name TEXT PRIMARY KEY, parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+    CREATE TABLE InventoryApplication (
+        entry_id TEXT PRIMARY KEY, ProgramId TEXT, ProgramInstanceId TEXT, Name TEXT, Version TEXT, Publisher TEXT,
+        Language TEXT, LanguageName TEXT, InstallDate TEXT, Source TEXT, RootDirPath TEXT, HiddenArp TEXT,
+        UninstallString TEXT, RegistryKeyPath TEXT, MsiPackageCode TEXT, MsiProductCode TEXT, MsiInstallDate TEXT,
+        DefaultValue TEXT, parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE InventoryDriverBinary (
+        entry_id TEXT PRIMARY KEY, data TEXT NOT NULL, parsed_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    INSERT INTO InventoryApplication (entry_id, Name, InstallDate) VALUES ('old-app', 'Old App', '08/12/2021 02:11:38');
+    INSERT INTO InventoryDriverBinary (entry_id, data) VALUES ('old-driver', '{"DriverName": "old.sys"}');
+"""
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_old_database_is_upgraded_in_place(synth_hive, tmp_path, parse_hive):
+    db_path = tmp_path / 'amcache.db'
+    with sqlite3.connect(str(db_path)) as conn:
+        conn.executescript(OLD_TABLES)
+    parser = parse_hive(synth_hive, db_path)
+    assert parser.new_entries > 0
+    conn = sqlite3.connect(str(db_path))
+    try:
+        for subkey in ('InventoryApplication', 'InventoryDriverBinary'):
+            table = Amcache.table_name(subkey)
+            expected = {column for column, _, _ in Amcache.subkey_columns(subkey)}
+            expected |= {f"{source}_{suffix}" for source in Amcache.timestamp_sources(subkey) for suffix in ('epoch', 'iso')}
+            assert expected | {'host', 'hive_sha256', 'key_last_write', 'data'} <= _columns(conn, table)
+        # Rows written before the upgrade keep their values and get their companions backfilled.
+        assert conn.execute("SELECT host, Name, InstallDate_epoch, InstallDate_iso FROM InventoryApplication "
+                            "WHERE entry_id = 'old-app'").fetchone() == ('', 'Old App', 1628734298, '2021-08-12T02:11:38Z')
+        assert conn.execute("SELECT data FROM InventoryDriverBinary WHERE entry_id = 'old-driver'").fetchone() == \
+            ('{"DriverName": "old.sys"}',)
+        # New rows fill the typed columns; the old NOT NULL blob gets an empty object instead of NULL.
+        rows = conn.execute("SELECT DriverName, data FROM InventoryDriverBinary WHERE entry_id != 'old-driver'").fetchall()
+        assert rows and all(name and data == '{}' for name, data in rows)
+        assert conn.execute("SELECT COUNT(*) FROM InventoryApplicationFile").fetchone()[0] > 0
+    finally:
+        conn.close()
+
+
+def test_upgraded_database_reparses_as_unchanged(synth_hive, tmp_path, parse_hive):
+    db_path = tmp_path / 'amcache.db'
+    with sqlite3.connect(str(db_path)) as conn:
+        conn.executescript(OLD_TABLES)
+    first = parse_hive(synth_hive, db_path)
+    with sqlite3.connect(str(db_path)) as conn:
+        conn.execute("DELETE FROM hives")  # walk every key again instead of skipping the known hive
+    second = parse_hive(synth_hive, db_path)
+    assert (second.new_entries, second.unchanged_entries) == (0, first.new_entries)
@@ -0,0 +1,101 @@
+import json
+import sqlite3
+import threading
+
+import pytest
+
+import Amcache
+
+
+@pytest.fixture(scope='module')
+def service(synth_hive, tmp_path_factory, parse_hive):
+    db_path = tmp_path_factory.mktemp('serve') / 'amcache.db'
+    parse_hive(synth_hive, db_path)
+    service = Amcache.QueryService(str(db_path), pool_size=4)
+    yield service
+    service.pool.close()
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, 25),
+    ('1', 1),
+    (' 50 ', 50),
+    ('007', 7),
+    (str(Amcache.MAX_PAGE_SIZE + 1), Amcache.MAX_PAGE_SIZE),
+    ('9' * 5000, Amcache.MAX_PAGE_SIZE),
+])
+def test_page_limit(value, expected):
+    assert Amcache._page_limit(value, 25) == expected
+
+
+@pytest.mark.parametrize('value', ['0', '000', '-5', '', 'ten', '1.5', '1e3', '١٢', '²'])
+def test_page_limit_rejects_with_a_fixed_message(value):
+    with pytest.raises(ValueError) as raised:
+        Amcache._page_limit(value, 25)
+    assert str(raised.value) == "limit must be a positive integer"
+
+
+def test_clamped_limits_share_a_cache_entry(service):
+    first = json.loads(service.page('/path', {'prefix': 'c:', 'limit': '5000'}))
+    hits = service.cache.stats()['hits']
+    second = json.loads(service.page('/path', {'prefix': 'c:', 'limit': str(Amcache.MAX_PAGE_SIZE)}))
+    assert first == second and first['count'] > 0
+    assert service.cache.stats()['hits'] == hits + 1
+
+
+def test_counters_survive_concurrent_requests(service):
+    with sqlite3.connect(service.db_path) as conn:
+        file_id = conn.execute("SELECT FileId FROM InventoryApplicationFile LIMIT 1").fetchone()[0]
+    before = service.stats()
+    threads, per_thread = 8, 200
+
+    def work():
+        for n in range(per_thread):
+            service.page(f'/hash/{file_id}', {'limit': str(n % 3 + 1)})
+            service.count_error()
+
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    after = service.stats()
+    assert after['requests']['hash'] - before['requests']['hash'] == threads * per_thread
+    assert after['errors'] - before['errors'] == threads * per_thread
+
+
+@pytest.fixture(scope='module')
+def server(service):
+    from http.server import ThreadingHTTPServer
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Amcache._make_query_handler(service))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('path, status', [
+    ('/hash/nothex?format=jsonl', 400),
+    ('/path?format=jsonl', 400),
+    ('/path?prefix=c:&table=Missing&format=jsonl', 404),
+    ('/path?prefix=c:&cursor=zz&format=jsonl', 400),
+    ('/path?prefix=c:&cursor=5b312c2261225d&format=jsonl', 400),
+])
+def test_bad_jsonl_requests_get_a_plain_error(server, path, status):
+    import http.client
+    conn = http.client.HTTPConnection('127.0.0.1', server, timeout=10)
+    try:
+        conn.request('GET', path)
+        response = conn.getresponse()
+        assert response.status == status
+        assert response.getheader('Transfer-Encoding') is None
+        assert 'error' in json.loads(response.read())
+        # The keep-alive connection carries no stray response: the next request gets its own.
+        conn.request('GET', '/path?prefix=c:&limit=2&format=jsonl')
+        response = conn.getresponse()
+        assert response.status == 200
+        assert len(response.read().decode('utf-8').splitlines()) > 2
+    finally:
+        conn.close()
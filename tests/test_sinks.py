@@ -0,0 +1,112 @@
+import contextlib
+import csv
+import io
+import json
+import os
+import sqlite3
+
+import pytest
+
+import Amcache
+
+SUBKEYS = ('InventoryApplication', 'InventoryApplicationFile', 'InventoryDriverBinary')
+
+
+def _text(value):
+    """Compare values across outputs as text, with empty and missing values alike."""
+    return None if value is None or value == '' else str(value)
+
+
+@pytest.fixture(scope='module')
+def database_export(synth_hive, tmp_path_factory, parse_hive):
+    """{table: {entry_id: {column: value}}} exported with export_query from a SQLite parse of the hive."""
+    out_dir = tmp_path_factory.mktemp('database')
+    parse_hive(synth_hive, out_dir / 'amcache.db')
+    conn = sqlite3.connect(str(out_dir / 'amcache.db'))
+    exported = {}
+    try:
+        for subkey in SUBKEYS:
+            table = Amcache.table_name(subkey)
+            columns = [column for column, _, _ in Amcache.subkey_columns(subkey)]
+            epochs = [f"{source}_epoch" for source in Amcache.timestamp_sources(subkey)[1:]]
+            path = str(out_dir / f"{table}.jsonl")
+            Amcache.export_query(conn, f"SELECT entry_id, {', '.join(columns + epochs)} FROM {table}", (), 'jsonl', path)
+            with open(path, encoding='utf-8') as f:
+                exported[table] = {row.pop('entry_id'): row for row in map(json.loads, f)}
+    finally:
+        conn.close()
+    assert all(exported.values())
+    return exported
+
+
+def _parse(hive, out_dir, output_format):
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser = Amcache.AmcacheParser(hive, str(out_dir / 'amcache.db'), output_format, show_progress=False,
+                                       use_database=False)
+        parser.parse()
+    return parser
+
+
+def _expected(database_export):
+    """The database export with every schema column as text, keyed like the sink outputs."""
+    return {table: {entry_id: {column: _text(row[column]) for column in row if not column.endswith('_epoch')}
+                    for entry_id, row in rows.items()}
+            for table, rows in database_export.items()}
+
+
+def test_jsonl_sink_matches_the_database_export(synth_hive, tmp_path, database_export):
+    _parse(synth_hive, tmp_path, 'jsonl')
+    streamed = {}
+    with open(tmp_path / 'amcache.jsonl', encoding='utf-8') as f:
+        for record in map(json.loads, f):
+            subkey = record['subkey_name']
+            columns = Amcache.subkey_columns(subkey)
+            data = record['data']
+            streamed.setdefault(Amcache.table_name(subkey), {})[record['entry_id']] = {
+                column: _text(data.get(value_name or column)) for column, value_name, _ in columns}
+    assert streamed == _expected(database_export)
+
+
+def test_csv_sink_matches_the_database_export(synth_hive, tmp_path, database_export):
+    _parse(synth_hive, tmp_path, 'csv')
+    streamed = {}
+    for table in database_export:
+        with open(tmp_path / 'amcache_csv' / f"{table}.csv", encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        assert all(row.pop('extra') == '' for row in rows)
+        streamed[table] = {row.pop('entry_id'): {column: _text(value) for column, value in row.items()} for row in rows}
+    assert streamed == _expected(database_export)
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_arrow_sink_matches_the_database_export(synth_hive, tmp_path, database_export, file_format):
+    pa = pytest.importorskip('pyarrow')
+    _parse(synth_hive, tmp_path, file_format)
+    for table, rows in database_export.items():
+        path = str(tmp_path / f"amcache_{file_format}" / f"{table}.{file_format}")
+        if file_format == 'parquet':
+            import pyarrow.parquet as pq
+            written = pq.read_table(path)
+        else:
+            with pa.memory_map(path) as source:
+                written = pa.ipc.open_file(source).read_all()
+        kinds = {column: kind for column, _, kind in Amcache.subkey_columns(table)}
+        assert set(written.schema.names) == {'entry_id', 'extra', *kinds}
+        assert set(written.column('extra').to_pylist()) == {None}
+        for record in written.drop_columns(['extra']).to_pylist():
+            expected = rows[record.pop('entry_id')]
+            for column, value in record.items():
+                if kinds[column] in Amcache.TIMESTAMP_KINDS:
+                    # Typed timestamps line up with the normalised epoch the database keeps beside the raw value.
+                    assert (None if value is None else int(value.timestamp())) == expected[f"{column}_epoch"], column
+                elif kinds[column] == 'int':
+                    assert value == expected[column], column
+                else:
+                    assert _text(value) == _text(expected[column]), column
+        assert written.num_rows == len(rows)
+
+
+def test_sinks_write_nothing_to_the_database(synth_hive, tmp_path):
+    parser = _parse(synth_hive, tmp_path, 'jsonl')
+    assert parser.parsed_count > 0
+    assert not os.path.exists(tmp_path / 'amcache.db')
@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+import Amcache
+
+INSERT = "INSERT INTO items (entry_id, name) VALUES (?, ?)"
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = Amcache.SQLiteWriter(str(tmp_path / 'amcache.db'), batch_size=3)
+    writer.execute("CREATE TABLE items (entry_id TEXT PRIMARY KEY, name TEXT NOT NULL)")
+    yield writer
+    writer.close()
+
+
+def _stored(writer):
+    with sqlite3.connect(writer.db_path) as conn:
+        return conn.execute("SELECT entry_id, name FROM items ORDER BY entry_id").fetchall()
+
+
+def test_rows_are_written_in_batches(writer):
+    rows = [(f"id{n}", f"name{n}") for n in range(7)]
+    for row in rows[:2]:
+        writer.add('items', INSERT, row)
+    assert (writer.commits, writer.rows_written, _stored(writer)) == (0, 0, [])
+    for row in rows[2:]:
+        writer.add('items', INSERT, row)
+    # Two full batches went out in one transaction each; the seventh row waits for close().
+    assert (writer.commits, writer.rows_written) == (2, 6)
+    assert len(_stored(writer)) == 6
+    writer.close()
+    assert (writer.commits, writer.rows_written, writer.failed_rows) == (3, 7, 0)
+    assert _stored(writer) == rows
+
+
+def test_prepare_receives_the_whole_batch(writer):
+    batches = []
+
+    def prepare(rows):
+        batches.append(len(rows))
+        return [(entry_id, name.upper()) for entry_id, name in rows]
+
+    for n in range(4):
+        writer.add('items', INSERT, (f"id{n}", f"name{n}"), prepare)
+    writer.flush()
+    assert batches == [3, 1]
+    assert [name for _, name in _stored(writer)] == ['NAME0', 'NAME1', 'NAME2', 'NAME3']
+
+
+def test_rejected_batch_is_retried_row_by_row(writer, caplog, capsys):
+    writer.add('items', INSERT, ('id0', 'kept'))
+    writer.add('items', INSERT, ('id1', None))  # NOT NULL fails the whole executemany
+    writer.add('items', INSERT, ('id2', 'kept'))
+    assert 'retrying row by row' in caplog.text
+    assert "Failed to insert entry id1 into items" in capsys.readouterr().out
+    assert (writer.rows_written, writer.failed_rows, writer.commits) == (2, 1, 1)
+    assert _stored(writer) == [('id0', 'kept'), ('id2', 'kept')]
+    # The failed batch is not replayed by later flushes.
+    writer.add('items', INSERT, ('id3', 'kept'))
+    writer.close()
+    assert (writer.rows_written, writer.failed_rows) == (3, 1)
+
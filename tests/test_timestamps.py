@@ -0,0 +1,46 @@
+import pytest
+
+import Amcache
+
+EPOCH = 1615624784  # 2021-03-13T08:39:44Z
+MIDNIGHT = 1615593600  # 2021-03-13T00:00:00Z
+FILETIME = EPOCH * 10_000_000 + 116444736000000000
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('03/13/2021 08:39:44', (EPOCH, '2021-03-13T08:39:44Z')),
+    ('3/13/2021 08:39:44', (EPOCH, '2021-03-13T08:39:44Z')),
+    ('03/13/2021', (MIDNIGHT, '2021-03-13T00:00:00Z')),
+    ('20210313', (MIDNIGHT, '2021-03-13T00:00:00Z')),
+    ('2021-03-13', (MIDNIGHT, '2021-03-13T00:00:00Z')),
+    ('2021-03-13T08:39:44', (EPOCH, '2021-03-13T08:39:44Z')),
+    ('2021-03-13 08:39:44Z', (EPOCH, '2021-03-13T08:39:44Z')),
+    ('2021-03-13T10:39:44+02:00', (EPOCH, '2021-03-13T08:39:44Z')),
+    ('2021-03-13T08:39:44.250', (EPOCH, '2021-03-13T08:39:44Z')),
+    (str(EPOCH), (EPOCH, '2021-03-13T08:39:44Z')),
+    (str(FILETIME), (EPOCH, '2021-03-13T08:39:44Z')),
+    (EPOCH, (EPOCH, '2021-03-13T08:39:44Z')),
+    (FILETIME, (EPOCH, '2021-03-13T08:39:44Z')),
+])
+def test_accepted_forms(value, expected):
+    assert Amcache.TimestampNormalizer.convert(value) == expected
+
+
+@pytest.mark.parametrize('value', [
+    None, '', 'n/a', '0', 0, -5,
+    # Digit strings too short for an epoch: a date if they are one, never a 1970 timestamp.
+    '12345678', '20211332', '2021131', '1234',
+    '13/45/2021 00:00:00', '03/13/2021 25:00:00', '2021-13-01', '2021-03-13T08:39:44.5',
+    '١٢٣٤٥٦٧٨٩٠', 'x' * 19,
+])
+def test_values_left_unconverted(value):
+    assert Amcache.TimestampNormalizer.convert(value) == (None, None)
+
+
+def test_convert_column_converts_distinct_values_once():
+    normalizer = Amcache.TimestampNormalizer(max_cache=2)
+    column = ['20210313', '20210313', None, '03/13/2021 08:39:44', 'bogus']
+    assert normalizer.convert_column(column) == [
+        (MIDNIGHT, '2021-03-13T00:00:00Z'), (MIDNIGHT, '2021-03-13T00:00:00Z'), (None, None),
+        (EPOCH, '2021-03-13T08:39:44Z'), (None, None)]
+    assert (normalizer.values, normalizer.converted) == (5, 4)
@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+from concurrent.futures import Future
+
+import pytest
+
+import Amcache
+
+
+class InlineExecutor:
+    """Runs each job as it is submitted, so a poll collects it without waiting on a process pool."""
+    def __init__(self, ingest=Amcache._ingest_hive):
+        self.ingest = ingest
+        self.jobs = []
+
+    def submit(self, fn, job):
+        self.jobs.append(job)
+        future = Future()
+        future.set_result(self.ingest(job))
+        return future
+
+    def shutdown(self, cancel_futures=False):
+        pass
+
+
+def _fail(job):
+    return {'index': job['index'], 'path': job['path'], 'host': job['host'], 'db_path': job['db_path'],
+            'ok': False, 'error': 'hive is corrupt', 'seconds': 0.0}
+
+
+@pytest.fixture
+def watch_dir(tmp_path):
+    path = tmp_path / 'drop'
+    path.mkdir()
+    return path
+
+
+def _watcher(watch_dir, tmp_path, ingest=Amcache._ingest_hive, **options):
+    ingestor = Amcache.BatchIngestor(str(tmp_path / 'out'), 'sqlite', workers=1)
+    os.makedirs(ingestor.partition_dir, exist_ok=True)
+    watcher = Amcache.HiveWatcher(str(watch_dir), ingestor, poll_interval=0, **{'settle_seconds': 0, **options})
+    watcher._executor = InlineExecutor(ingest)
+    return watcher
+
+
+def _drop(watch_dir, host, data=b'regf' + b'\0' * 60):
+    path = watch_dir / host / 'Amcache.hve'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_hives_are_claimed_only_once_settled(watch_dir, tmp_path):
+    path = _drop(watch_dir, 'HOSTA')
+    watcher = _watcher(watch_dir, tmp_path, settle_seconds=60)
+    assert watcher.scan() == [] and watcher.scan() == []
+    watcher.settle_seconds = 0
+    assert watcher.scan() == [path]
+    # A file that is still growing starts settling again.
+    with open(path, 'ab') as f:
+        f.write(b'more')
+    assert watcher.scan() == []
+    assert watcher.scan() == [path]
+
+
+def test_zero_size_hives_never_settle(watch_dir, tmp_path):
+    path = _drop(watch_dir, 'HOSTA', b'')
+    watcher = _watcher(watch_dir, tmp_path)
+    assert watcher.scan() == [] and watcher.scan() == []
+    assert path in watcher._seen
+    with open(path, 'wb') as f:
+        f.write(b'regf')
+    assert watcher.scan() == []
+    assert watcher.scan() == [path]
+    os.remove(path)
+    assert watcher.scan() == [] and watcher._seen == {}
+
+
+def test_claim_moves_the_hive_and_its_logs(watch_dir, tmp_path):
+    path = _drop(watch_dir, 'HOSTA')
+    with open(path + '.LOG1', 'wb') as f:
+        f.write(b'log')
+    watcher = _watcher(watch_dir, tmp_path)
+    claim_dir, target = watcher.claim(path)
+    assert os.path.dirname(claim_dir) == os.path.join(str(watch_dir), '.processing')
+    assert sorted(os.listdir(claim_dir)) == ['HOSTA.hve', 'HOSTA.hve.LOG1', 'source.txt']
+    assert target == os.path.join(claim_dir, 'HOSTA.hve')
+    assert open(os.path.join(claim_dir, 'source.txt')).read() == path
+    assert not os.path.exists(path) and not os.path.exists(path + '.LOG1')
+    # Hidden directories are not watched, so a claimed hive is never picked up again.
+    assert watcher.scan() == [] and watcher.scan() == []
+
+
+def test_ingested_hives_move_to_processed(synth_hive, watch_dir, tmp_path):
+    path = _drop(watch_dir, 'HOSTA', open(synth_hive, 'rb').read())
+    watcher = _watcher(watch_dir, tmp_path)
+    watcher._conn = Amcache.enable_fts_sync(sqlite3.connect(watcher.ingestor.db_path, isolation_level=None))
+    try:
+        watcher.poll()
+        watcher.poll()
+    finally:
+        watcher._conn.close()
+    [job] = watcher._executor.jobs
+    assert (job['host'], job['source_path']) == ('HOSTA', path)
+    [claim] = os.listdir(watcher.processed_dir)
+    assert 'HOSTA.hve' in os.listdir(os.path.join(watcher.processed_dir, claim))
+    assert os.listdir(watcher.processing_dir) == [] and os.listdir(watcher.ingestor.partition_dir) == []
+    assert watcher.totals['ingested'] == 1 and watcher.totals['rows_merged'] == watcher.totals['entries'] > 0
+    with sqlite3.connect(watcher.ingestor.db_path) as conn:
+        assert conn.execute("SELECT host FROM hives").fetchall() == [('HOSTA',)]
+
+
+def test_failed_hives_are_retried_with_backoff_then_quarantined(watch_dir, tmp_path):
+    _drop(watch_dir, 'HOSTA')
+    watcher = _watcher(watch_dir, tmp_path, _fail, max_attempts=3, backoff=10)
+    watcher.poll()
+    watcher.poll()
+    delays = []
+    for attempt in (1, 2):
+        [(due, claim_dir, hive_path, attempts)] = watcher._retries
+        assert attempts == attempt and os.path.dirname(claim_dir) == watcher.processing_dir
+        delays.append(due - Amcache.time.monotonic())
+        # Make the retry due now instead of sleeping through the backoff.
+        watcher._retries = [(0, claim_dir, hive_path, attempts)]
+        watcher.poll()
+    assert [round(delay) for delay in delays] == [10, 20]
+    assert watcher._retries == [] and len(watcher._executor.jobs) == 3
+    [claim] = os.listdir(watcher.quarantine_dir)
+    quarantined = os.path.join(watcher.quarantine_dir, claim)
+    assert sorted(os.listdir(quarantined)) == ['HOSTA.hve', 'error.txt', 'source.txt']
+    assert '3 attempts, last error: hive is corrupt' in open(os.path.join(quarantined, 'error.txt')).read()
+    assert os.listdir(watcher.processing_dir) == [] and os.listdir(watcher.ingestor.partition_dir) == []
+    assert (watcher.totals['failed_attempts'], watcher.totals['quarantined']) == (3, 1)
+
+
+def test_status_file_reports_queue_totals_and_errors(watch_dir, tmp_path):
+    _drop(watch_dir, 'HOSTA')
+    _drop(watch_dir, 'HOSTB')
+    watcher = _watcher(watch_dir, tmp_path, _fail, max_attempts=2, backoff=60)
+    watcher.poll()
+    status = json.load(open(watcher.status_path))
+    assert status['state'] == 'running' and status['watch_dir'] == str(watch_dir)
+    assert (status['queue']['settling'], status['queue_length']) == (2, 2)
+    watcher.poll()
+    status = json.load(open(watcher.status_path))
+    # One worker: one hive failed and waits for its retry, the other is claimed and queued.
+    assert status['queue'] == {'settling': 0, 'waiting': 1, 'in_flight': 0, 'awaiting_merge': 0, 'retry_scheduled': 1}
+    assert status['totals']['failed_attempts'] == 1
+    [error] = status['recent_errors']
+    assert (error['host'], error['error'], error['attempt']) == ('HOSTA', 'hive is corrupt', 1)
+    watcher.write_status('stopped')
+    assert json.load(open(watcher.status_path))['state'] == 'stopped'
+
+
+def test_recover_requeues_unfinished_claims(watch_dir, tmp_path):
+    path = _drop(watch_dir, 'HOSTA')
+    first = _watcher(watch_dir, tmp_path)
+    claim_dir, target = first.claim(path)
+    second = _watcher(watch_dir, tmp_path)
+    second._recover()
+    assert list(second._queue) == [(claim_dir, target, 0)]